@@ -13,7 +13,9 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 import printable
-from printable import readable, render_with_column
+from printable import readable, render_column_data, render_many, render_with_column
+from printable.native import column as native_column
+from printable.native import widths_extension
 
 
 @dataclass(frozen=True)
@@ -36,6 +38,26 @@ def build_rows(row_count: int, column_count: int) -> list[list[str]]:
     return rows
 
 
+def build_low_cardinality_rows(row_count: int, column_count: int) -> list[list[str]]:
+    """生成枚举、状态码、日期、代码等低基数列组成的表格，单元格大量重复。"""
+    pools = [
+        ['正常 / ok', '失败 / failed', '等待 / pending'],
+        ['200', '301', '404', '500'],
+        [f'2018/10/{day:02d}' for day in range(1, 32)],
+        ['HSI', 'HSCEI', '000001.SH', '000300.SH', 'USDHKD'],
+    ]
+    headers = [f'列-{column_index} / column-{column_index}' for column_index in range(column_count)]
+    rows = [headers]
+    rows.extend(
+        [
+            pools[column_index % len(pools)][(row_index * 7 + column_index) % len(pools[column_index % len(pools)])]
+            for column_index in range(column_count)
+        ]
+        for row_index in range(row_count)
+    )
+    return rows
+
+
 def serialize_tsv(rows: Sequence[Sequence[str]]) -> str:
     """把表格数据序列化为 column 的输入格式。"""
     return ''.join('\t'.join(row) + '\n' for row in rows)
@@ -81,9 +103,14 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--columns', type=int, default=6, help='列数，默认 6')
     parser.add_argument('--warmup', type=int, default=2, help='预热次数，默认 2')
     parser.add_argument('--repeat', type=int, default=10, help='测量次数，默认 10')
+    parser.add_argument('--tiny-calls', type=int, default=2000, help='3×3 小表每轮调用次数，默认 2000')
+    parser.add_argument('--tables', type=int, default=0, help='批量渲染的表格数，默认 0 表示跳过批量测试')
+    parser.add_argument('--workers', type=int, default=None, help='批量渲染的并发数，默认由执行器决定')
     args = parser.parse_args()
-    if args.rows <= 0 or args.columns <= 0 or args.warmup < 0 or args.repeat <= 0:
-        parser.error('rows、columns、repeat 必须大于 0，warmup 不能小于 0')
+    if args.rows <= 0 or args.columns <= 0 or args.warmup < 0 or args.repeat <= 0 or args.tables < 0:
+        parser.error('rows、columns、repeat 必须大于 0，warmup、tables 不能小于 0')
+    if args.tiny_calls <= 0:
+        parser.error('tiny-calls 必须大于 0')
     return args
 
 
@@ -96,6 +123,26 @@ def print_result(name: str, result: BenchmarkResult) -> None:
     )
 
 
+def cold(render: Callable[[], str]) -> Callable[[], str]:
+    """每次渲染前清空宽度缓存，测量不依赖前一次渲染的结果。"""
+
+    def render_cold() -> str:
+        printable.width_cache_clear()
+        return render()
+
+    return render_cold
+
+
+def readable_without_width_cache(rows: Sequence[Sequence[str]]) -> str:
+    """关闭宽度缓存渲染，每个单元格都重新测量。"""
+    saved_cache_size = printable.WIDTH_CACHE_SIZE
+    printable.WIDTH_CACHE_SIZE = 0
+    try:
+        return readable(rows)
+    finally:
+        printable.WIDTH_CACHE_SIZE = saved_cache_size
+
+
 def readable_without_native_widths(rows: Sequence[Sequence[str]]) -> str:
     """以纯 Python 宽度计算渲染，临时禁用 native 宽度库。"""
     saved_widths_of = printable.native_widths_of
@@ -106,28 +153,209 @@ def readable_without_native_widths(rows: Sequence[Sequence[str]]) -> str:
         printable.native_widths_of = saved_widths_of
 
 
+def readable_with_wcswidth(rows: Sequence[Sequence[str]]) -> str:
+    """以逐单元格 wcswidth 渲染（纯 Python 快速宽度引擎之前的回退路径）。"""
+    saved_width_patterns = printable._width_patterns
+    printable._width_patterns = lambda: None
+    try:
+        return readable_without_native_widths(rows)
+    finally:
+        printable._width_patterns = saved_width_patterns
+
+
 def main() -> None:
     """对比纯 Python、C 宽度 + Python 渲染与 column 引擎。"""
     args = parse_args()
     rows = build_rows(args.rows, args.columns)
     tsv_input = serialize_tsv(rows)
 
-    python_width_result = measure(lambda: readable_without_native_widths(rows), args.warmup, args.repeat)
-    c_width_result = measure(lambda: readable(rows), args.warmup, args.repeat)
+    wcswidth_result = measure(cold(lambda: readable_with_wcswidth(rows)), args.warmup, args.repeat)
+    python_width_result = measure(cold(lambda: readable_without_native_widths(rows)), args.warmup, args.repeat)
+    c_width_result = measure(cold(lambda: readable(rows)), args.warmup, args.repeat)
     column_result = measure(
         lambda: render_with_column(tsv_input, table=True, separator='\t'),
         args.warmup,
         args.repeat,
     )
 
+    engine_args = argparse.Namespace(
+        limit=None, bar=[], bar_char='x', bar_width=100, bar_scale='linal', grid=None, sep_col=None, sep_row=None
+    )
+    engine_result = measure(lambda: render_column_data(rows, engine_args), args.warmup, args.repeat)
+
     print(f'rows={args.rows} columns={args.columns} repeat={args.repeat} charset=mixed-zh-en')
+    print_result('py-wcswidth', wcswidth_result)
     print_result('python', python_width_result)
     print_result('python+c-width', c_width_result)
     print_result('c-column', column_result)
+    print_result('column-engine', engine_result)
+    print(f'fast python widths vs wcswidth: {wcswidth_result.median_seconds / python_width_result.median_seconds:.2f}x')
     print(
         f'speedup vs python: c-width={python_width_result.median_seconds / c_width_result.median_seconds:.2f}x '
-        f'column={python_width_result.median_seconds / column_result.median_seconds:.2f}x'
+        f'column={python_width_result.median_seconds / column_result.median_seconds:.2f}x '
+        f'column-engine={python_width_result.median_seconds / engine_result.median_seconds:.2f}x'
+    )
+    print_low_cardinality_results(args)
+    print_bar_results(args)
+    print_width_reduction_results(rows, args)
+    print_width_entry_results(rows, args)
+    print_tiny_results(args)
+    if args.tables:
+        print_batch_results(rows, args)
+
+
+def print_low_cardinality_results(args: argparse.Namespace) -> None:
+    """对比低基数表格在无缓存、每次清空缓存与缓存常驻时的渲染耗时。"""
+    rows = build_low_cardinality_rows(args.rows, args.columns)
+    no_cache_result = measure(lambda: readable_without_width_cache(rows), args.warmup, args.repeat)
+    cold_result = measure(cold(lambda: readable(rows)), args.warmup, args.repeat)
+    printable.width_cache_clear()
+    warm_result = measure(lambda: readable(rows), args.warmup, args.repeat)
+    cache_info = printable.width_cache_info()
+
+    print(f'low-cardinality rows={args.rows} columns={args.columns} hits={cache_info.hits} misses={cache_info.misses}')
+    print_result('no-cache', no_cache_result)
+    print_result('cache-cold', cold_result)
+    print_result('cache-warm', warm_result)
+    print(
+        f'speedup vs no-cache: cold={no_cache_result.median_seconds / cold_result.median_seconds:.2f}x '
+        f'warm={no_cache_result.median_seconds / warm_result.median_seconds:.2f}x'
+    )
+
+
+def format_bars_per_cell(records: Sequence[Sequence[object]], headers: Sequence[str], bars: set[str]) -> list:
+    """逐条计算条形图最大值并逐个单元格转换（按列转换之前的做法）。"""
+    maximums = printable.calculate_bar_maximums(records, headers, bars, 'linal')
+    return [printable.format_record(record, headers, bars, 'x', 100, maximums, 'linal') for record in records]
+
+
+def print_bar_results(args: argparse.Namespace) -> None:
+    """对比条形图列逐个单元格转换与按列转换的耗时。"""
+    headers = [f'value-{column_index}' for column_index in range(args.columns)]
+    records = [
+        [(row_index * 7919 + column_index * 104729) % 100003 / 7.0 - 5000 for column_index in range(args.columns)]
+        for row_index in range(args.rows)
+    ]
+    bars = set(headers)
+    per_cell_result = measure(lambda: format_bars_per_cell(records, headers, bars), args.warmup, args.repeat)
+    columnar_result = measure(
+        lambda: list(printable._iter_formatted_records(records, headers, bars, 'x', 100, 'linal')),
+        args.warmup,
+        args.repeat,
+    )
+    print(f'bars rows={args.rows} columns={args.columns} (all bar columns)')
+    print_result('bar-per-cell', per_cell_result)
+    print_result('bar-columnar', columnar_result)
+    print(f'bar speedup: {per_cell_result.median_seconds / columnar_result.median_seconds:.2f}x')
+
+
+def column_maximums_per_cell(flat_widths: Sequence[int], column_count: int) -> list[int]:
+    """逐个单元格在 Python 中比较求列宽（按列切片归约之前的做法）。"""
+    widths = list(flat_widths[:column_count])
+    for row_start in range(column_count, len(flat_widths), column_count):
+        for column_index in range(column_count):
+            widths[column_index] = max(widths[column_index], flat_widths[row_start + column_index])
+    return widths
+
+
+def print_width_reduction_results(rows: Sequence[Sequence[str]], args: argparse.Namespace) -> None:
+    """对比列宽归约：逐单元格 max、按列切片 max，以及 native 库测量时在 C 中顺带归约。"""
+    flat_cells = [cell for row in rows for cell in row]
+    flat_widths = printable._measure_widths(flat_cells)
+    per_cell_result = measure(lambda: column_maximums_per_cell(flat_widths, args.columns), args.warmup, args.repeat)
+    sliced_result = measure(
+        lambda: [max(flat_widths[index :: args.columns]) for index in range(args.columns)], args.warmup, args.repeat
     )
+    print(f'width reduction rows={len(rows)} columns={args.columns}')
+    print_result('max-per-cell', per_cell_result)
+    print_result('max-sliced', sliced_result)
+    if printable.column_available():
+        measure_result = measure(lambda: printable._measure_widths(flat_cells), args.warmup, args.repeat)
+        native_result = measure(
+            lambda: printable.column.column_widths_of(flat_cells, args.columns), args.warmup, args.repeat
+        )
+        print_result('c-measure', measure_result)
+        print_result('c-measure+max', native_result)
+    print(f'reduction speedup: {per_cell_result.median_seconds / sliced_result.median_seconds:.2f}x')
+
+
+def widths_via_ctypes(cells: Sequence[str]) -> object:
+    """跳过 _widths 扩展，按 \\x1f 拼接、编码后经 ctypes 测量（扩展之前的做法）。"""
+    saved_extension_widths_of = native_column.extension_widths_of
+    native_column.extension_widths_of = lambda cells: None
+    try:
+        return native_column.widths_of(cells)
+    finally:
+        native_column.extension_widths_of = saved_extension_widths_of
+
+
+def print_width_entry_results(rows: Sequence[Sequence[str]], args: argparse.Namespace) -> None:
+    """对比 native 宽度的两个入口：ctypes 拼接编码与 _widths 扩展直接读取 str 缓冲区。"""
+    if widths_extension() is None or not printable.column_available():
+        print('width entry: 需要 _widths 扩展与 column 动态库，跳过')
+        return
+    flat_cells = [cell for row in rows for cell in row]
+    ctypes_result = measure(lambda: widths_via_ctypes(flat_cells), args.warmup, args.repeat)
+    extension_result = measure(lambda: native_column.widths_of(flat_cells), args.warmup, args.repeat)
+    print(f'width entry cells={len(flat_cells)}')
+    print_result('c-ctypes', ctypes_result)
+    print_result('c-extension', extension_result)
+    print(f'extension speedup: {ctypes_result.median_seconds / extension_result.median_seconds:.2f}x')
+
+
+def print_tiny_results(args: argparse.Namespace) -> None:
+    """测量 3×3 小表的单次调用开销，此时固定开销远大于实际渲染。"""
+    tiny_rows = build_rows(2, 3)
+    tiny_input = serialize_tsv(tiny_rows)
+
+    def repeat_calls(render: Callable[[], str]) -> Callable[[], str]:
+        def render_many_times() -> str:
+            output = ''
+            for _ in range(args.tiny_calls):
+                output = render()
+            return output
+
+        return render_many_times
+
+    python_result = measure(repeat_calls(lambda: readable(tiny_rows)), args.warmup, args.repeat)
+    column_result = measure(
+        repeat_calls(lambda: render_with_column(tiny_input, table=True, separator='\t')),
+        args.warmup,
+        args.repeat,
+    )
+    print(f'tiny rows=3 columns=3 calls={args.tiny_calls} (per call)')
+    print_result('tiny-python', per_call(python_result, args.tiny_calls))
+    print_result('tiny-column', per_call(column_result, args.tiny_calls))
+
+
+def per_call(result: BenchmarkResult, call_count: int) -> BenchmarkResult:
+    """把整轮耗时换算为单次调用耗时。"""
+    return BenchmarkResult(
+        median_seconds=result.median_seconds / call_count,
+        minimum_seconds=result.minimum_seconds / call_count,
+        p95_seconds=result.p95_seconds / call_count,
+    )
+
+
+def print_batch_results(rows: Sequence[Sequence[str]], args: argparse.Namespace) -> None:
+    """对比逐张串行渲染与 render_many 并行渲染多张表格的吞吐。"""
+    tables = [rows] * args.tables
+    serial_result = measure(lambda: [readable(table) for table in tables], args.warmup, args.repeat)
+    batch_results = {
+        'batch-python': measure(
+            lambda: render_many(tables, engine='python', workers=args.workers), args.warmup, args.repeat
+        ),
+    }
+    if printable.column_available():
+        batch_results['batch-column'] = measure(
+            lambda: render_many(tables, engine='column', workers=args.workers), args.warmup, args.repeat
+        )
+
+    print(f'tables={args.tables} workers={args.workers or "auto"}')
+    print_result('serial', serial_result)
+    for name, result in batch_results.items():
+        print_result(name, result)
+        print(f'{name} throughput vs serial: {serial_result.median_seconds / result.median_seconds:.2f}x')
 
 
 if __name__ == '__main__':
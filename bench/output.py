@@ -0,0 +1,84 @@
+import argparse
+import io
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from printable import iter_readable, write_lines
+
+
+def build_lines(row_count: int) -> list[str]:
+    """渲染一张中英文混合的表格，返回输出行。"""
+    rows = [['编号', 'name', '说明']]
+    rows += [[str(index), f'item-{index}', f'第 {index} 行 / row {index}'] for index in range(row_count)]
+    return list(iter_readable(rows))
+
+
+def print_per_line(lines: Sequence[str], output: io.BufferedWriter) -> None:
+    """旧做法：经文本层逐行 print。"""
+    text_output = io.TextIOWrapper(output, encoding='utf-8', write_through=False)
+    for line in lines:
+        print(line, file=text_output)
+    text_output.flush()
+    text_output.detach()
+
+
+def encode_per_line(lines: Sequence[str], output: io.BufferedWriter) -> None:
+    """旧分页器做法：逐行编码、逐行写入。"""
+    output.writelines(f'{line}\n'.encode() for line in lines)
+    output.flush()
+
+
+def write_chunked(lines: Sequence[str], output: io.BufferedWriter) -> None:
+    """批量输出：整块编码、整块写入。"""
+    write_lines(lines, output)
+
+
+def measure(write: Callable[[Sequence[str], io.BufferedWriter], None], lines: Sequence[str], target: str) -> float:
+    """把 lines 写到 /dev/null 或管道（cat > /dev/null），返回耗时（秒）。"""
+    if target == 'devnull':
+        with open(os.devnull, 'wb') as output:
+            started = time.perf_counter()
+            write(lines, output)
+            return time.perf_counter() - started
+    with subprocess.Popen(['cat'], stdin=subprocess.PIPE, stdout=subprocess.DEVNULL) as process:
+        started = time.perf_counter()
+        write(lines, process.stdin)
+        process.stdin.close()
+        process.wait()
+        return time.perf_counter() - started
+
+
+def parse_args() -> argparse.Namespace:
+    """解析基准参数。"""
+    parser = argparse.ArgumentParser(description='对比逐行输出与批量输出的吞吐')
+    parser.add_argument('--rows', type=int, default=200000, help='数据行数，默认 200000')
+    parser.add_argument('--repeat', type=int, default=5, help='测量次数，取最快一次，默认 5')
+    args = parser.parse_args()
+    if args.rows <= 0 or args.repeat <= 0:
+        parser.error('--rows 与 --repeat 必须为正数')
+    return args
+
+
+def main() -> None:
+    """打印各输出方式写到 /dev/null 与管道的吞吐（MB/s）。"""
+    args = parse_args()
+    lines = build_lines(args.rows)
+    megabytes = sum(len(line.encode('utf-8')) + 1 for line in lines) / 1e6
+    print(f'lines={len(lines)} size={megabytes:.1f} MB repeat={args.repeat}')
+    writers = {'print': print_per_line, 'encode-line': encode_per_line, 'chunked': write_chunked}
+    for target in ('devnull', 'pipe'):
+        for name, write in writers.items():
+            seconds = min(measure(write, lines, target) for _ in range(args.repeat))
+            print(f'{target:<8} {name:<12} {megabytes / seconds:10.1f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def run_python(arguments: list[str], environment: dict[str, str]) -> subprocess.CompletedProcess:
+    """在项目根目录下启动一个新的 Python 进程。"""
+    return subprocess.run(
+        [sys.executable, *arguments],
+        cwd=PROJECT_ROOT,
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+
+
+def import_time(module: str, environment: dict[str, str]) -> tuple[float, list[tuple[float, str]]]:
+    """用 -X importtime 测量导入 module 的累计耗时（秒），并返回耗时最多的直接依赖。"""
+    stderr = run_python(['-X', 'importtime', '-c', f'import {module}'], environment).stderr
+    total = 0.0
+    children = []
+    pending_children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.removeprefix('import time:').split('|')
+        # importtime 按完成顺序输出，名称前每多两个空格表示嵌套深一层；子模块先于父模块输出
+        name = name.removeprefix(' ')
+        seconds = int(cumulative) / 1e6
+        if not name.startswith(' '):
+            if name == module:
+                total, children = seconds, pending_children
+            pending_children = []
+        elif not name.startswith('   '):
+            pending_children.append((seconds, name.strip()))
+    return total, sorted(children, reverse=True)
+
+
+def wall_time(arguments: list[str], environment: dict[str, str]) -> float:
+    """测量一次完整命令行调用的耗时（秒）。"""
+    started = time.perf_counter()
+    run_python(arguments, environment)
+    return time.perf_counter() - started
+
+
+def socket_wall_time(arguments: list[str], environment: dict[str, str], directory: str, repeat: int) -> float:
+    """启动 printable serve，返回经 --via-socket 调用的耗时中位数（秒）。"""
+    socket_path = Path(directory) / 'printable.sock'
+    environment = {**environment, 'PRINTABLE_SOCKET': str(socket_path)}
+    server = subprocess.Popen([sys.executable, '-m', 'printable', 'serve'], cwd=PROJECT_ROOT, env=environment)
+    try:
+        deadline = time.monotonic() + 30
+        while not socket_path.exists():
+            if time.monotonic() > deadline:
+                raise RuntimeError('printable serve 未能在 30 秒内启动')
+            time.sleep(0.05)
+        return statistics.median(wall_time([*arguments, '--via-socket'], environment) for _ in range(repeat))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def parse_args() -> argparse.Namespace:
+    """解析基准参数。"""
+    parser = argparse.ArgumentParser(description='测量 import printable 与小文件命令行调用的启动耗时')
+    parser.add_argument('--repeat', type=int, default=20, help='测量次数，取中位数，默认 20')
+    parser.add_argument('--top', type=int, default=8, help='列出耗时最多的直接依赖个数，默认 8')
+    args = parser.parse_args()
+    if args.repeat <= 0 or args.top < 0:
+        parser.error('--repeat 必须为正数，--top 不能为负数')
+    return args
+
+
+def main() -> None:
+    """打印导入耗时、主要依赖与 printable -f small.csv（本进程渲染与经渲染服务）的端到端耗时。"""
+    args = parse_args()
+    environment = {**os.environ, 'PYTHONPATH': str(PROJECT_ROOT)}
+    with tempfile.TemporaryDirectory() as directory:
+        small_csv = Path(directory) / 'small.csv'
+        small_csv.write_text('name,value\nalpha,1\nbeta,2\n', encoding='utf-8')
+
+        baseline = statistics.median(wall_time(['-c', 'pass'], environment) for _ in range(args.repeat))
+        imports = [import_time('printable', environment) for _ in range(args.repeat)]
+        cli = statistics.median(
+            wall_time(['-m', 'printable', '-f', str(small_csv)], environment) for _ in range(args.repeat)
+        )
+        via_socket = socket_wall_time(['-m', 'printable', '-f', str(small_csv)], environment, directory, args.repeat)
+
+    print(f'repeat={args.repeat}')
+    print(f'python -c pass        {baseline * 1000:8.1f} ms')
+    print(f'import printable      {statistics.median(total for total, _ in imports) * 1000:8.1f} ms (importtime)')
+    print(f'printable -f small.csv {cli * 1000:7.1f} ms (wall)')
+    print(f'  --via-socket         {via_socket * 1000:8.1f} ms (wall, printable serve)')
+    for seconds, name in imports[-1][1][: args.top]:
+        print(f'  {name:<22} {seconds * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
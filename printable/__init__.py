@@ -1,29 +1,170 @@
-"""将 JSON、YAML 或 CSV 数据渲染为终端表格。"""
+"""将 JSON、YAML 或 CSV 数据渲染为终端表格。
 
-import argparse
-import csv
+命令行常在 shell 循环中被反复调用，启动耗时不可忽略：yaml、argparse、subprocess、json、csv、
+并发池与 ctypes 封装的 column 模块都只在用到它们的路径上才导入，wcwidth 只在纯 Python 宽度回退时导入。
+"""
+
+from __future__ import annotations
+
+import array
+import contextlib
+import functools
 import io
-import json
+import itertools
 import math
+import mmap
 import os
 import re
-import subprocess
+import stat
 import sys
+import threading
+from collections import namedtuple
 from collections.abc import Iterable, Iterator, Mapping
 
-import yaml
-from wcwidth import wcswidth
+from ._records import (
+    _bar_maximum,
+    _bar_strings,
+    _bom_offset,
+    _csv_options,
+    _draw_bars,
+    _iter_csv_rows,
+    _iter_json_lines,
+    _iter_json_lines_buffer,
+    _iter_mapping_records,
+    _iter_sequence_records,
+    _parse_bar_values,
+    _record_columns,
+)
+
+# 与 typing.TYPE_CHECKING 相同，但命令行启动时不必为此导入 typing
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import argparse
+
+# 按需从 column 模块加载的公开名称（模块属性名 -> column 中的名称）
+_COLUMN_EXPORTS = {
+    'ColumnExecutionError': 'ColumnExecutionError',
+    'render_with_column': 'render',
+    'format_with_column': 'format_cells',
+    'TableLayout': 'TableLayout',
+}
+_column_module = None
+
+
+def _column():
+    """返回 column 模块；首次调用时才导入 ctypes 封装。"""
+    global _column_module
+    if _column_module is None:
+        from . import column
+
+        _column_module = column
+    return _column_module
+
 
-from . import column as _column
+@functools.cache
+def _native_library_present():
+    """column 动态库文件是否存在；不存在时纯 Python 路径无需加载 ctypes 封装。"""
+    from .native import find_library
 
-ColumnExecutionError = _column.ColumnExecutionError
-render_with_column = _column.render
-native_widths_of = _column.widths_of
+    return find_library() is not None
+
+
+@functools.cache
+def _native_widths_present():
+    """_widths 扩展或 column 动态库是否存在。"""
+    from .native import widths_extension
+
+    return widths_extension() is not None or _native_library_present()
+
+
+def _utf8_locale():
+    """当前 LC_CTYPE 的字符集是否为 UTF-8。
+
+    native 代码逐字符调用 C 库 wcwidth，其结果随 locale 变化（如 C locale 下非 ASCII 字符按字节数计），
+    只有 UTF-8 locale 下才与 wcwidth 包一致。locale 可能在运行中被修改，每次调用都重新读取。
+    """
+    from locale import CODESET, nl_langinfo
+
+    return nl_langinfo(CODESET).replace('-', '').upper() == 'UTF8'
+
+
+def _native_widths_usable():
+    """native 宽度是否可用：_widths 扩展或 column 动态库存在，且当前 locale 为 UTF-8。"""
+    return _native_widths_present() and _utf8_locale()
+
+
+def native_widths_of(cells):
+    """用 native 代码批量计算显示宽度，返回 array('Q')；native 代码不可用或 locale 不是 UTF-8 时返回 None。
+
+    _widths 扩展不经 ctypes，只有在没有编译扩展时才加载 column 的 ctypes 封装。
+    """
+    return _native_widths(cells)[0]
+
+
+def _native_widths(cells):
+    """同 native_widths_of，另外返回测量所用的后端（'extension' 或 'ctypes'，不可用时为 None）。"""
+    from .native import extension_widths_of
+
+    if not _utf8_locale():
+        return None, None
+    widths, backend = extension_widths_of(cells), 'extension'
+    if widths is None:
+        if not _native_library_present():
+            return None, None
+        widths, backend = _column().widths_of(cells), 'ctypes'
+        if widths is None:
+            return None, None
+    _remeasure_context_cells(cells, widths)
+    return widths, backend
+
+
+def _remeasure_context_cells(cells, widths):
+    """把 native 代码标记为 WIDTH_DEFERRED 的单元格改用纯 Python 重新测量，有改动时返回 True。
+
+    wcswidth 按上下文处理 ZWJ、VS16 与 emoji 肤色修饰符，C 库 wcwidth 返回负数的字符（如 U+2028）也与 wcswidth
+    的结果不同，native 代码遇到这些字符时不逐字符累加，留给这里测量。array 的 index 在 C 中查找，没有标记时直接返回。
+    """
+    from .native import WIDTH_DEFERRED
+
+    remeasured = False
+    index = -1
+    while True:
+        try:
+            index = widths.index(WIDTH_DEFERRED, index + 1)
+        except ValueError:
+            return remeasured
+        widths[index] = _python_widths([cells[index]])[0]
+        remeasured = True
+
+
+def column_available():
+    """column 动态库是否可用。"""
+    return _native_library_present() and _column().is_available()
+
+
+@functools.cache
+def _yaml_loader():
+    """返回 YAML 加载器，优先使用 libyaml 的 CLoader。"""
+    import yaml
+
+    return getattr(yaml, 'CLoader', yaml.Loader)
+
+
+def __getattr__(name):
+    """按需解析 column 封装的类与函数、YAML_LOADER、render_file_parallel 与 RenderProfile，导入 printable 时不加载它们。"""
+    if name in _COLUMN_EXPORTS:
+        value = getattr(_column(), _COLUMN_EXPORTS[name])
+    elif name == 'YAML_LOADER':
+        value = _yaml_loader()
+    elif name == 'render_file_parallel':
+        from .parallel import render_file_parallel as value
+    elif name == 'RenderProfile':
+        from .profiling import RenderProfile as value
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
 
-try:
-    from yaml import CLoader as YAML_LOADER
-except ImportError:
-    from yaml import Loader as YAML_LOADER
 
 GRID_TOP, GRID_MID, GRID_BOT = '┌┬┐', '├┼┤', '└┴┘'
 ROW_CHAR, COL_CHAR = '─', '│'
@@ -73,23 +214,124 @@ GRID_LAYOUTS = {
 
 ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-?]*[ -/]*[@-~]')
 CONTROL_PATTERN = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+# 保留 ANSI CSI 序列（颜色等）时只替换不属于转义序列的控制字符
+ANSI_CONTROL_PATTERN = re.compile(r'(?!\x1b\[[0-?]*[ -/]*[@-~])[\x00-\x1f\x7f-\x9f]')
 VALID_GRIDS = frozenset(GRID_STYLES)
 VALID_BAR_SCALES = frozenset(('linear', 'linal', 'ln', 'log10'))
 DEBUG = os.getenv('DEBUG')
 
 
-def normalize_cell_value(value):
-    """将任意单元格值转换为可安全输出的一行文本。"""
+def normalize_cell_value(value, keep_ansi=False):
+    """将任意单元格值转换为可安全输出的一行文本；keep_ansi=True 时保留 ANSI CSI 序列。"""
     text = '' if value is None else str(value)
-    return CONTROL_PATTERN.sub(' ', text)
+    return (ANSI_CONTROL_PATTERN if keep_ansi else CONTROL_PATTERN).sub(' ', text)
 
 
 def _python_text_width(text):
     """用纯 Python wcwidth 计算显示宽度。"""
+    from wcwidth import wcswidth
+
     width = wcswidth(text)
     return width if width >= 0 else len(text)
 
 
+# wcswidth 对这些字符按上下文处理（控制字符使整串返回 -1，ZWJ 跳过下一个字符，VS16 使前一个字符变宽），
+# 含有它们的单元格逐字符交给 wcswidth；NUL 为零宽，也排除在 len() 快速路径之外
+WIDTH_SPECIAL_PATTERN = re.compile('[\x00-\x1f\x7f-\x9f\u200d\ufe0f]')
+ASTRAL_PATTERN = re.compile('[\U00010000-\U0010ffff]')
+# 核对 wcwidth 区间表时额外检查的字符：普通、组合附加符、零宽空格、中日韩、全角空格、emoji
+WIDTH_PROBE_CHARACTERS = ['a', 'é', '\u0301', '\u200b', '中', '가', '\u3000', '\U0001f44d', '\U00020000']
+
+
+def _subtract_ranges(ranges, removed):
+    """从有序闭区间列表中去掉另一组有序闭区间。"""
+    result = []
+    for start, end in ranges:
+        for removed_start, removed_end in removed:
+            if removed_end < start or removed_start > end:
+                continue
+            if removed_start > start:
+                result.append((start, removed_start - 1))
+            start = removed_end + 1
+            if start > end:
+                break
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def _range_pattern(ranges):
+    """把码位闭区间列表编译为正则字符类。"""
+    parts = (
+        re.escape(chr(start)) if start == end else f'{re.escape(chr(start))}-{re.escape(chr(end))}'
+        for start, end in ranges
+    )
+    return re.compile(f'[{"".join(parts)}]')
+
+
+@functools.cache
+def _width_patterns():
+    """按 wcwidth 当前 Unicode 版本的区间表生成（零宽, 双宽）字符类，双宽不含同时属于零宽的码位。
+
+    返回（仅基本平面, 全部码位）两组：只含基本平面区间的字符类由 re 编译为位图，逐字符判断远快于
+    区间列表，辅助平面字符（多为 emoji）只在单元格确实含有时才使用完整字符类。
+    这些区间表不是 wcwidth 的公开接口：缺失、结构变化，或区间端点与 wcwidth() 的结果不一致时返回 None，
+    由调用方退回逐个 wcswidth。
+    """
+    try:
+        from wcwidth import WIDE_EASTASIAN, ZERO_WIDTH, _wcmatch_version, wcwidth
+
+        version = _wcmatch_version('auto')
+        zero_ranges = ZERO_WIDTH[version]
+        wide_ranges = _subtract_ranges(WIDE_EASTASIAN[version], zero_ranges)
+        zero_pattern, wide_pattern = _range_pattern(zero_ranges), _range_pattern(wide_ranges)
+        # 区间端点与几个典型字符逐个与 wcwidth() 核对
+        probes = [chr(codepoint) for ranges in (zero_ranges, wide_ranges) for edge in ranges for codepoint in edge]
+        probes += WIDTH_PROBE_CHARACTERS
+        for character in probes:
+            width = 1 - bool(zero_pattern.match(character)) + bool(wide_pattern.match(character))
+            if not WIDTH_SPECIAL_PATTERN.match(character) and wcwidth(character) != width:
+                return None
+
+        def basic_plane(ranges):
+            return [(start, min(end, 0xFFFF)) for start, end in ranges if start <= 0xFFFF]
+
+        return (
+            (_range_pattern(basic_plane(zero_ranges)), _range_pattern(basic_plane(wide_ranges))),
+            (zero_pattern, wide_pattern),
+        )
+    except (ImportError, AttributeError, KeyError, TypeError, ValueError, re.error):
+        return None
+
+
+def _python_widths(cells):
+    """纯 Python 批量计算显示宽度，结果与逐个 _python_text_width 完全一致。
+
+    ASCII 单元格直接取 len()；其余单元格宽度为字符数减零宽字符数加双宽字符数，
+    由 wcwidth 区间表生成的字符类在 re 中计数，不再逐字符调用 wcwidth。ANSI CSI 序列不占宽度。
+    """
+    joined = ''.join(cells)
+    has_special = WIDTH_SPECIAL_PATTERN.search(joined) is not None
+    if not has_special and joined.isascii():
+        return list(map(len, cells))
+
+    patterns = _width_patterns()
+    if patterns is None:
+        return [_python_text_width(cell) for cell in cells]
+    basic_patterns, full_patterns = patterns
+    has_astral = ASTRAL_PATTERN.search(joined) is not None
+    widths = []
+    for cell in cells:
+        if has_special and WIDTH_SPECIAL_PATTERN.search(cell):
+            widths.append(_python_text_width(ANSI_ESCAPE_PATTERN.sub('', cell)))
+        elif cell.isascii():
+            widths.append(len(cell))
+        else:
+            zero_pattern, wide_pattern = full_patterns if has_astral and ASTRAL_PATTERN.search(cell) else basic_patterns
+            widths.append(len(cell) - len(zero_pattern.findall(cell)) + len(wide_pattern.findall(cell)))
+    return widths
+
+
 # 默认渲染参数的终端宽度（全局常量，' ' 恒占 1 列，空串 0 列）
 PREFIX_WIDTH = 1
 SUFFIX_WIDTH = 1
@@ -101,45 +343,175 @@ def _raw_text_width(text):
     native_widths = native_widths_of([text])
     if native_widths is not None:
         return native_widths[0]
-    return _python_text_width(text)
+    return _python_widths([text])[0]
 
 
 def calc_text_width(text):
-    """计算终端显示宽度，忽略 ANSI 控制序列；native 库可用时走 C。"""
-    visible_text = ANSI_ESCAPE_PATTERN.sub('', normalize_cell_value(text))
-    return _raw_text_width(visible_text)
+    """计算终端显示宽度，忽略 ANSI 控制序列；native 库可用时走 C，转义序列在同一遍扫描中跳过。"""
+    return _raw_text_width(normalize_cell_value(text, keep_ansi=True))
 
 
-def _calc_widths(cells):
-    """批量计算已归一化文本的显示宽度；native 库可用时一次 C 调用。
+# 进程级单元格宽度缓存：枚举、状态码、日期等低基数列大量重复，测过的宽度跨渲染复用。
+# 容量按条目数限制，写满后按插入顺序淘汰最早的条目；设为 0 关闭缓存。
+WIDTH_CACHE_SIZE = 1 << 16
+# 超过这个字符数的单元格只测量不缓存：长文本很少重复，缓存它们只会占住内存
+WIDTH_CACHE_MAX_LENGTH = 256
+WidthCacheInfo = namedtuple('WidthCacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
 
-    输入须为 normalize_cell_value 处理过的文本（不含控制字符/ANSI 转义）。
-    """
-    native_widths = native_widths_of(cells)
+_width_cache = {}
+_width_cache_lock = threading.Lock()
+_width_cache_hits = 0
+_width_cache_misses = 0
+
+
+# 各宽度后端批量测量的单元格数与退回纯 Python 测量的次数，供 RenderProfile 统计
+_width_backend_counts = {
+    'extension_cells': 0,
+    'ctypes_cells': 0,
+    'python_cells': 0,
+    'native_fallbacks': 0,
+}
+_width_backend_lock = threading.Lock()
+
+
+def _count_width_backend(backend, cell_count):
+    """记录一次批量测量所用的后端。"""
+    with _width_backend_lock:
+        _width_backend_counts[f'{backend}_cells'] += cell_count
+        if backend == 'python':
+            _width_backend_counts['native_fallbacks'] += 1
+
+
+def _width_counters():
+    """返回宽度后端计数与宽度缓存命中、未命中次数的快照。"""
+    with _width_backend_lock:
+        counters = dict(_width_backend_counts)
+    with _width_cache_lock:
+        counters.update(cache_hits=_width_cache_hits, cache_misses=_width_cache_misses)
+    return counters
+
+
+def width_cache_info():
+    """返回宽度缓存的命中、未命中次数与容量，字段同 functools 的 cache_info。"""
+    with _width_cache_lock:
+        return WidthCacheInfo(_width_cache_hits, _width_cache_misses, WIDTH_CACHE_SIZE, len(_width_cache))
+
+
+def width_cache_clear():
+    """清空宽度缓存并重置计数。"""
+    global _width_cache_hits, _width_cache_misses
+    with _width_cache_lock:
+        _width_cache.clear()
+        _width_cache_hits = _width_cache_misses = 0
+
+
+def _measure_widths(cells):
+    """不经缓存直接测量；native 库可用时一次 C 调用。"""
+    native_widths, backend = _native_widths(cells)
     if native_widths is not None:
+        _count_width_backend(backend, len(cells))
         return native_widths
-    return [_python_text_width(cell) for cell in cells]
+    _count_width_backend('python', len(cells))
+    return _python_widths(cells)
+
+
+def _calc_widths(cells):
+    """批量计算已归一化文本的显示宽度。
+
+    输入须为 normalize_cell_value 处理过的文本，其中保留的 ANSI CSI 序列按零宽计算。同一批内重复的
+    单元格先去重，只有缓存中没有的值才交给 native 库（或 wcwidth）测量。锁只保护缓存的查找与写入，
+    测量在锁外进行，多个线程的测量可以并行。
+    """
+    global _width_cache_hits, _width_cache_misses
+    if WIDTH_CACHE_SIZE <= 0:
+        return _measure_widths(cells)
+
+    with _width_cache_lock:
+        cache = _width_cache
+        missing = set(cells).difference(cache)
+        _width_cache_misses += len(missing)
+        _width_cache_hits += len(cells) - len(missing)
+        if not missing:
+            return list(map(cache.__getitem__, cells))
+        unique_missing = len(missing) == len(cells)
+        # 命中的值先取出：锁外测量期间其他线程可能把它们淘汰
+        known = None if unique_missing else {cell: cache[cell] for cell in set(cells).difference(missing)}
+
+    if unique_missing:
+        # 整批都是互不相同的新值（高基数列的常见情况）：按原顺序测量，省去去重后的回查
+        widths = _measure_widths(cells)
+        measured = dict(zip(cells, widths))
+    else:
+        missing = list(missing)
+        measured = dict(zip(missing, _measure_widths(missing)))
+        known.update(measured)
+        widths = list(map(known.__getitem__, cells))
+    if max(map(len, measured)) > WIDTH_CACHE_MAX_LENGTH:
+        measured = {cell: width for cell, width in measured.items() if len(cell) <= WIDTH_CACHE_MAX_LENGTH}
+
+    with _width_cache_lock:
+        overflow = len(cache) + len(measured) - WIDTH_CACHE_SIZE
+        if overflow <= 0:
+            cache.update(measured)
+        elif len(measured) >= WIDTH_CACHE_SIZE:
+            cache.clear()
+            cache.update(itertools.islice(measured.items(), WIDTH_CACHE_SIZE))
+        else:
+            for cell in list(itertools.islice(cache, overflow)):
+                del cache[cell]
+            cache.update(measured)
+    return widths
+
+
+def _native_column_maximums(widths, column_count):
+    """在 native 代码中按列归约按行展开的宽度数组，返回各列最大宽度的 array；不可用时返回 None。"""
+    from .native import extension_column_maximums
+
+    maximums = extension_column_maximums(widths, column_count)
+    if maximums is None and _native_library_present():
+        maximums = _column().column_maximums_of(widths, column_count)
+    return maximums
 
 
 def _calculate_widths(rows):
     """平铺计算多行单元格宽度，一次批量调用。
 
-    返回（列宽列表, 平铺宽度）；rows 须为已归一化的等宽行列表。
+    返回（列宽列表, 平铺宽度）；rows 须为已归一化的等宽行列表。native 代码可用时平铺宽度放在 array 中，
+    列宽由 C 按列归约（关闭宽度缓存时在测量的同一遍循环中完成），平铺宽度以 memoryview 返回，按行切片不复制；
+    否则每列取一次步长切片交给内置 max。
     """
     column_count = len(rows[0])
     flat_cells = [cell for row in rows for cell in row]
-    flat_widths = _calc_widths(flat_cells)
-    widths = list(flat_widths[:column_count])
-    for row_index in range(1, len(rows)):
-        row_start = row_index * column_count
-        for column_index in range(column_count):
-            widths[column_index] = max(widths[column_index], flat_widths[row_start + column_index])
-    return widths, flat_widths
-
-
-def format_cell_value(text, cell_width, prefix=' ', suffix=' ', value_width=None):
+    if not _native_widths_usable():
+        flat_widths = _calc_widths(flat_cells)
+        return [max(flat_widths[index::column_count]) for index in range(column_count)], flat_widths
+
+    from .native import WIDTH_TYPECODE, widths_extension
+
+    measured = None
+    if WIDTH_CACHE_SIZE <= 0:
+        measured = _column().column_widths_of(flat_cells, column_count)
+        if measured is not None:
+            _count_width_backend('extension' if widths_extension() is not None else 'ctypes', len(flat_cells))
+            if _remeasure_context_cells(flat_cells, measured[0]):
+                measured = measured[0], _native_column_maximums(measured[0], column_count)
+    if measured is None:
+        flat_widths = _calc_widths(flat_cells)
+        # 缓存命中时宽度来自字典，是列表；整批未命中时 native 测量直接返回 array
+        if not isinstance(flat_widths, array.array) or flat_widths.typecode != WIDTH_TYPECODE:
+            flat_widths = array.array(WIDTH_TYPECODE, flat_widths)
+        column_widths = _native_column_maximums(flat_widths, column_count)
+        if column_widths is None:
+            column_widths = [max(flat_widths[index::column_count]) for index in range(column_count)]
+        measured = flat_widths, column_widths
+    flat_widths, column_widths = measured
+    widths = column_widths.tolist() if isinstance(column_widths, array.array) else column_widths
+    return widths, memoryview(flat_widths)
+
+
+def format_cell_value(text, cell_width, prefix=' ', suffix=' ', value_width=None, keep_ansi=False):
     """格式化单个单元格并补齐显示宽度。"""
-    normalized_text = normalize_cell_value(text)
+    normalized_text = normalize_cell_value(text, keep_ansi)
     if value_width is None:
         value_width = _raw_text_width(normalized_text)
     padding_width = max(0, cell_width - value_width)
@@ -174,31 +546,94 @@ def normalize_table(data, headers=None, limit=None):
         return [], []
 
     if isinstance(first_record, Mapping):
-        raw_records = [first_record, *data_iterator]
-        records = []
+        # 只校验并推断实际显示的记录；limit=0 时仍用首条记录推断表头
+        records = list(_iter_mapping_records(itertools.islice(itertools.chain((first_record,), data_iterator), limit)))
         inferred_headers = []
-        for record_index, record in enumerate(raw_records, start=1):
-            if not isinstance(record, Mapping):
-                raise TypeError('字典表格中的每条记录都必须是字典')
-            if None in record:
-                raise ValueError(f'第 {record_index} 条记录包含超出表头的字段')
-            normalized_record = {normalize_cell_value(key): value for key, value in record.items()}
-            records.append(normalized_record)
-            for key in normalized_record:
+        for record in records or _iter_mapping_records((first_record,)):
+            for key in record:
                 if key not in inferred_headers:
                     inferred_headers.append(key)
+        if limit == 0 and headers is None and not inferred_headers:
+            # 首条记录没有字段时无从推断表头，limit=0 不显示任何内容
+            return [], []
         normalized_headers = validate_headers(headers) if headers is not None else validate_headers(inferred_headers)
-        return normalized_headers, records[:limit] if limit is not None else records
+        return normalized_headers, records
 
     inferred_headers = validate_headers(first_record)
     normalized_headers = validate_headers(headers) if headers is not None else inferred_headers
-    records = list(data_iterator)
-    for record_index, record in enumerate(records, start=1):
-        if isinstance(record, (str, bytes)) or not isinstance(record, Iterable):
-            raise TypeError(f'第 {record_index} 条记录必须是序列')
-        if len(record) > len(normalized_headers):
-            raise ValueError(f'第 {record_index} 条记录的列数超过表头')
-    return normalized_headers, records[:limit] if limit is not None else records
+    records = list(_iter_sequence_records(itertools.islice(data_iterator, limit), len(normalized_headers)))
+    return normalized_headers, records
+
+
+# memoryview 中元素为数字的格式码（可带字节序前缀）
+NUMERIC_BUFFER_FORMATS = frozenset('bBhHiIlLqQnNefd?')
+
+
+def _is_numeric_column(column):
+    """array.array、memoryview 与 NumPy 数组按元素类型判断是否为纯数值列。"""
+    if isinstance(column, array.array):
+        return column.typecode not in ('u', 'w')
+    if isinstance(column, memoryview):
+        return column.format.lstrip('@=<>!') in NUMERIC_BUFFER_FORMATS
+    dtype = getattr(column, 'dtype', None)
+    return getattr(dtype, 'kind', None) in ('b', 'i', 'u', 'f')
+
+
+def _column_values(column):
+    """把一列数据转换为 Python 值列表；array.array、memoryview 与 NumPy 数组由 tolist() 在 C 中完成。"""
+    tolist = getattr(column, 'tolist', None)
+    return tolist() if tolist is not None else list(column)
+
+
+class ColumnarTable:
+    """按列存储的表格，readable/iter_readable 与 column 引擎直接按列处理，不必先转置为逐行记录。
+
+    columns 为表头到列数据的映射，列数据可以是 list、tuple、array.array、一维 memoryview
+    或一维 NumPy 数组，各列长度必须相同。迭代时按二维数据的形式先产出表头，再逐行产出元组，
+    流式渲染、固定列宽等逐行处理的路径因此也能直接使用。
+    """
+
+    def __init__(self, columns):
+        if not isinstance(columns, Mapping):
+            raise TypeError('columns 必须是表头到列数据的映射')
+        self.headers = validate_headers(columns)
+        self.columns = list(columns.values())
+        for column in self.columns:
+            if isinstance(column, (str, bytes)) or not hasattr(column, '__len__') or not hasattr(column, '__getitem__'):
+                raise TypeError('每列数据都必须是支持切片的序列')
+            if getattr(column, 'ndim', 1) != 1:
+                raise ValueError('列数据必须是一维的')
+        lengths = {len(column) for column in self.columns}
+        if len(lengths) > 1:
+            raise ValueError('各列的长度必须相同')
+        self.row_count = lengths.pop()
+
+    def __len__(self):
+        return self.row_count
+
+    def __iter__(self):
+        yield list(self.headers)
+        yield from zip(*(_column_values(column) for column in self.columns))
+
+
+def _columnar_text_columns(table, limit, bars, bar_char, bar_width, bar_scale, keep_ansi=False):
+    """逐列把 ColumnarTable 转换为渲染用文本列，返回（文本列列表, 条形图最大值）。
+
+    数值列的元素不含控制字符，直接 str() 而不再逐个清理；条形图列整体交给 _bar_column。
+    """
+    maximums = {header: 0.0 for header in bars}
+    text_columns = []
+    for header, column in zip(table.headers, table.columns):
+        numeric = _is_numeric_column(column)
+        values = _column_values(column if limit is None else column[:limit])
+        if header in bars:
+            texts, maximums[header] = _bar_column(values, bar_char, bar_width, bar_scale, keep_ansi)
+        elif numeric:
+            texts = list(map(str, values))
+        else:
+            texts = [normalize_cell_value(value, keep_ansi) for value in values]
+        text_columns.append(texts)
+    return text_columns, maximums
 
 
 def record_value(record, header, index):
@@ -237,9 +672,9 @@ def calculate_bar_maximums(records, headers, bars, bar_scale):
     return maximums
 
 
-def convert_value_to_bar(value, header, bars, bar_char, bar_width, maximums, bar_scale):
+def convert_value_to_bar(value, header, bars, bar_char, bar_width, maximums, bar_scale, keep_ansi=False):
     """将配置为条形图的数值转换为有符号条形文本。"""
-    normalized_value = normalize_cell_value(value)
+    normalized_value = normalize_cell_value(value, keep_ansi)
     if header not in bars or not normalized_value:
         return normalized_value
     try:
@@ -254,30 +689,54 @@ def convert_value_to_bar(value, header, bars, bar_char, bar_width, maximums, bar
         return normalized_value
     ratio = scale_bar_value(numeric_value, bar_scale) / maximum
     bar_length = min(bar_width, max(1, int(ratio * bar_width)))
-    return ('-' if numeric_value < 0 else '') + bar_char * bar_length
+    return _bar_strings(bar_char)[numeric_value < 0][bar_length]
+
 
+def _bar_column(values, bar_char, bar_width, bar_scale, keep_ansi=False):
+    """把一个条形图列整体转换为文本，返回（文本列表, 最大缩放值）。
 
-def format_record(record, headers, bars, bar_char, bar_width, maximums, bar_scale):
+    结果与先 calculate_bar_maximums 再逐个 convert_value_to_bar 完全一致，但每个单元格只解析一次数值，
+    按列求最大值、计算条形长度。
+    """
+    texts, scale_numbers, bar_numbers = _parse_bar_values(values, keep_ansi)
+    maximum = _bar_maximum(scale_numbers, bar_scale)
+    _draw_bars(texts, bar_numbers, maximum, bar_char, bar_width, bar_scale)
+    return texts, maximum
+
+
+def format_record(record, headers, bars, bar_char, bar_width, maximums, bar_scale, keep_ansi=False):
     """将一条原始记录转换为渲染用单元格。"""
     return tuple(
         convert_value_to_bar(
-            record_value(record, header, index), header, bars, bar_char, bar_width, maximums, bar_scale
+            record_value(record, header, index), header, bars, bar_char, bar_width, maximums, bar_scale, keep_ansi
         )
         for index, header in enumerate(headers)
     )
 
 
+def _iter_formatted_records(records, headers, bars, bar_char, bar_width, bar_scale, keep_ansi=False):
+    """逐条产出渲染用单元格；各列先整列转换（条形图列交给 _bar_column），再按行拼成元组。"""
+    text_columns = []
+    for header, values in zip(headers, _record_columns(records, headers)):
+        if header in bars:
+            texts, _ = _bar_column(values, bar_char, bar_width, bar_scale, keep_ansi)
+        else:
+            texts = [normalize_cell_value(value, keep_ansi) for value in values]
+        text_columns.append(texts)
+    return zip(*text_columns)
+
+
 def escape_markdown_row(row):
     """转义 Markdown 单元格中的列分隔符。"""
     return tuple(value.replace('|', '\\|') for value in row)
 
 
-def render_data_row(row, widths, col_sep, prefix, suffix, edges=None, row_widths=None):
+def render_data_row(row, widths, col_sep, prefix, suffix, edges=None, row_widths=None, keep_ansi=False):
     """渲染一行数据单元格；row_widths 已提供时跳过批量计算。"""
     if row_widths is None:
         row_widths = _calc_widths(row)
     cells = [
-        format_cell_value(value, widths[index], prefix, suffix, value_width=row_widths[index])
+        format_cell_value(value, widths[index], prefix, suffix, value_width=row_widths[index], keep_ansi=keep_ansi)
         for index, value in enumerate(row)
     ]
     line = col_sep.join(cells)
@@ -290,6 +749,382 @@ def render_separator(widths, row_sep, prefix_suffix_width, left='', junction='',
     return left + junction.join(row_sep * width for width in cell_widths) + right
 
 
+def _resolve_layout(grid, col_sep, row_sep, prefix, suffix):
+    """解析网格样式，返回（列分隔符, 行分隔符, 前后缀宽度, 网格布局）。"""
+    style = GRID_STYLES[grid or 'default']
+    effective_col_sep = style['col_sep'] if col_sep is None else col_sep
+    effective_row_sep = style['row_sep'] if row_sep is None else row_sep
+    if (prefix, suffix) == (' ', ' '):
+        prefix_suffix_width = PREFIX_WIDTH + SUFFIX_WIDTH
+    else:
+        prefix_suffix_width = sum(_calc_widths([prefix, suffix]))
+    return effective_col_sep, effective_row_sep, prefix_suffix_width, GRID_LAYOUTS[grid or 'default']
+
+
+def _iter_table_lines(
+    headers,
+    header_widths,
+    body,
+    has_records,
+    widths,
+    grid,
+    col_sep,
+    row_sep,
+    prefix,
+    suffix,
+    keep_ansi=False,
+    jobs=None,
+):
+    """按网格布局输出表头、数据行与分隔线；body 逐个产出（行, 行宽度）。
+
+    jobs 大于 1 时数据行按块交给进程池格式化，见 _iter_parallel_rows。
+    """
+    col_sep, row_sep, prefix_suffix_width, layout = _resolve_layout(grid, col_sep, row_sep, prefix, suffix)
+    if layout['top'] is not None:
+        yield render_separator(widths, row_sep, prefix_suffix_width, *layout['top'])
+    yield render_data_row(headers, widths, col_sep, prefix, suffix, layout['edges'], header_widths)
+    if layout['header_line'] is not None and (has_records or not layout['header_conditional']):
+        yield render_separator(widths, row_sep, prefix_suffix_width, *layout['header_line'])
+    row_line = None
+    if layout['row_line'] is not None:
+        row_line = render_separator(widths, row_sep, prefix_suffix_width, *layout['row_line'])
+    if jobs is not None and jobs > 1:
+        yield from _iter_parallel_rows(
+            body, jobs, widths, col_sep, prefix, suffix, layout['edges'], keep_ansi, row_line
+        )
+    else:
+        for row_index, (row, row_widths) in enumerate(body):
+            if row_line is not None and row_index:
+                yield row_line
+            yield render_data_row(row, widths, col_sep, prefix, suffix, layout['edges'], row_widths, keep_ansi)
+    if layout['bottom'] is not None:
+        yield render_separator(widths, row_sep, prefix_suffix_width, *layout['bottom'])
+
+
+# 并行格式化时每块的数据行数：块太小时进程间传输的开销会盖过格式化本身，不足一块的表格直接在本进程渲染
+PARALLEL_RENDER_CHUNK_ROWS = 1 << 14
+
+
+_BLOCK_CELL_SEPARATOR = '\x1f'
+
+
+def _render_row_block(cells, flat_widths, widths, col_sep, prefix, suffix, edges, keep_ansi, row_line):
+    """进程池 worker：把一段按行平铺的单元格渲染为一个文本块，行间按需插入 row_line。"""
+    if isinstance(cells, str):
+        cells = cells.split(_BLOCK_CELL_SEPARATOR)
+    column_count = len(widths)
+    flat_widths = memoryview(flat_widths)
+    lines = [
+        render_data_row(
+            cells[row_start : row_start + column_count],
+            widths,
+            col_sep,
+            prefix,
+            suffix,
+            edges,
+            flat_widths[row_start : row_start + column_count],
+            keep_ansi,
+        )
+        for row_start in range(0, len(cells), column_count)
+    ]
+    return '\n'.join(lines) if row_line is None else f'\n{row_line}\n'.join(lines)
+
+
+def _iter_row_chunks(body, chunk_rows):
+    """把 body 的（行, 行宽度）每 chunk_rows 行切为一块，产出（平铺的单元格, 平铺的行宽度 array）。
+
+    已清理的单元格不含控制字符，整块以 \\x1f 拼成一个字符串，序列化只需复制一段文本；
+    个别单元格含 \\x1f 时该块退回单元格列表。
+    """
+    body = iter(body)
+    while chunk := list(itertools.islice(body, chunk_rows)):
+        cells = list(itertools.chain.from_iterable(row for row, _ in chunk))
+        joined_cells = _BLOCK_CELL_SEPARATOR.join(cells)
+        if joined_cells.count(_BLOCK_CELL_SEPARATOR) == len(cells) - 1:
+            cells = joined_cells
+        yield cells, array.array('Q', itertools.chain.from_iterable(row_widths for _, row_widths in chunk))
+
+
+def _iter_parallel_rows(body, jobs, widths, col_sep, prefix, suffix, edges, keep_ansi, row_line):
+    """用 jobs 个进程按块格式化数据行，按原顺序逐行产出；块与块之间补上 row_line。
+
+    列宽已经确定，各行互不依赖，每块在 worker 中渲染成一个文本块。同时在途的块不超过进程数的两倍，
+    输出跟不上时不会把整张表都提交出去。
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = _iter_row_chunks(body, PARALLEL_RENDER_CHUNK_ROWS)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return
+    block_options = (widths, col_sep, prefix, suffix, edges, keep_ansi, row_line)
+    if len(first_chunk[1]) < PARALLEL_RENDER_CHUNK_ROWS * len(widths):
+        yield from _render_row_block(*first_chunk, *block_options).split('\n')
+        return
+
+    executor = ProcessPoolExecutor(jobs)
+    pending = deque()
+    block_count = 0
+
+    def emit_block():
+        nonlocal block_count
+        block = pending.popleft().result()
+        if row_line is not None and block_count:
+            yield row_line
+        block_count += 1
+        # 单元格已清理过控制字符，块内的换行都是行分隔
+        yield from block.split('\n')
+
+    try:
+        for chunk in itertools.chain((first_chunk,), chunks):
+            pending.append(executor.submit(_render_row_block, *chunk, *block_options))
+            if len(pending) >= 2 * jobs:
+                yield from emit_block()
+        while pending:
+            yield from emit_block()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _validate_render_options(grid, bar_scale, bar_width, limit=None, jobs=None):
+    """校验渲染参数。"""
+    if grid is not None and grid not in VALID_GRIDS:
+        raise ValueError(f'不支持的 grid: {grid}')
+    if bar_scale not in VALID_BAR_SCALES:
+        raise ValueError(f'不支持的 bar_scale: {bar_scale}')
+    if bar_width < 0:
+        raise ValueError('bar_width 不能小于 0')
+    if limit is not None and limit < 0:
+        raise ValueError('limit 不能小于 0')
+    if jobs is not None and jobs <= 0:
+        raise ValueError('jobs 必须为正数')
+
+
+_MISSING = object()
+
+# 流式渲染每批计算宽度的行数（内存上限约为 STREAM_CHUNK_ROWS × 列数）
+STREAM_CHUNK_ROWS = 1024
+
+
+def _open_stream_source(source, headers):
+    """打开一次可重读数据源，返回（表头或 None, 是否字典表, 已校验记录迭代器）。
+
+    source 为可调用对象时每遍调用一次取得新迭代器，否则须是可重复迭代的容器；
+    字典表返回的表头为 None（需在扫描中推断），除非显式传入 headers。
+    """
+    data = source() if callable(source) else source
+    if isinstance(data, (str, bytes)) or not isinstance(data, Iterable):
+        raise TypeError('data 必须是记录的可迭代对象')
+    if isinstance(data, Mapping):
+        data = [data]
+    data_iterator = iter(data)
+    if data_iterator is data and not callable(source):
+        raise TypeError('流式渲染需要可重复读取的数据源（返回迭代器的可调用对象或容器）')
+
+    first_record = next(data_iterator, _MISSING)
+    if first_record is _MISSING:
+        return [], False, iter(())
+    if isinstance(first_record, Mapping):
+        normalized_headers = validate_headers(headers) if headers is not None else None
+        return normalized_headers, True, _iter_mapping_records(itertools.chain((first_record,), data_iterator))
+
+    normalized_headers = validate_headers(headers) if headers is not None else validate_headers(first_record)
+    return normalized_headers, False, _iter_sequence_records(data_iterator, len(normalized_headers))
+
+
+def _bar_number(text):
+    """返回会被渲染为条形图的数值（有限且非零），否则返回 None。"""
+    if not text:
+        return None
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) and value != 0 else None
+
+
+def _measure_stream(source, headers, limit, bars, bar_char, bar_width, bar_scale, markdown, keep_ansi=False):
+    """流式渲染第一遍：推断表头并统计列宽与条形图最大值，内存只与列数相关。
+
+    条形图列只保留正、负两侧缩放值最大的代表单元格：条形长度随缩放值单调，
+    第二遍用同样的最大值渲染时，最宽的条形必然来自这两个代表值。
+    返回（表头, 记录数, 列宽, 条形图最大值）。
+    """
+    fixed_headers, is_mapping, records = _open_stream_source(source, headers)
+    if not is_mapping and not fixed_headers:
+        return [], 0, [], {}
+    inferred_headers = list(fixed_headers) if fixed_headers is not None else []
+    header_indices = {header: index for index, header in enumerate(inferred_headers)}
+
+    # 每列两个宽度槽：偶数槽为普通文本，奇数槽为可绘制条形的数值文本
+    slot_widths = [0] * (2 * len(inferred_headers))
+    maximums = {header: 0.0 for header in bars}
+    representatives = {}
+    chunk_cells = []
+    chunk_slots = []
+
+    def flush_chunk():
+        for slot, width in zip(chunk_slots, _calc_widths(chunk_cells)):
+            if width > slot_widths[slot]:
+                slot_widths[slot] = width
+        chunk_cells.clear()
+        chunk_slots.clear()
+
+    def infer_headers(record):
+        for key in record:
+            if key not in header_indices:
+                header_indices[key] = len(inferred_headers)
+                inferred_headers.append(key)
+                slot_widths.extend((0, 0))
+
+    record_count = 0
+    for record in records:
+        # 与 normalize_table 一致：limit 之外的记录不再读取；limit=0 时仍用首条记录推断表头
+        if limit is not None and record_count >= limit:
+            if record_count == 0 and fixed_headers is None:
+                infer_headers(record)
+            break
+        if fixed_headers is None:
+            infer_headers(record)
+        record_count += 1
+        for index, header in enumerate(inferred_headers):
+            value = record_value(record, header, index)
+            text = normalize_cell_value(value, keep_ansi)
+            slot = 2 * index
+            if header in bars:
+                try:
+                    numeric_value = float(value)
+                except (TypeError, ValueError):
+                    numeric_value = None
+                if numeric_value is not None and math.isfinite(numeric_value):
+                    maximums[header] = max(maximums[header], scale_bar_value(numeric_value, bar_scale))
+                bar_value = _bar_number(text)
+                if bar_value is not None:
+                    slot += 1
+                    side = (header, bar_value < 0)
+                    scaled_value = scale_bar_value(bar_value, bar_scale)
+                    if side not in representatives or scaled_value > representatives[side][0]:
+                        representatives[side] = (scaled_value, text)
+            if markdown:
+                text = text.replace('|', '\\|')
+            chunk_cells.append(text)
+            chunk_slots.append(slot)
+        if len(chunk_cells) >= STREAM_CHUNK_ROWS * len(inferred_headers):
+            flush_chunk()
+    flush_chunk()
+
+    if limit == 0 and fixed_headers is None and not inferred_headers:
+        return [], 0, [], {}
+    normalized_headers = validate_headers(inferred_headers) if fixed_headers is None else fixed_headers
+    widths = []
+    for index, (header, header_width) in enumerate(zip(normalized_headers, _calc_widths(normalized_headers))):
+        text_width, number_width = slot_widths[2 * index], slot_widths[2 * index + 1]
+        width = max(header_width, text_width)
+        if header in bars and maximums[header] > 0:
+            bar_texts = [
+                convert_value_to_bar(representatives[side][1], header, bars, bar_char, bar_width, maximums, bar_scale)
+                for side in ((header, False), (header, True))
+                if side in representatives
+            ]
+            if markdown:
+                bar_texts = [text.replace('|', '\\|') for text in bar_texts]
+            width = max(width, *_calc_widths(bar_texts)) if bar_texts else width
+        else:
+            width = max(width, number_width)
+        widths.append(width)
+    return normalized_headers, record_count, widths, maximums
+
+
+def _iter_stream_body(
+    source, headers, limit, bars, bar_char, bar_width, maximums, bar_scale, markdown, keep_ansi=False
+):
+    """流式渲染第二遍：重新读取数据源，分块格式化并逐行产出（行, 行宽度）。"""
+    _, _, records = _open_stream_source(source, headers)
+    records = itertools.islice(records, limit)
+    column_count = len(headers)
+    while True:
+        chunk = [
+            format_record(record, headers, bars, bar_char, bar_width, maximums, bar_scale, keep_ansi)
+            for record in itertools.islice(records, STREAM_CHUNK_ROWS)
+        ]
+        if not chunk:
+            return
+        if markdown:
+            chunk = [escape_markdown_row(row) for row in chunk]
+        flat_widths = _calc_widths([cell for row in chunk for cell in row])
+        for row_index, row in enumerate(chunk):
+            row_start = row_index * column_count
+            yield row, flat_widths[row_start : row_start + column_count]
+
+
+def _stage(profile, name):
+    """返回记录阶段 name 的上下文管理器；profile 为 None 时不记录。"""
+    return contextlib.nullcontext() if profile is None else profile.stage(name)
+
+
+def _profile_lines(profile, lines, row_count=None):
+    """把逐行生成的耗时计入 format 阶段，rows 记为 row_count 个数据行；profile 为 None 时原样返回。
+
+    输出行还包括表头、分隔线与边框，因此不按行数计数；row_count 为 None（行数事先未知）时只计耗时。
+    """
+    if profile is None:
+        return lines
+    if row_count is not None:
+        profile.count('format', rows=row_count)
+    return profile.iterate('format', lines, count_rows=False)
+
+
+def _iter_columnar_lines(
+    table,
+    grid,
+    col_sep,
+    row_sep,
+    prefix,
+    suffix,
+    bars,
+    bar_char,
+    bar_width,
+    bar_scale,
+    limit,
+    keep_ansi,
+    jobs=None,
+    profile=None,
+):
+    """按列计算文本与宽度，输出时才把各列拼成行。"""
+    with _stage(profile, 'convert'):
+        text_columns, _ = _columnar_text_columns(table, limit, bars, bar_char, bar_width, bar_scale, keep_ansi)
+        if grid == 'markdown':
+            text_columns = [[text.replace('|', '\\|') for text in texts] for texts in text_columns]
+    with _stage(profile, 'widths'):
+        header_widths = _calc_widths(table.headers)
+        width_columns = [_calc_widths(texts) for texts in text_columns]
+        widths = [
+            max(header_width, max(column_widths, default=0))
+            for header_width, column_widths in zip(header_widths, width_columns)
+        ]
+    if profile is not None:
+        cell_count = len(text_columns[0]) * len(text_columns)
+        profile.count('convert', rows=len(text_columns[0]), cells=cell_count)
+        profile.count('widths', cells=cell_count + len(header_widths))
+    body = zip(zip(*text_columns), zip(*width_columns))
+    lines = _iter_table_lines(
+        table.headers,
+        header_widths,
+        body,
+        bool(text_columns[0]),
+        widths,
+        grid,
+        col_sep,
+        row_sep,
+        prefix,
+        suffix,
+        keep_ansi,
+        jobs,
+    )
+    yield from _profile_lines(profile, lines, len(text_columns[0]))
+
+
 def iter_readable(
     data,
     headers=None,
@@ -303,58 +1138,135 @@ def iter_readable(
     bar_width=100,
     bar_scale='linal',
     limit=None,
+    stream=False,
+    keep_ansi=False,
+    jobs=None,
+    profile=None,
 ):
-    """逐行生成可打印的表格文本。"""
-    if grid is not None and grid not in VALID_GRIDS:
-        raise ValueError(f'不支持的 grid: {grid}')
-    if bar_scale not in VALID_BAR_SCALES:
-        raise ValueError(f'不支持的 bar_scale: {bar_scale}')
-    if bar_width < 0:
-        raise ValueError('bar_width 不能小于 0')
+    """逐行生成可打印的表格文本。
+
+    stream=True 时按两遍流式渲染：data 须为可重读数据源（每次调用返回新迭代器的
+    可调用对象，或可重复迭代的容器）。第一遍只统计列宽与条形图最大值，第二遍逐行
+    格式化输出，内存占用与列数相关而与行数无关。
+    keep_ansi=True 时单元格中的 ANSI CSI 序列（颜色等）原样输出且不计入列宽。
+    jobs 大于 1 时，列宽确定后数据行按块交给 jobs 个进程格式化，再按顺序输出；
+    不足 PARALLEL_RENDER_CHUNK_ROWS 行的表格仍在本进程渲染。
+    传入 printable.profiling.RenderProfile 时，normalize、convert、widths、format 各阶段的统计记入其中。
+    """
+    _validate_render_options(grid, bar_scale, bar_width, limit if stream else None, jobs)
+    selected_bars = set(bars or [])
+    markdown = grid == 'markdown'
+
+    if stream:
+        # 第一遍读取、清理并测量整个数据源
+        with _stage(profile, 'widths'):
+            normalized_headers, record_count, widths, maximums = _measure_stream(
+                data, headers, limit, selected_bars, bar_char, bar_width, bar_scale, markdown, keep_ansi
+            )
+        if not normalized_headers:
+            return
+        if profile is not None:
+            profile.count('widths', rows=record_count, cells=record_count * len(normalized_headers))
+        body = _iter_stream_body(
+            data,
+            normalized_headers,
+            limit,
+            selected_bars,
+            bar_char,
+            bar_width,
+            maximums,
+            bar_scale,
+            markdown,
+            keep_ansi,
+        )
+        lines = _iter_table_lines(
+            normalized_headers,
+            None,
+            body,
+            record_count > 0,
+            widths,
+            grid,
+            col_sep,
+            row_sep,
+            prefix,
+            suffix,
+            keep_ansi,
+            jobs,
+        )
+        yield from _profile_lines(profile, lines, record_count)
+        return
 
-    normalized_headers, records = normalize_table(data, headers, limit)
-    if not normalized_headers:
+    if isinstance(data, ColumnarTable) and headers is None:
+        yield from _iter_columnar_lines(
+            data,
+            grid,
+            col_sep,
+            row_sep,
+            prefix,
+            suffix,
+            selected_bars,
+            bar_char,
+            bar_width,
+            bar_scale,
+            limit,
+            keep_ansi,
+            jobs,
+            profile,
+        )
         return
 
-    selected_bars = set(bars or [])
-    maximums = calculate_bar_maximums(records, normalized_headers, selected_bars, bar_scale)
+    with _stage(profile, 'normalize'):
+        normalized_headers, records = normalize_table(data, headers, limit)
+    if not normalized_headers:
+        return
 
+    # 各列先整列转换为文本（无需清理的字符串与原值共用同一对象），拼行时原始记录随即释放，
+    # 已输出的行也随即释放，峰值内存只覆盖尚未输出的行
     rendered_rows = [normalized_headers]
-    for record in records:
-        row = format_record(record, normalized_headers, selected_bars, bar_char, bar_width, maximums, bar_scale)
-        if grid == 'markdown':
-            row = escape_markdown_row(row)
-        rendered_rows.append(row)
+    with _stage(profile, 'convert'):
+        formatted_records = _iter_formatted_records(
+            records, normalized_headers, selected_bars, bar_char, bar_width, bar_scale, keep_ansi
+        )
+        for record_index, row in enumerate(formatted_records):
+            if markdown:
+                row = escape_markdown_row(row)
+            rendered_rows.append(row)
+            records[record_index] = None
 
     column_count = len(normalized_headers)
-    widths, flat_widths = _calculate_widths(rendered_rows)
-
-    style = GRID_STYLES[grid or 'default']
-    effective_col_sep = style['col_sep'] if col_sep is None else col_sep
-    effective_row_sep = style['row_sep'] if row_sep is None else row_sep
-    if (prefix, suffix) == (' ', ' '):
-        prefix_suffix_width = PREFIX_WIDTH + SUFFIX_WIDTH
-    else:
-        prefix_suffix_width = sum(_calc_widths([prefix, suffix]))
+    with _stage(profile, 'widths'):
+        widths, flat_widths = _calculate_widths(rendered_rows)
+    if profile is not None:
+        record_count = len(records)
+        for name in ('normalize', 'convert'):
+            profile.count(name, rows=record_count, cells=record_count * column_count)
+        profile.count('widths', cells=len(rendered_rows) * column_count)
 
     def row_widths(row_index):
         row_start = row_index * column_count
         return flat_widths[row_start : row_start + column_count]
 
-    layout = GRID_LAYOUTS[grid or 'default']
-    if layout['top'] is not None:
-        yield render_separator(widths, effective_row_sep, prefix_suffix_width, *layout['top'])
-    yield render_data_row(normalized_headers, widths, effective_col_sep, prefix, suffix, layout['edges'], row_widths(0))
-    if layout['header_line'] is not None and (records or not layout['header_conditional']):
-        yield render_separator(widths, effective_row_sep, prefix_suffix_width, *layout['header_line'])
-    for row_index in range(1, len(rendered_rows)):
-        yield render_data_row(
-            rendered_rows[row_index], widths, effective_col_sep, prefix, suffix, layout['edges'], row_widths(row_index)
-        )
-        if layout['row_line'] is not None and row_index < len(rendered_rows) - 1:
-            yield render_separator(widths, effective_row_sep, prefix_suffix_width, *layout['row_line'])
-    if layout['bottom'] is not None:
-        yield render_separator(widths, effective_row_sep, prefix_suffix_width, *layout['bottom'])
+    def body():
+        for row_index in range(1, len(rendered_rows)):
+            row = rendered_rows[row_index]
+            rendered_rows[row_index] = None
+            yield row, row_widths(row_index)
+
+    lines = _iter_table_lines(
+        normalized_headers,
+        row_widths(0),
+        body(),
+        bool(records),
+        widths,
+        grid,
+        col_sep,
+        row_sep,
+        prefix,
+        suffix,
+        keep_ansi,
+        jobs,
+    )
+    yield from _profile_lines(profile, lines, len(records))
 
 
 def readable(*args, **kwargs):
@@ -362,46 +1274,315 @@ def readable(*args, **kwargs):
     return '\n'.join(iter_readable(*args, **kwargs))
 
 
-def render_column_data(data: Iterable, args: argparse.Namespace) -> str:
-    """使用 column 渲染默认表格，并保持 Python 默认边距。"""
-    headers, records = normalize_table(data, limit=args.limit)
-    if not headers:
+VALID_OVERFLOWS = frozenset(('truncate', 'wrap'))
+ELLIPSIS = '…'
+
+
+def split_text_by_width(text, width):
+    """按显示宽度把文本切成若干段，每段不超过 width；单个超宽字符独占一段。"""
+    segments = []
+    segment_start = 0
+    segment_width = 0
+    for index, char_width in enumerate(_calc_widths(list(text))):
+        if segment_width + char_width > width and index > segment_start:
+            segments.append(text[segment_start:index])
+            segment_start, segment_width = index, 0
+        segment_width += char_width
+    segments.append(text[segment_start:])
+    return segments
+
+
+def truncate_text(text, width):
+    """把文本截断到 width 列以内，截断时以省略号结尾。"""
+    if width <= 0:
         return ''
+    kept_width = 0
+    for index, char_width in enumerate(_calc_widths(list(text))):
+        if kept_width + char_width > width - 1:
+            return text[:index] + ELLIPSIS
+        kept_width += char_width
+    return text
+
+
+def _fit_row(row, row_widths, widths, overflow):
+    """把一行单元格适配到固定列宽，返回（物理行, 行宽度）列表。"""
+    if all(row_width <= width for row_width, width in zip(row_widths, widths)):
+        return [(row, row_widths)]
+    if overflow == 'truncate':
+        fitted_row = tuple(
+            cell if row_width <= width else truncate_text(cell, width)
+            for cell, row_width, width in zip(row, row_widths, widths)
+        )
+        return [(fitted_row, None)]
+    cell_segments = [
+        [cell] if row_width <= width else split_text_by_width(cell, width)
+        for cell, row_width, width in zip(row, row_widths, widths)
+    ]
+    line_count = max(len(segments) for segments in cell_segments)
+    return [
+        (tuple(segments[line_index] if line_index < len(segments) else '' for segments in cell_segments), None)
+        for line_index in range(line_count)
+    ]
 
-    selected_bars = set(args.bar or [])
-    maximums = calculate_bar_maximums(records, headers, selected_bars, args.bar_scale)
-    formatted_records = [
-        format_record(record, headers, selected_bars, args.bar_char, args.bar_width, maximums, args.bar_scale)
-        for record in records
+
+def iter_readable_fixed(
+    data,
+    headers=None,
+    widths=None,
+    sample=None,
+    overflow='truncate',
+    repeat_header=None,
+    grid=None,
+    col_sep=None,
+    row_sep=None,
+    prefix=' ',
+    suffix=' ',
+    bars=None,
+    bar_char='x',
+    bar_width=100,
+    bar_scale='linal',
+):
+    """以固定列宽逐条输出记录，适合不断增长的无界输入（如 tail -f 管道）。
+
+    列宽取自显式 widths，或由前 sample 条记录测量（默认 100 条；传入 widths 时默认 1 条，
+    仅用于推断字典表头和条形图最大值）。之后每条记录到达即输出，超宽单元格按 overflow
+    截断或折行；repeat_header 为每隔多少条记录重复输出表头。内存只与 sample 相关。
+    """
+    _validate_render_options(grid, bar_scale, bar_width)
+    if overflow not in VALID_OVERFLOWS:
+        raise ValueError(f'不支持的 overflow: {overflow}')
+    if sample is None:
+        sample = 1 if widths is not None else 100
+    if sample < 1:
+        raise ValueError('sample 必须大于 0')
+    if repeat_header is not None and repeat_header < 1:
+        raise ValueError('repeat_header 必须大于 0')
+    if isinstance(data, (str, bytes)) or not isinstance(data, Iterable):
+        raise TypeError('data 必须是记录的可迭代对象')
+    if isinstance(data, Mapping):
+        data = [data]
+
+    data_iterator = iter(data)
+    first_record = next(data_iterator, _MISSING)
+    if first_record is _MISSING:
+        return
+    if isinstance(first_record, Mapping):
+        records = _iter_mapping_records(itertools.chain((first_record,), data_iterator))
+        sampled_records = list(itertools.islice(records, sample))
+        if headers is None:
+            headers = list(dict.fromkeys(key for record in sampled_records for key in record))
+        normalized_headers = validate_headers(headers)
+    else:
+        normalized_headers = validate_headers(headers if headers is not None else first_record)
+        records = _iter_sequence_records(data_iterator, len(normalized_headers))
+        sampled_records = list(itertools.islice(records, sample))
+
+    selected_bars = set(bars or [])
+    maximums = calculate_bar_maximums(sampled_records, normalized_headers, selected_bars, bar_scale)
+    markdown = grid == 'markdown'
+
+    def format_rows(source_records):
+        for record in source_records:
+            row = format_record(record, normalized_headers, selected_bars, bar_char, bar_width, maximums, bar_scale)
+            yield escape_markdown_row(row) if markdown else row
+
+    sampled_rows = list(format_rows(sampled_records))
+    measured_widths, _ = _calculate_widths([normalized_headers, *sampled_rows])
+    if widths is None:
+        widths = measured_widths
+    else:
+        widths = list(widths)
+        if len(widths) != len(normalized_headers):
+            raise ValueError(f'widths 需要 {len(normalized_headers)} 个列宽，实际为 {len(widths)} 个')
+        if any(width < 1 for width in widths):
+            raise ValueError('widths 中的列宽必须大于 0')
+
+    col_sep, row_sep, prefix_suffix_width, layout = _resolve_layout(grid, col_sep, row_sep, prefix, suffix)
+    edges = layout['edges']
+    header_line = row_line = None
+    if layout['header_line'] is not None:
+        header_line = render_separator(widths, row_sep, prefix_suffix_width, *layout['header_line'])
+    if layout['row_line'] is not None:
+        row_line = render_separator(widths, row_sep, prefix_suffix_width, *layout['row_line'])
+    header_lines = [
+        render_data_row(header_row, widths, col_sep, prefix, suffix, edges, header_widths)
+        for header_row, header_widths in _fit_row(
+            normalized_headers, _calc_widths(normalized_headers), widths, overflow
+        )
     ]
-    rows = [headers, *formatted_records]
-    tsv_input = ''.join('\t'.join(row) + '\n' for row in rows)
-    column_options: dict[str, str | bool] = {
-        'output_width': 'unlimited',
-        'separator': '\t',
-        'table': True,
-        'table_empty_lines': True,
+
+    if layout['top'] is not None:
+        yield render_separator(widths, row_sep, prefix_suffix_width, *layout['top'])
+    yield from header_lines
+    if header_line is not None and not layout['header_conditional']:
+        yield header_line
+
+    record_count = 0
+    for row in itertools.chain(sampled_rows, format_rows(records)):
+        if record_count == 0:
+            if header_line is not None and layout['header_conditional']:
+                yield header_line
+        elif repeat_header is not None and record_count % repeat_header == 0:
+            if row_line is not None:
+                yield row_line
+            yield from header_lines
+            if header_line is not None:
+                yield header_line
+        elif row_line is not None:
+            yield row_line
+        record_count += 1
+        for fitted_row, fitted_widths in _fit_row(row, _calc_widths(row), widths, overflow):
+            yield render_data_row(fitted_row, widths, col_sep, prefix, suffix, edges, fitted_widths)
+    if layout['bottom'] is not None:
+        yield render_separator(widths, row_sep, prefix_suffix_width, *layout['bottom'])
+
+
+def _table_layout(grid, col_sep, row_sep):
+    """把 GRID_LAYOUTS 中的网格样式转换为 native 格式化器的布局描述。"""
+    col_sep, row_sep, _, layout = _resolve_layout(grid, col_sep, row_sep, ' ', ' ')
+
+    def line(parts):
+        return None if parts is None else tuple(parts)
+
+    return _column().TableLayout(
+        separator=col_sep,
+        row_fill=row_sep or '',
+        edges=line(layout['edges']),
+        top=line(layout['top']),
+        header_line=line(layout['header_line']),
+        row_line=line(layout['row_line']),
+        bottom=line(layout['bottom']),
+        header_conditional=layout['header_conditional'],
+        escape_pipes=grid == 'markdown',
+    )
+
+
+def render_column_data(data: Iterable, args: argparse.Namespace) -> str:
+    """使用 native 格式化入口渲染表格（含网格样式），输出与 Python 引擎逐字节一致。
+
+    args.profile 为 RenderProfile 时记录 normalize、convert 与 native_format（测宽并排版）阶段。
+    """
+    _validate_render_options(args.grid, args.bar_scale, args.bar_width)
+    selected_bars = set(args.bar or [])
+    keep_ansi = getattr(args, 'keep_ansi', False)
+    profile = getattr(args, 'profile', None)
+    if isinstance(data, ColumnarTable):
+        with _stage(profile, 'convert'):
+            text_columns, _ = _columnar_text_columns(
+                data, args.limit, selected_bars, args.bar_char, args.bar_width, args.bar_scale, keep_ansi
+            )
+            cells = list(data.headers)
+            cells.extend(itertools.chain.from_iterable(zip(*text_columns)))
+        headers = data.headers
+    else:
+        with _stage(profile, 'normalize'):
+            headers, records = normalize_table(data, limit=args.limit)
+        if not headers:
+            return ''
+        if profile is not None:
+            profile.count('normalize', rows=len(records), cells=len(records) * len(headers))
+
+        with _stage(profile, 'convert'):
+            cells = list(headers)
+            cells.extend(
+                itertools.chain.from_iterable(
+                    _iter_formatted_records(
+                        records, headers, selected_bars, args.bar_char, args.bar_width, args.bar_scale, keep_ansi
+                    )
+                )
+            )
+    layout = _table_layout(args.grid, args.sep_col, args.sep_row)
+    with _stage(profile, 'native_format'):
+        # 宽度与 Python 引擎同样经 _calc_widths 测量（含 locale 检查与上下文序列的重新测量），C 只负责排版
+        output = _column().format_cells(cells, len(headers), layout, _calc_widths(cells))
+    if profile is not None and headers:
+        row_count = len(cells) // len(headers) - 1
+        profile.count('convert', rows=row_count, cells=row_count * len(headers))
+        profile.count('native_format', rows=row_count, cells=len(cells))
+    return output
+
+
+# 估计字符组成时抽样的行数
+SHAPE_SAMPLE_ROWS = 64
+
+
+def _table_shape(data, limit):
+    """返回（data, 行数, 列数, 非 ASCII 单元格数的估计）；行数与列数均含表头行。
+
+    惰性迭代器会先读成列表（两种引擎本来都要整表读入），返回的 data 可以再次迭代。
+    非 ASCII 单元格数按前 SHAPE_SAMPLE_ROWS 行中的比例推算。
+    """
+    if isinstance(data, ColumnarTable):
+        sample_columns = [list(itertools.islice(_column_values(column), SHAPE_SAMPLE_ROWS)) for column in data.columns]
+        sample = [data.headers, *zip(*sample_columns)]
+        column_count = len(data.headers)
+        record_count = len(data)
+    else:
+        if isinstance(data, Mapping):
+            data = [data]
+        elif not isinstance(data, (list, tuple)):
+            # 多读一项：二维数据的首项是表头
+            data = list(data if limit is None else itertools.islice(data, limit + 1))
+        sample = data[: SHAPE_SAMPLE_ROWS + 1]
+        first_record = sample[0] if sample else ()
+        # 形状不合法的数据留给渲染时的校验报错
+        column_count = len(first_record) if isinstance(first_record, (Mapping, list, tuple)) else 0
+        record_count = max(len(data) - 1, 0)
+        if isinstance(first_record, Mapping):
+            # 字典记录没有表头行，表头由键推断
+            record_count = len(data)
+            sample = [first_record.keys(), *(record.values() for record in sample if isinstance(record, Mapping))]
+    row_count = (record_count if limit is None else min(record_count, limit)) + 1
+    sample_cells = [str(value) for record in sample for value in record] if column_count else []
+    non_ascii = sum(not cell.isascii() for cell in sample_cells)
+    non_ascii_cells = row_count * column_count * non_ascii / len(sample_cells) if sample_cells else 0
+    return data, row_count, column_count, non_ascii_cells
+
+
+def _choose_auto_engine(data, limit, shape=None):
+    """engine=auto 且 column 可用时，按代价模型比较两种引擎，返回（data, 引擎, 原因）。
+
+    column 的每一项系数都不高于 python 时（内置默认系数即是如此），任何形状的表格上 column 都不会更慢，
+    直接选择 column，不再读入整表估计形状。shape 为已知的（行数, 列数, 非 ASCII 单元格数）时不再从 data 推算。
+    """
+    from .calibration import estimate_cost, load_engine_costs
+
+    costs, source = load_engine_costs()
+    if all(column <= python for column, python in zip(costs['column'], costs['python'])):
+        return data, 'column', f'column 的各项系数都不高于 python（{source}）'
+    if shape is None:
+        data, *shape = _table_shape(data, limit)
+    row_count, column_count, non_ascii_cells = shape
+    estimates = {
+        engine: estimate_cost(coefficients, row_count, row_count * column_count, non_ascii_cells)
+        for engine, coefficients in costs.items()
     }
-    if args.sep_col:
-        column_options['output_separator'] = f' {args.sep_col} '
+    engine = min(estimates, key=estimates.get)
+    reason = (
+        f'{row_count} 行 × {column_count} 列，约 {non_ascii_cells:.0f} 个非 ASCII 单元格；'
+        f'估计 python {estimates["python"]:.0f} µs、column {estimates["column"]:.0f} µs（{source}）'
+    )
+    return data, engine, reason
 
-    column_output = render_with_column(tsv_input, **column_options)
-    widths, _ = _calculate_widths([headers, *formatted_records])
 
-    separator_text = args.sep_col or ''
-    separator_width = SEP_COL_WIDTH if separator_text == '' else _calc_widths([separator_text])[0]
-    target_width = sum(widths) + (2 * len(widths)) + (separator_width * (len(widths) - 1))
-    padded_lines = [f' {line} ' for line in column_output.splitlines()]
-    normalized_lines = []
-    for line, line_width in zip(padded_lines, _calc_widths(padded_lines)):
-        padding_width = max(0, target_width - line_width)
-        normalized_lines.append(line + (' ' * padding_width))
-    return '\n'.join(normalized_lines)
+def _report_engine(engine, reason, profile=None):
+    """设置了 DEBUG 环境变量时，在标准错误输出所选引擎与原因；同时记入 profile。"""
+    if profile is not None:
+        profile.set_engine(engine, reason)
+    if DEBUG:
+        print(f'printable: engine={engine}: {reason}', file=sys.stderr)
 
 
 def render_with_engine(data: Iterable, args: argparse.Namespace) -> Iterator[str]:
-    """根据 CLI engine 选择 Python 或 column 渲染器。"""
+    """根据 CLI engine 选择 Python 或 column 渲染器。
+
+    engine=auto 时若 column 动态库可用，按表格的行数、列数与非 ASCII 单元格比例估计两种引擎的耗时，
+    选择较快的一个（系数见 printable.calibration）；设置 DEBUG 时在标准错误输出所选引擎与原因。
+    args.profile 为 printable.profiling.RenderProfile 时，所选引擎与各阶段的统计记入其中。
+    """
     engine = getattr(args, 'engine', 'auto')
+    stream = getattr(args, 'stream', False)
+    profile = getattr(args, 'profile', None)
 
     def python_lines() -> Iterator[str]:
         """使用原生 Python 渲染器逐行输出。"""
@@ -415,26 +1596,147 @@ def render_with_engine(data: Iterable, args: argparse.Namespace) -> Iterator[str
             bar_width=args.bar_width,
             bar_scale=args.bar_scale,
             limit=args.limit,
+            stream=stream,
+            keep_ansi=getattr(args, 'keep_ansi', False),
+            jobs=getattr(args, 'jobs', None),
+            profile=profile,
         )
 
+    if getattr(args, 'follow', False):
+        if getattr(args, 'keep_ansi', False):
+            raise ValueError('--follow 会截断或折行单元格，不能与 --keep-ansi 同时使用')
+        if engine == 'column':
+            raise ValueError('column engine 需要一次性读入整张表，不能与 --follow 同时使用')
+        _report_engine('python', '--follow 逐条固定列宽输出', profile)
+        lines = iter_readable_fixed(
+            data,
+            widths=args.widths,
+            sample=args.sample,
+            overflow=args.overflow,
+            repeat_header=args.repeat_header,
+            col_sep=args.sep_col,
+            row_sep=args.sep_row,
+            grid=args.grid,
+            bars=args.bar or [],
+            bar_char=args.bar_char,
+            bar_width=args.bar_width,
+            bar_scale=args.bar_scale,
+        )
+        return _profile_lines(profile, lines)
+    if stream:
+        if engine == 'column':
+            raise ValueError('column engine 需要一次性读入整张表，不能与 --stream 同时使用')
+        _report_engine('python', '流式渲染只用 python 引擎', profile)
+        return python_lines()
     if engine == 'python':
+        _report_engine('python', '由 engine 参数指定', profile)
         return python_lines()
-    if args.grid is not None:
-        if engine == 'auto':
-            return python_lines()
-        raise ValueError('column engine 只支持默认表格格式，不能与 --grid 同时使用')
 
+    # 先确认动态库可用再交给 column：data 可能是只能消费一次的惰性读取器
     if engine == 'auto':
-        try:
-            return iter(render_column_data(data, args).splitlines())
-        except FileNotFoundError:
+        if not column_available():
+            _report_engine('python', 'column 动态库不可用', profile)
             return python_lines()
-    return iter(render_column_data(data, args).splitlines())
+        with _stage(profile, 'choose_engine'):
+            data, engine, reason = _choose_auto_engine(data, args.limit)
+        _report_engine(engine, reason, profile)
+        if engine == 'python':
+            return python_lines()
+    else:
+        _report_engine('column', '由 engine 参数指定', profile)
+    output = render_column_data(data, args)
+    # 单元格可能含 U+2028 等 splitlines 也会切分的字符，只按换行符拆分
+    return iter(output.split('\n') if output else ())
+
+
+def _looks_like_json_lines(head):
+    """首行是完整的 JSON 值且其后仍有内容时视为 JSON Lines。"""
+    first_line, _, rest = head.lstrip().partition('\n')
+    if not rest.strip():
+        return False
+    try:
+        import json
+
+        json.loads(first_line)
+    except ValueError:
+        return False
+    return True
+
+
+def _engine_args(engine, options):
+    """把 render_many 风格的关键字选项转换为 render_with_engine 使用的参数对象。"""
+    import argparse
+
+    return argparse.Namespace(
+        engine=engine,
+        grid=options.get('grid'),
+        sep_col=options.get('col_sep'),
+        sep_row=options.get('row_sep'),
+        bar=options.get('bars'),
+        bar_char=options.get('bar_char', 'x'),
+        bar_width=options.get('bar_width', 100),
+        bar_scale=options.get('bar_scale', 'linal'),
+        limit=options.get('limit'),
+        keep_ansi=options.get('keep_ansi', False),
+    )
+
+
+def _render_table(table, engine, options):
+    """render_many 的单表渲染；定义在模块级以便进程池序列化。"""
+    return '\n'.join(render_with_engine(table, _engine_args(engine, options)))
+
+
+RENDER_MANY_OPTIONS = frozenset(
+    ('grid', 'col_sep', 'row_sep', 'bars', 'bar_char', 'bar_width', 'bar_scale', 'limit', 'keep_ansi')
+)
+
+
+def render_many(tables, engine='auto', workers=None, executor=None, **options):
+    """并行渲染多张表格，按输入顺序返回渲染结果。
+
+    column 引擎可重入且原生调用期间释放 GIL，使用线程池；纯 Python 引擎受 GIL 限制，
+    改用进程池（表格与选项须可序列化）。传入 executor 可复用长期存在的线程池或进程池。
+    单张表格渲染失败不影响其他表格，结果列表的对应位置为该异常对象。
+    """
+    if engine not in ('python', 'column', 'auto'):
+        raise ValueError(f'不支持的 engine: {engine}')
+    unknown_options = set(options) - RENDER_MANY_OPTIONS
+    if unknown_options:
+        raise TypeError(f'不支持的渲染参数: {", ".join(sorted(unknown_options))}')
+
+    tables = list(tables)
+    if executor is None and (workers == 1 or len(tables) <= 1):
+        return [_render_outcome(functools.partial(_render_table, table, engine, options)) for table in tables]
+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    use_column = engine == 'column' or (engine == 'auto' and column_available())
+    executor_class = ThreadPoolExecutor if use_column else ProcessPoolExecutor
+    executor_context = contextlib.nullcontext(executor) if executor is not None else executor_class(workers)
+    with executor_context as active_executor:
+        futures = [active_executor.submit(_render_table, table, engine, options) for table in tables]
+        # 表格无法序列化等提交阶段的错误同样记录在对应 future 上
+        return [_render_outcome(future.result) for future in futures]
+
+
+def _render_outcome(render):
+    """执行单表渲染，失败时返回异常对象而不是抛出。"""
+    try:
+        return render()
+    except Exception as error:
+        return error
 
 
 def detect_file_format(path, content=None):
-    """按扩展名和内容嗅探文件格式，返回 json/csv/yaml；content 为已读入的字节内容。"""
-    extension_map = {'.json': 'json', '.csv': 'csv', '.yaml': 'yaml', '.yml': 'yaml'}
+    """按扩展名和内容嗅探文件格式，返回 json/jsonl/csv/yaml；content 为已读入的字节内容。"""
+    extension_map = {
+        '.json': 'json',
+        '.jsonl': 'jsonl',
+        '.ndjson': 'jsonl',
+        '.csv': 'csv',
+        '.yaml': 'yaml',
+        '.yml': 'yaml',
+    }
     extension = os.path.splitext(path)[1].lower()
     if extension in extension_map:
         return extension_map[extension]
@@ -447,7 +1749,7 @@ def detect_file_format(path, content=None):
     if not stripped:
         return 'json'
     if stripped[0] in '{[':
-        return 'json'
+        return 'jsonl' if _looks_like_json_lines(stripped) else 'json'
     for line in head.splitlines()[:20]:
         stripped_line = line.strip()
         if re.match(r'^[\w.\-/]+:\s*\S', stripped_line) or (
@@ -457,64 +1759,420 @@ def detect_file_format(path, content=None):
     return 'csv'
 
 
-def read_json(path, content=None):
-    """读取 JSON 文件或字节内容，返回解析结果。"""
-    if content is None:
-        with open(path, 'rb') as file:
-            content = file.read()
-    return json.loads(content.decode('utf-8-sig'))
+JSON_WHITESPACE_PATTERN = re.compile(r'[ \t\n\r]*')
+# YAML 文档开始与结束标记，只能出现在行首
+YAML_DOCUMENT_MARKER_PATTERN = re.compile(r'^(?:---|\.\.\.)(?=[ \t\r\n]|$)', re.MULTILINE)
+
+
+def _load_json_prefix(text, limit):
+    """只解析顶层 JSON 数组的前 limit 个元素；顶层不是数组时解析整个文档。"""
+    import json
+
+    index = JSON_WHITESPACE_PATTERN.match(text).end()
+    if not text.startswith('[', index):
+        return json.loads(text)
+    decoder = json.JSONDecoder()
+    items = []
+    index = JSON_WHITESPACE_PATTERN.match(text, index + 1).end()
+    if text.startswith(']', index):
+        return items
+    while len(items) < limit:
+        item, index = decoder.raw_decode(text, index)
+        items.append(item)
+        index = JSON_WHITESPACE_PATTERN.match(text, index).end()
+        if text.startswith(']', index):
+            break
+        if not text.startswith(',', index):
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, index)
+        index = JSON_WHITESPACE_PATTERN.match(text, index + 1).end()
+    return items
+
+
+def _is_single_yaml_document(text):
+    """粗略判断 YAML 文本只含一个文档：除开头的 --- 外没有其他文档标记；不确定时返回 False。"""
+    markers = YAML_DOCUMENT_MARKER_PATTERN.finditer(text)
+    first_marker = next(markers, None)
+    if first_marker is None:
+        return True
+    if next(markers, None) is not None or first_marker.group() != '---':
+        return False
+    # 唯一的 --- 之前只能有空行、注释与指令
+    return all(
+        not line.strip() or line.lstrip().startswith(('#', '%')) for line in text[: first_marker.start()].splitlines()
+    )
 
 
-def read_yaml(path, content=None):
-    """读取 YAML 文件或字节内容，返回解析结果。"""
-    if content is None:
-        with open(path, 'rb') as file:
-            content = file.read()
-    return yaml.load(content.decode('utf-8-sig'), Loader=YAML_LOADER)
+def _load_yaml_prefix(text, limit):
+    """只构造顶层 YAML 序列的前 limit 项；顶层不是序列时加载整个文档。
+
+    按事件逐项组合节点需要纯 Python 的 Composer（CLoader 只能整篇组合），
+    但只扫描到第 limit 项为止，其余内容不会被解析。可能含多个文档时与不限量的 read_yaml 一样整篇加载，
+    由 yaml.load 报错，而不是只读第一个文档。
+    """
+    import yaml
+
+    if not _is_single_yaml_document(text):
+        return yaml.load(text, Loader=_yaml_loader())
+    loader = yaml.Loader(text)
+    try:
+        loader.get_event()
+        if loader.check_event(yaml.DocumentStartEvent):
+            loader.get_event()
+            if loader.check_event(yaml.SequenceStartEvent):
+                loader.get_event()
+                items = []
+                while len(items) < limit and not loader.check_event(yaml.SequenceEndEvent):
+                    items.append(loader.construct_document(loader.compose_node(None, None)))
+                return items
+    finally:
+        loader.dispose()
+    return yaml.load(text, Loader=_yaml_loader())
+
+
+@contextlib.contextmanager
+def _map_file(file):
+    """只读映射已打开的文件；空文件或管道等不可映射的输入返回 None。"""
+    try:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        yield None
+        return
+    with mapped:
+        yield mapped
+
+
+def _decode_utf8(buffer):
+    """按偏移跳过 BOM 后直接从缓冲区（bytes 或 mmap）解码，不产生中间字节副本。"""
+    with memoryview(buffer) as view:
+        return str(view[_bom_offset(buffer) :], 'utf-8')
+
+
+def _read_text(path, content):
+    """读取 UTF-8 文本；普通文件经 mmap 解码，峰值内存约为一份解码后的文本。"""
+    if content is not None:
+        return _decode_utf8(content)
+    with open(path, 'rb') as file, _map_file(file) as mapped:
+        return _decode_utf8(file.read() if mapped is None else mapped)
 
 
-def read_csv(path, content=None):
-    """以 UTF-8 CSV 格式读取并校验表格数据；content 为已读入的字节内容。"""
-    delimiter = os.getenv('CSV_DELIMITER', ',')
-    quotechar = os.getenv('CSV_QUOTE', '"')
-    encoding = os.getenv('CSV_ENCODING', 'utf-8-sig')
-    if len(delimiter) != 1 or len(quotechar) != 1:
-        raise ValueError('CSV_DELIMITER 和 CSV_QUOTE 必须是单个字符')
+def read_json(path, content=None, limit=None):
+    """读取 JSON 文件或字节内容，返回解析结果；limit 限制顶层数组只解析前几项。"""
+    import json
+
+    text = _read_text(path, content)
+    return json.loads(text) if limit is None else _load_json_prefix(text, limit)
+
+
+def read_yaml(path, content=None, limit=None):
+    """读取 YAML 文件或字节内容，返回解析结果；limit 限制顶层序列只构造前几项。"""
+    import yaml
+
+    text = _read_text(path, content)
+    return yaml.load(text, Loader=_yaml_loader()) if limit is None else _load_yaml_prefix(text, limit)
+
+
+def iter_csv(path, content=None):
+    """以 UTF-8 CSV 格式逐条读取并校验记录，先产出表头再逐行产出；content 为已读入的字节内容或二进制流。"""
+    import csv
+
+    delimiter, quotechar, encoding = _csv_options()
 
     if content is None:
         csv_file = open(path, encoding=encoding, newline='')
+    elif hasattr(content, 'read'):
+        csv_file = io.TextIOWrapper(content, encoding=encoding, newline='')
     else:
         csv_file = io.TextIOWrapper(io.BytesIO(content), encoding=encoding, newline='')
     with csv_file:
-        reader = csv.DictReader(csv_file, delimiter=delimiter, quotechar=quotechar)
-        if reader.fieldnames is None:
-            return []
-        validate_headers(reader.fieldnames)
-        records = []
-        for record in reader:
-            if None in record:
-                raise ValueError(f'CSV 第 {reader.line_num} 行的列数超过表头')
-            records.append(record)
-    return records
-
-
-def write_to_pager(lines, line_numbers):
-    """使用 less 分页查看输出。"""
-    command = ['less', '-S'] + (['-N'] if line_numbers else [])
+        # 表头已知，直接产出 csv.reader 的行列表，不再为每行构造字典
+        reader = csv.reader(csv_file, delimiter=delimiter, quotechar=quotechar)
+        headers = next(reader, None)
+        if headers is None:
+            return
+        validate_headers(headers)
+        yield headers
+        yield from _iter_csv_rows(reader, len(headers))
+
+
+def read_csv(path, content=None, limit=None):
+    """以 UTF-8 CSV 格式读取并校验表格数据，返回 [表头, 行, ...] 形式的二维数据。
+
+    content 为已读入的字节内容；limit 限制返回的项数（含表头），之后的行不再解析。
+    """
+    return list(itertools.islice(iter_csv(path, content), limit))
+
+
+def read_jsonl(path, content=None, limit=None):
+    """惰性读取 JSON Lines 文件或字节内容，逐条产出记录。
+
+    普通文件通过 mmap 映射后逐行解析，不会一次性读入或解码整个文件；
+    记录随渲染器的消费逐条生成，解析与排版交替进行。
+    """
+    if content is not None:
+        yield from itertools.islice(_iter_json_lines_buffer(content), limit)
+        return
+    with open(path, 'rb') as file, _map_file(file) as mapped:
+        # 空文件与管道等不可映射的输入退回逐行读取
+        lines = _iter_json_lines(file) if mapped is None else _iter_json_lines_buffer(mapped)
+        yield from itertools.islice(lines, limit)
+
+
+def open_follow_records(path, file_type=None):
+    """以增量方式打开输入，逐条产出记录；用于 --follow 的无界输入。"""
+    if file_type not in (None, 'csv', 'json', 'jsonl'):
+        raise ValueError('--follow 只支持 CSV 和 JSON Lines 输入')
+    return _iter_follow_records(path, file_type)
+
+
+def _iter_follow_records(path, file_type):
+    """在生成器中打开并读取输入，迭代结束、出错或生成器被关闭时关闭打开的文件；标准输入不关闭。"""
+    if path == '/dev/stdin':
+        yield from _follow_stream_records(path, sys.stdin.buffer, file_type)
+        return
+    with open(path, 'rb') as stream:
+        yield from _follow_stream_records(path, stream, file_type)
+
+
+def _follow_stream_records(path, stream, file_type):
+    """按 file_type（为 None 时由开头的内容判断）返回逐条读取二进制流 stream 的迭代器。"""
+    if file_type is None:
+        head = stream.peek(4096)[:4096].decode('utf-8-sig', errors='replace').lstrip()
+        file_type = 'jsonl' if head[:1] in ('{', '[') else 'csv'
+    if file_type == 'csv':
+        return iter_csv(path, stream)
+    return _iter_json_lines(stream)
+
+
+def _stdin_offset():
+    """标准输入重定向自普通文件时返回其当前读取偏移，否则返回 None。"""
+    try:
+        descriptor = sys.stdin.fileno()
+        if not stat.S_ISREG(os.fstat(descriptor).st_mode):
+            return None
+        return os.lseek(descriptor, 0, os.SEEK_CUR)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def stdin_is_regular_file():
+    """标准输入是否重定向自普通文件且位于文件开头（可按路径映射、可重复读取）。
+
+    调用方可能已读走开头的部分输入（如 `{ read -r line; printable; } < file`），这时按路径重新打开
+    会再次读到这部分内容，只能从当前偏移读取剩余的字节。
+    """
+    return _stdin_offset() == 0
+
+
+def parse_widths(text):
+    """解析逗号分隔的列宽列表。"""
+    try:
+        return [int(width) for width in text.split(',')]
+    except ValueError as error:
+        import argparse
+
+        raise argparse.ArgumentTypeError(f'无效的列宽列表: {text}') from error
+
+
+# 批量输出时每块累积的字符数，整块只编码、写入一次
+OUTPUT_CHUNK_SIZE = 1 << 18
+
+
+def write_lines(lines, output, encoding='utf-8', errors='strict', chunk_size=OUTPUT_CHUNK_SIZE):
+    """把各行拼成大块写入二进制流 output，每块只编码、写入一次，返回写入的字节数。
+
+    chunk_size 为每块累积的字符数；不大于 0 时逐行写入并立即 flush（供 --follow 实时输出）。
+    lines 在中途抛出异常时，已生成的行仍会先写出，与逐行输出时看到的内容一致。
+    """
+    chunk = []
+    chunk_length = 0
+    written = 0
+
+    def write_chunk():
+        nonlocal chunk_length, written
+        chunk.append('')
+        data = '\n'.join(chunk).encode(encoding, errors)
+        # 先清空再写入：写入失败（如 BrokenPipeError）时不会在 finally 中重复写出
+        chunk.clear()
+        chunk_length = 0
+        output.write(data)
+        written += len(data)
+
+    try:
+        for line in lines:
+            chunk.append(line)
+            chunk_length += len(line) + 1
+            if chunk_length >= chunk_size:
+                write_chunk()
+                if chunk_size <= 0:
+                    output.flush()
+    finally:
+        if chunk:
+            write_chunk()
+    output.flush()
+    return written
+
+
+def write_to_stdout(lines, follow=False, profile=None):
+    """批量写出到标准输出；标准输出没有底层二进制缓冲（如被替换为 StringIO）时逐行 print。
+
+    传入 profile 时写出耗时与字节数记入 write 阶段（逐行 print 时不统计字节数）。
+    """
+    buffer = getattr(sys.stdout, 'buffer', None)
+    with _stage(profile, 'write'):
+        if buffer is None:
+            for line in lines:
+                print(line, flush=follow)
+            return
+        # 先写出文本层中已缓冲的内容，保证与之前 print 的输出顺序一致
+        sys.stdout.flush()
+        chunk_size = 0 if follow else OUTPUT_CHUNK_SIZE
+        written = write_lines(lines, buffer, sys.stdout.encoding, sys.stdout.errors, chunk_size)
+    if profile is not None:
+        profile.count('write', bytes_out=written)
+
+
+def write_to_pager(lines, line_numbers, keep_ansi=False, profile=None):
+    """使用 less 分页查看输出；keep_ansi=True 时让 less 原样输出颜色序列。
+
+    传入 profile 时只统计写入分页器的耗时与字节数，不含在 less 中阅读的时间。
+    """
+    import subprocess
+
+    command = ['less', '-S'] + (['-N'] if line_numbers else []) + (['-R'] if keep_ansi else [])
     with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
         try:
             if process.stdin is None:
                 raise RuntimeError('无法创建分页器输入流')
-            for line in lines:
-                process.stdin.write(f'{line}\n'.encode('utf-8'))
+            with _stage(profile, 'write'):
+                written = write_lines(lines, process.stdin)
+            if profile is not None:
+                profile.count('write', bytes_out=written)
             process.stdin.close()
         except BrokenPipeError:
             return
         process.wait()
 
 
+def _input_size(path, content=None):
+    """返回输入的字节数；content 为已读入的标准输入，管道等无法取得大小的输入返回 0。"""
+    if content is not None:
+        return len(content)
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def _profile_records(profile, data):
+    """把逐条读取记录的耗时计入 read 阶段；已读成列表等非迭代器的数据只计入行数。
+
+    rows 只计数据行：二维数据（如 CSV）的首项是表头，不计入；字典记录没有表头行。
+    """
+    if profile is None:
+        return data
+    if isinstance(data, Iterator):
+        return _iter_profiled_records(profile, data)
+    if isinstance(data, list):
+        profile.count('read', rows=len(data) - bool(data and not isinstance(data[0], Mapping)))
+    return data
+
+
+def _iter_profiled_records(profile, data):
+    """逐条读取并计时；首项不是字典时它是表头，从 read 阶段的 rows 中扣除。"""
+    records = profile.iterate('read', data)
+    for first in records:
+        if not isinstance(first, Mapping):
+            profile.count('read', rows=-1)
+        yield first
+        break
+    yield from records
+
+
+def _read_profiled(profile, read, path, content=None):
+    """--stream 每一遍读取时调用：统计字节数，逐条读取的耗时计入 read 阶段；content 为已读入的标准输入。"""
+    profile.count('read', bytes_in=_input_size(path, content))
+    with profile.stage('read'):
+        data = read()
+    return _profile_records(profile, data)
+
+
+def _write_profile(profile, destination):
+    """把统计以一行 JSON 写到 destination；'-' 表示标准错误。"""
+    if destination == '-':
+        print(profile.to_json(), file=sys.stderr)
+        return
+    with open(destination, 'w', encoding='utf-8') as file:
+        file.write(profile.to_json() + '\n')
+
+
+# main 中需要参数值的选项，须与其中的 parser 定义保持一致；在导入 argparse 之前据此识别独立的 --via-socket
+CLI_VALUE_OPTIONS = frozenset(
+    (
+        '-f --file --sep-col --sep-row --grid -e --engine -t --type -c --bar-char -w --bar-width -s --bar-scale '
+        '-l --limit --sample --widths --overflow --repeat-header -j --jobs'
+    ).split()
+)
+
+
+def _takes_value(argument):
+    """命令行参数 argument 是否为需要在下一个参数中给出值的选项，按 argparse 的规则识别长选项缩写与合写的短选项。"""
+    if argument.startswith('--'):
+        if '=' in argument:
+            return False
+        matches = [option for option in CLI_VALUE_OPTIONS if option.startswith(argument)]
+        return argument in CLI_VALUE_OPTIONS or len(matches) == 1
+    # 合写的短选项（如 -Nf PATH）：第一个需要值的字母之后没有内容时，值在下一个参数中
+    for position, letter in enumerate(argument[1:], 1):
+        if f'-{letter}' in CLI_VALUE_OPTIONS:
+            return position == len(argument) - 1
+    return False
+
+
+def _split_via_socket(arguments):
+    """找出作为独立选项出现的 --via-socket，返回（是否出现, 去掉它之后的参数列表）。
+
+    选项的参数值（如 --sep-col --via-socket 中的分隔符）与 -- 之后的位置参数不算。
+    """
+    found = False
+    remaining = []
+    expects_value = False
+    for index, argument in enumerate(arguments):
+        if expects_value:
+            expects_value = False
+        elif argument == '--':
+            remaining.extend(arguments[index:])
+            break
+        elif argument == '--via-socket':
+            found = True
+            continue
+        elif argument.startswith('-'):
+            expects_value = _takes_value(argument)
+        remaining.append(argument)
+    return found, remaining
+
+
 def main():
-    """解析命令行参数并输出表格。"""
+    """解析命令行参数并输出表格；printable serve 运行常驻渲染服务，--via-socket 把本次调用转交给该服务。"""
+    arguments = sys.argv[1:]
+    if arguments[:1] == ['serve']:
+        from .server import serve_main
+
+        serve_main(arguments[1:])
+        return
+    # 在导入 argparse 之前转交，客户端只付出解释器启动与连接套接字的开销；分页查看是交互式的，留在本进程
+    via_socket, forwarded = _split_via_socket(arguments)
+    if via_socket and forwarded[:1] == ['serve']:
+        print('错误: serve 不能通过 --via-socket 转交', file=sys.stderr)
+        sys.exit(2)
+    if via_socket and '--less' not in forwarded:
+        from .server import forward
+
+        code = forward(forwarded)
+        if code is not None:
+            sys.exit(code)
+
+    import argparse
+
     parser = argparse.ArgumentParser(description='可打印的表格生成器')
     parser.add_argument('-f', '--file', default='/dev/stdin', help='输入文件路径')
     parser.add_argument('--sep-col', default=None, help='列分隔符')
@@ -528,31 +2186,148 @@ def main():
         '--engine',
         choices=['python', 'column', 'auto'],
         default=os.getenv('PRINTABLE_ENGINE', 'auto'),
-        help='渲染引擎，默认 auto；无网格时优先使用 column',
+        help='渲染引擎，默认 auto：column 可用时按代价模型选择较快的引擎',
     )
     parser.add_argument('-N', '--line-numbers', action='store_false', default=True, help='显示行号')
-    parser.add_argument('-t', '--type', default=None, choices=['json', 'csv', 'yaml'], help='文件格式，默认自动检测')
+    parser.add_argument(
+        '-t', '--type', default=None, choices=['json', 'jsonl', 'csv', 'yaml'], help='文件格式，默认自动检测'
+    )
     parser.add_argument('-b', '--bar', nargs='*', help='数值字段转换为条形图')
     parser.add_argument('-c', '--bar-char', default='o', help='条形图字符')
     parser.add_argument('-w', '--bar-width', default=100, type=int, help='条形图宽度')
     parser.add_argument('-s', '--bar-scale', default='linal', choices=sorted(VALID_BAR_SCALES), help='轴缩放')
     parser.add_argument('-l', '--limit', type=int, help='记录数限制')
+    parser.add_argument('--stream', action='store_true', help='两遍流式渲染大文件，内存与行数无关（需要 -f 文件）')
+    parser.add_argument('--follow', action='store_true', help='固定列宽逐条输出，适合 tail -f 等无界输入')
+    parser.add_argument('--sample', type=int, default=None, help='--follow 时用于测量列宽的记录数，默认 100')
+    parser.add_argument('--widths', type=parse_widths, default=None, help='--follow 时的显式列宽，逗号分隔')
+    parser.add_argument('--overflow', default='truncate', choices=sorted(VALID_OVERFLOWS), help='超宽单元格处理方式')
+    parser.add_argument('--repeat-header', type=int, default=None, help='--follow 时每隔多少条记录重复表头')
+    parser.add_argument('--keep-ansi', action='store_true', help='保留单元格中的 ANSI 颜色序列，列宽按可见字符计算')
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        help='用多个进程分块解析 -f 指定的大 CSV/JSON Lines 文件并分块格式化数据行，0 表示全部 CPU',
+    )
+
+    parser.add_argument(
+        '--profile',
+        dest='profile_output',
+        nargs='?',
+        const='-',
+        default=None,
+        metavar='PATH',
+        help='按阶段统计耗时、行数、字节数与宽度后端，以一行 JSON 写到 PATH，省略 PATH 时写到标准错误',
+    )
+    parser.add_argument(
+        '--profile-memory', action='store_true', help='--profile 同时用 tracemalloc 记录各阶段的内存峰值（较慢）'
+    )
+    parser.add_argument(
+        '--calibrate',
+        action='store_true',
+        help='在本机测量两种引擎并保存 auto 引擎的代价模型系数（路径取 PRINTABLE_CALIBRATION）',
+    )
+    parser.add_argument(
+        '--via-socket',
+        action='store_true',
+        help='交给 printable serve 启动的常驻服务渲染（套接字取 PRINTABLE_SOCKET），服务未运行时在本进程渲染',
+    )
 
     args = parser.parse_args()
+    if args.limit is not None and args.limit < 0:
+        parser.error('--limit 不能小于 0')
+    if args.jobs < 0:
+        parser.error('--jobs 不能小于 0')
+    args.jobs = args.jobs or os.cpu_count() or 1
     if args.grid == 'markdown':
         args.less = False
+    # render_with_engine 从 args.profile 取统计对象
+    args.profile = None
+    if args.profile_output is not None or args.profile_memory:
+        from .profiling import RenderProfile
+
+        args.profile = RenderProfile(trace_memory=args.profile_memory)
+    profile = args.profile
 
     try:
-        readers = {'json': read_json, 'csv': read_csv, 'yaml': read_yaml}
-        stdin_content = sys.stdin.buffer.read() if args.file == '/dev/stdin' else None
-        file_type = args.type or detect_file_format(args.file, stdin_content)
-        data = readers[file_type](args.file, stdin_content)
-        lines = render_with_engine(data, args)
+        if args.calibrate:
+            from .calibration import COST_FEATURES, calibrate, calibration_path
+
+            for engine, coefficients in calibrate().items():
+                terms = ' '.join(f'{name}={value:.3f}' for name, value in zip(COST_FEATURES, coefficients))
+                print(f'{engine:<7} {terms} (µs)')
+            print(f'已写入 {calibration_path()}')
+            return
+        readers = {'json': read_json, 'jsonl': read_jsonl, 'csv': read_csv, 'yaml': read_yaml}
+        lines = None
+        if args.jobs != 1 and args.follow:
+            raise ValueError('--jobs 不能与 --follow 同时使用')
+        if args.follow:
+            if args.stream:
+                raise ValueError('--follow 不能与 --stream 同时使用')
+            data = _profile_records(profile, open_follow_records(args.file, args.type))
+        elif args.stream:
+            stdin_content = None
+            if args.file == '/dev/stdin' and not stdin_is_regular_file():
+                if _stdin_offset() is None:
+                    raise ValueError('--stream 需要可重复读取的文件，不能读取管道输入')
+                # 开头已被调用方读走的普通文件：读入剩余的字节，两遍都从内存读取
+                stdin_content = sys.stdin.buffer.read()
+            file_type = args.type or detect_file_format(args.file, stdin_content)
+            # 流式渲染会读取两遍：CSV 与 JSON Lines 逐条解析，JSON/YAML 每遍重新解析整个文档
+            stream_readers = {**readers, 'csv': iter_csv}
+            data = functools.partial(stream_readers[file_type], args.file, stdin_content)
+            if profile is not None:
+                data = functools.partial(_read_profiled, profile, data, args.file, stdin_content)
+        elif args.jobs != 1 and args.file != '/dev/stdin' and args.limit is None:
+            from .parallel import render_file_parallel
+
+            # 分块解析与归并在调用时完成，返回的迭代器只负责格式化
+            with _stage(profile, 'parallel_read'):
+                lines = render_file_parallel(
+                    args.file,
+                    args.type,
+                    args.jobs,
+                    args.engine,
+                    grid=args.grid,
+                    col_sep=args.sep_col,
+                    row_sep=args.sep_row,
+                    bars=args.bar,
+                    bar_char=args.bar_char,
+                    bar_width=args.bar_width,
+                    bar_scale=args.bar_scale,
+                    keep_ansi=args.keep_ansi,
+                )
+            if profile is not None:
+                profile.count('parallel_read', bytes_in=_input_size(args.file))
+                lines = _profile_lines(profile, lines)
+        else:
+            # 重定向自普通文件且位于开头的标准输入按路径读取，与 -f 一样走 mmap；其余情况从当前偏移读取
+            stdin_content = None
+            with _stage(profile, 'read'):
+                if args.file == '/dev/stdin' and not stdin_is_regular_file():
+                    stdin_content = sys.stdin.buffer.read()
+                file_type = args.type or detect_file_format(args.file, stdin_content)
+                # 多读一项：二维数据的首项是表头，limit=0 时字典记录也要靠首条推断表头
+                read_limit = None if args.limit is None else args.limit + 1
+                data = readers[file_type](args.file, stdin_content, read_limit)
+            if profile is not None:
+                profile.count('read', bytes_in=_input_size(args.file, stdin_content))
+                data = _profile_records(profile, data)
+        if lines is None:
+            lines = render_with_engine(data, args)
         if args.less:
-            write_to_pager(lines, args.line_numbers)
+            write_to_pager(lines, args.line_numbers, args.keep_ansi, profile)
         else:
-            for line in lines:
-                print(line)
+            write_to_stdout(lines, args.follow, profile)
+        if profile is not None:
+            _write_profile(profile, args.profile_output or '-')
+    except BrokenPipeError:
+        # 下游（如 head）提前关闭了管道：把标准输出指向 /dev/null，避免退出时 flush 再次报错
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
     except Exception as error:
         if DEBUG:
             raise
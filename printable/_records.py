@@ -0,0 +1,184 @@
+"""记录解析与按列预处理的内部函数，由串行读取、渲染路径与 parallel 的子进程共用。
+
+本模块在导入时只依赖标准库；用到 printable 的公开函数（normalize_cell_value、record_value、scale_bar_value）时
+在函数内导入，每次调用只导入一次，因此 printable 可以在模块顶部导入本模块。
+"""
+
+import array
+import functools
+import math
+import os
+from collections.abc import Iterable, Mapping
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+
+def _bom_offset(buffer):
+    """返回 UTF-8 BOM 之后的起始偏移。"""
+    return len(UTF8_BOM) if buffer[: len(UTF8_BOM)] == UTF8_BOM else 0
+
+
+def _csv_options():
+    """读取 CSV_DELIMITER、CSV_QUOTE 与 CSV_ENCODING 环境变量，返回（分隔符, 引号字符, 编码）。"""
+    delimiter = os.getenv('CSV_DELIMITER', ',')
+    quotechar = os.getenv('CSV_QUOTE', '"')
+    if len(delimiter) != 1 or len(quotechar) != 1:
+        raise ValueError('CSV_DELIMITER 和 CSV_QUOTE 必须是单个字符')
+    return delimiter, quotechar, os.getenv('CSV_ENCODING', 'utf-8-sig')
+
+
+def _iter_csv_rows(reader, column_count, line_base=0):
+    """校验并产出 csv.reader 的数据行；line_base 为 reader 起点之前的行数，用于报告文件中的行号。"""
+    for row in reader:
+        if len(row) > column_count:
+            raise ValueError(f'CSV 第 {line_base + reader.line_num} 行的列数超过表头')
+        # 与 csv.DictReader 一致，跳过空行
+        if row:
+            yield row
+
+
+def _parse_json_line(line, line_number):
+    """解析 JSON Lines 中的一行，错误信息带上行号。"""
+    import json
+
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as error:
+        raise ValueError(f'JSON Lines 第 {line_number} 行解析失败: {error.msg}') from error
+
+
+def _iter_json_lines(lines):
+    """逐行解析 JSON Lines 流（每行一个 JSON 值），跳过空行。"""
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield _parse_json_line(line, line_number)
+
+
+def _iter_json_lines_buffer(buffer, line_base=0):
+    """在字节缓冲区（bytes 或 mmap）上按换行切分并逐行解析，只复制当前行；line_base 为缓冲区之前的行数。"""
+    start = _bom_offset(buffer)
+    buffer_size = len(buffer)
+    line_number = line_base
+    while start < buffer_size:
+        end = buffer.find(b'\n', start)
+        if end < 0:
+            end = buffer_size
+        line_number += 1
+        line = buffer[start:end]
+        start = end + 1
+        if line.strip():
+            yield _parse_json_line(line, line_number)
+
+
+def _iter_mapping_records(records, start=1):
+    """校验字典记录并规范化键名，逐条产出；start 为首条记录的序号，用于报告出错记录在整个输入中的位置。"""
+    from . import normalize_cell_value
+
+    for record_index, record in enumerate(records, start=start):
+        if not isinstance(record, Mapping):
+            raise TypeError('字典表格中的每条记录都必须是字典')
+        if None in record:
+            raise ValueError(f'第 {record_index} 条记录包含超出表头的字段')
+        yield {normalize_cell_value(key): value for key, value in record.items()}
+
+
+def _iter_sequence_records(records, column_count):
+    """校验序列记录的类型与列数，逐条产出。"""
+    for record_index, record in enumerate(records, start=1):
+        if isinstance(record, (str, bytes)) or not isinstance(record, Iterable):
+            raise TypeError(f'第 {record_index} 条记录必须是序列')
+        if len(record) > column_count:
+            raise ValueError(f'第 {record_index} 条记录的列数超过表头')
+        yield record
+
+
+def _record_columns(records, headers):
+    """按列取出记录中的值；序列记录由 zip 在 C 中整体转置，短行先补齐空串。"""
+    if not records or isinstance(records[0], Mapping):
+        from . import record_value
+
+        return [[record_value(record, header, index) for record in records] for index, header in enumerate(headers)]
+    column_count = len(headers)
+    if set(map(len, records)) != {column_count}:
+        records = [list(record) + [''] * (column_count - len(record)) for record in records]
+    return list(zip(*records))
+
+
+class _BarTable(dict):
+    """按长度索引的条形文本表：首次取用某个长度时生成 prefix + bar_char * 长度并缓存，只保存实际绘制过的长度。"""
+
+    __slots__ = ('bar_char', 'prefix')
+
+    def __init__(self, bar_char, prefix):
+        super().__init__()
+        self.bar_char = bar_char
+        self.prefix = prefix
+
+    def __missing__(self, length):
+        bar = self[length] = self.prefix + self.bar_char * length
+        return bar
+
+
+@functools.lru_cache(maxsize=16)
+def _bar_strings(bar_char):
+    """返回（正值表, 负值表）；表按长度取条形文本，不预先生成 0..bar_width 的全部长度。"""
+    return _BarTable(bar_char, ''), _BarTable(bar_char, '-')
+
+
+def _parse_bar_values(values, keep_ansi=False):
+    """解析条形图列，返回（清理后的文本列表, 参与最大值计算的数值, 待绘制条形的数值）。
+
+    float/int 以及不含控制字符的字符串，其原值与清理后文本解析出的数值相同，一次 float() 即可两处共用；
+    两组数值存入 array('d')，无法参与最大值计算的记为 NaN，不绘制条形的记为 0。
+    """
+    from . import normalize_cell_value
+
+    texts = []
+    scale_numbers = array.array('d')
+    bar_numbers = array.array('d')
+    for value in values:
+        value_type = type(value)
+        if value_type is float or value_type is int:
+            text = str(value)
+            scale_number = bar_number = float(value)
+        else:
+            text = normalize_cell_value(value, keep_ansi)
+            try:
+                bar_number = float(text)
+            except ValueError:
+                bar_number = 0.0
+            if value_type is str and text == value:
+                scale_number = bar_number if text else math.nan
+            else:
+                try:
+                    scale_number = float(value)
+                except (TypeError, ValueError):
+                    scale_number = math.nan
+        texts.append(text)
+        scale_numbers.append(scale_number)
+        bar_numbers.append(bar_number)
+    return texts, scale_numbers, bar_numbers
+
+
+def _bar_maximum(scale_numbers, bar_scale):
+    """返回一列数值的最大缩放值；缩放函数随绝对值单调不减，即绝对值最大者的缩放值。"""
+    from . import scale_bar_value
+
+    return scale_bar_value(max(map(abs, filter(math.isfinite, scale_numbers)), default=0.0), bar_scale)
+
+
+def _draw_bars(texts, bar_numbers, maximum, bar_char, bar_width, bar_scale):
+    """按列最大缩放值把 texts 中对应的数值原地替换为条形文本，条形文本直接查表。"""
+    if maximum <= 0:
+        return
+    positive, negative = _bar_strings(bar_char)
+    if bar_scale in ('linear', 'linal'):
+        magnitudes = map(abs, bar_numbers)
+    elif bar_scale == 'ln':
+        magnitudes = map(math.log1p, map(abs, bar_numbers))
+    else:
+        magnitudes = (math.log10(1 + value) for value in map(abs, bar_numbers))
+    for index, (number, magnitude) in enumerate(zip(bar_numbers, magnitudes)):
+        if number and math.isfinite(number):
+            bar_length = min(bar_width, max(1, int(magnitude / maximum * bar_width)))
+            texts[index] = negative[bar_length] if number < 0 else positive[bar_length]
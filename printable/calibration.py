@@ -0,0 +1,156 @@
+"""engine=auto 的代价模型与校准。
+
+两个引擎的渲染耗时都按线性模型估计：固定开销 + 每行开销 × 行数 + 每单元格开销 × 单元格数
++ 每个非 ASCII 单元格的额外开销 × 非 ASCII 单元格数，系数以微秒为单位。
+两个引擎的固定开销（column 要准备布局、编码单元格并经 ctypes 调用）与每行、每单元格开销之比随机器、
+Python 版本与是否编译了 _widths 扩展而变化，因此系数按机器校准，而不是写死一条按表格大小划分的规则。
+printable --calibrate 在本机用两种引擎渲染一组不同形状的表格，按相对误差做加权最小二乘拟合，
+并把系数写入 calibration_path()；没有校准文件时使用内置的默认系数。
+"""
+
+import functools
+import json
+import os
+import time
+
+from . import _engine_args, render_with_engine, width_cache_clear
+
+COST_FEATURES = ('fixed', 'rows', 'cells', 'non_ascii_cells')
+# 内置默认系数（微秒），在一台 x86_64 Linux 机器上由 calibrate() 测得
+DEFAULT_ENGINE_COSTS = {
+    'python': (34.0, 2.5, 2.2, 0.0),
+    'column': (30.0, 0.7, 1.7, 0.0),
+}
+# 校准所用表格的行数、列数与字符组成
+CALIBRATION_ROWS = (1, 16, 256, 2048)
+CALIBRATION_COLUMNS = (2, 12)
+CALIBRATION_TEXTS = {False: 'item-{index}', True: '第{index}项'}
+
+
+def calibration_path():
+    """返回校准文件路径：PRINTABLE_CALIBRATION，否则为 $XDG_CONFIG_HOME（默认 ~/.config）/printable/engine-costs.json。"""
+    path = os.getenv('PRINTABLE_CALIBRATION')
+    if path:
+        return path
+    config_directory = os.getenv('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(config_directory, 'printable', 'engine-costs.json')
+
+
+def _parse_costs(content):
+    """校验并返回校准文件中的系数；格式不符时抛出 ValueError。"""
+    if content.get('features') != list(COST_FEATURES):
+        raise ValueError('校准文件的特征与当前版本不一致')
+    costs = {}
+    for engine in DEFAULT_ENGINE_COSTS:
+        coefficients = content.get(engine)
+        if not isinstance(coefficients, list) or len(coefficients) != len(COST_FEATURES):
+            raise ValueError(f'校准文件缺少 {engine} 的系数')
+        costs[engine] = tuple(float(coefficient) for coefficient in coefficients)
+    return costs
+
+
+@functools.cache
+def load_engine_costs():
+    """返回（{引擎: 系数}, 系数来源）；校准文件不存在或无法解析时使用内置默认系数。"""
+    path = calibration_path()
+    try:
+        with open(path, encoding='utf-8') as file:
+            return _parse_costs(json.load(file)), path
+    except FileNotFoundError:
+        return DEFAULT_ENGINE_COSTS, '内置默认系数'
+    except (OSError, ValueError, TypeError) as error:
+        return DEFAULT_ENGINE_COSTS, f'内置默认系数（{path} 无效: {error}）'
+
+
+def estimate_cost(coefficients, rows, cells, non_ascii_cells):
+    """按线性模型估计渲染耗时（微秒）。"""
+    fixed, per_row, per_cell, per_non_ascii_cell = coefficients
+    return fixed + per_row * rows + per_cell * cells + per_non_ascii_cell * non_ascii_cells
+
+
+def _calibration_table(row_count, column_count, non_ascii):
+    """生成一张二维表格；每个单元格的文本都不同，宽度缓存不会命中。"""
+    template = CALIBRATION_TEXTS[non_ascii]
+    headers = [f'column{column}' for column in range(column_count)]
+    rows = [
+        [template.format(index=row * column_count + column) for column in range(column_count)]
+        for row in range(row_count)
+    ]
+    return [headers, *rows]
+
+
+def _render_seconds(table, engine, repeat):
+    """返回用 engine 渲染 table 的最短耗时（秒）；每次渲染前清空宽度缓存，与一次命令行调用的情形一致。"""
+    args = _engine_args(engine, {})
+    best = float('inf')
+    for _ in range(repeat):
+        width_cache_clear()
+        started = time.perf_counter()
+        for _ in render_with_engine(table, args):
+            pass
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _solve(matrix, vector):
+    """高斯消元（列主元）求解线性方程组；奇异时把对应未知数置 0。"""
+    size = len(vector)
+    rows = [list(matrix[index]) + [vector[index]] for index in range(size)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda index: abs(rows[index][column]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        if abs(rows[column][column]) < 1e-300:
+            continue
+        for index in range(size):
+            if index != column:
+                factor = rows[index][column] / rows[column][column]
+                rows[index] = [value - factor * pivot_value for value, pivot_value in zip(rows[index], rows[column])]
+    return [row[size] / row[index] if abs(row[index]) >= 1e-300 else 0.0 for index, row in enumerate(rows)]
+
+
+def fit_costs(samples):
+    """用 [(特征, 耗时微秒)] 拟合线性模型，按相对误差加权（权重 1/耗时²），负系数截为 0。"""
+    size = len(COST_FEATURES)
+    matrix = [[0.0] * size for _ in range(size)]
+    vector = [0.0] * size
+    for features, cost in samples:
+        weight = 1.0 / (cost * cost)
+        for row in range(size):
+            vector[row] += weight * features[row] * cost
+            for column in range(size):
+                matrix[row][column] += weight * features[row] * features[column]
+    return tuple(max(0.0, coefficient) for coefficient in _solve(matrix, vector))
+
+
+def calibrate(path=None, repeat=3):
+    """在本机测量两种引擎渲染各形状表格的耗时，拟合系数并写入 path（默认 calibration_path()），返回 {引擎: 系数}。
+
+    column 动态库不可用时抛出 ValueError。
+    """
+    from . import column_available
+
+    if not column_available():
+        raise ValueError('column 动态库不可用，无法校准 auto 引擎')
+    samples = {engine: [] for engine in DEFAULT_ENGINE_COSTS}
+    for row_count in CALIBRATION_ROWS:
+        for column_count in CALIBRATION_COLUMNS:
+            for non_ascii in CALIBRATION_TEXTS:
+                table = _calibration_table(row_count, column_count, non_ascii)
+                # 表头行也参与排版，与 _table_shape 的计数方式一致
+                cells = (row_count + 1) * column_count
+                features = (1.0, row_count + 1, cells, cells - column_count if non_ascii else 0)
+                for engine, engine_samples in samples.items():
+                    engine_samples.append((features, _render_seconds(table, engine, repeat) * 1e6))
+    costs = {engine: fit_costs(engine_samples) for engine, engine_samples in samples.items()}
+
+    path = path or calibration_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    content = {'features': list(COST_FEATURES)}
+    content.update((engine, list(coefficients)) for engine, coefficients in costs.items())
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(content, file, indent=2)
+        file.write('\n')
+    load_engine_costs.cache_clear()
+    return costs
@@ -3,6 +3,11 @@ from collections.abc import Mapping, Sequence
 from typing import TypeAlias
 
 from .native.column import ColumnExecutionError as ColumnExecutionError
+from .native.column import TableLayout as TableLayout
+from .native.column import column_maximums_of as column_maximums_of
+from .native.column import column_widths_of as column_widths_of
+from .native.column import format_cells as format_cells
+from .native.column import is_available as is_available
 from .native.column import render as render_native_column
 from .native.column import widths_of as widths_of
 
@@ -1 +1,85 @@
-"""column 原生 Python 接口。"""
+"""column 原生 Python 接口。
+
+查找动态库只依赖 os 与 sys，放在包入口中：调用方可以先确认动态库存在，再决定是否加载 ctypes 封装。
+_widths 扩展不经 ctypes，同样从这里加载。
+"""
+
+import array
+import functools
+import os
+import sys
+
+# 与 size_t 等宽的 array 类型码：native 代码直接把宽度写入 array 的缓冲区
+WIDTH_TYPECODE = 'Q' if sys.maxsize > 2**32 else 'I'
+# native 代码无法逐字符确定宽度（含 ZWJ、VS16、emoji 肤色修饰符或 wcwidth 返回负数的字符）时写入的值，即 (size_t)-1
+WIDTH_DEFERRED = (1 << (8 * array.array(WIDTH_TYPECODE).itemsize)) - 1
+
+
+def target_name() -> str:
+    """返回当前 Python 进程对应的 native 构建目录名。"""
+    if sys.platform == 'darwin':
+        platform_name = 'macos'
+    elif sys.platform.startswith('linux'):
+        platform_name = 'linux'
+    else:
+        raise RuntimeError('column native wrapper 仅支持 macOS 和 Linux')
+
+    # 与 platform.machine() 相同，但不必为此导入 platform
+    architecture = os.uname().machine.lower()
+    architecture = {'amd64': 'x86_64', 'aarch64': 'aarch64'}.get(architecture, architecture)
+    return f'{platform_name}-{architecture}'
+
+
+def library_paths() -> tuple[str, ...]:
+    """按优先级返回 column 动态库的候选路径；设置 COLUMN_LIBRARY 时只查找该路径。"""
+    library_override = os.getenv('COLUMN_LIBRARY')
+    if library_override:
+        return (library_override,)
+    library_suffix = '.dylib' if sys.platform == 'darwin' else '.so'
+    library_name = f'libcolumn{library_suffix}'
+    native_directory = os.path.dirname(os.path.realpath(__file__))
+    package_library = os.path.join(native_directory, 'lib', target_name(), library_name)
+    development_library = os.path.join(
+        os.path.dirname(os.path.dirname(native_directory)), 'build', 'native', target_name(), library_name
+    )
+    return (package_library, development_library)
+
+
+def find_library() -> str | None:
+    """返回第一个存在的 column 动态库路径，都不存在时返回 None。"""
+    return next((path for path in library_paths() if os.path.isfile(path)), None)
+
+
+def new_width_array(length: int) -> array.array:
+    """分配 length 个元素、全部为 0 的宽度数组。"""
+    return array.array(WIDTH_TYPECODE, [0]) * length
+
+
+@functools.cache
+def widths_extension():
+    """返回 _widths 扩展模块；未编译或不是为当前解释器编译时返回 None。"""
+    try:
+        from .lib import _widths
+    except ImportError:
+        return None
+    return _widths
+
+
+def extension_widths_of(cells) -> array.array | None:
+    """用 _widths 扩展直接读取各个 str 的内部缓冲区测量显示宽度；扩展不可用时返回 None。"""
+    extension = widths_extension()
+    if extension is None:
+        return None
+    widths = new_width_array(len(cells))
+    extension.measure(cells, widths)
+    return widths
+
+
+def extension_column_maximums(widths: array.array, column_count: int) -> array.array | None:
+    """用 _widths 扩展把按行展开的宽度数组按列求最大值；扩展不可用时返回 None。"""
+    extension = widths_extension()
+    if extension is None:
+        return None
+    maximums = new_width_array(column_count)
+    extension.reduce(widths, maximums)
+    return maximums
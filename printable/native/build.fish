@@ -15,6 +15,8 @@ set -l script_directory (dirname (status filename))
 set -l project_root (cd "$script_directory/../.."; and pwd)
 set -l native_directory "$project_root/printable/native"
 set -l util_linux_directory "$project_root/util-linux"
+# 没有 gitlink 时检出的 util-linux 发布标签
+set -l util_linux_version v2.40.2
 
 if not contains -- $target macos linux
     fail "不支持目标平台 '$target'，仅支持 macos 和 linux"
@@ -56,7 +58,10 @@ if test "$target" = macos
         -Wl,-install_name,@rpath/libcolumn.dylib \
         -Wl,-exported_symbol,_column_render \
         -Wl,-exported_symbol,_column_result_free \
-        -Wl,-exported_symbol,_column_widths
+        -Wl,-exported_symbol,_column_widths \
+        -Wl,-exported_symbol,_column_widths_max \
+        -Wl,-exported_symbol,_column_widths_reduce \
+        -Wl,-exported_symbol,_column_format
     set library_suffix dylib
     set system_libraries -lncurses -lm
 
@@ -83,8 +88,15 @@ if not command -q flex
 end
 set -l bison_command (command -v bison)
 
-git -C "$project_root" submodule update --init --depth=1 util-linux
-or fail '无法初始化 util-linux submodule'
+# 仓库记录了 util-linux 的 gitlink 时按其固定的提交检出；否则克隆 util_linux_version 标签，版本同样固定
+if string match -q '160000 *' -- (git -C "$project_root" ls-files --stage -- util-linux)
+    git -C "$project_root" submodule update --init --depth=1 util-linux
+    or fail '无法初始化 util-linux submodule'
+else if not test -e "$util_linux_directory/text-utils/column.c"
+    set -l util_linux_url (git -C "$project_root" config --file .gitmodules submodule.util-linux.url)
+    git clone --depth=1 --branch $util_linux_version "$util_linux_url" "$util_linux_directory"
+    or fail "无法克隆 util-linux $util_linux_version"
+end
 
 if not test -x "$util_linux_directory/configure"
     begin
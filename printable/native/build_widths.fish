@@ -0,0 +1,34 @@
+#!/usr/bin/env fish
+
+# 用当前 Python 的头文件把 widths_module.c 编译为 _widths 扩展，输出到 printable/native/lib/，
+# 文件名带解释器的 EXT_SUFFIX，只会被同一 ABI 的解释器导入。用法: printable/native/build_widths.fish [python]
+
+function fail
+    echo "错误: $argv" >&2
+    exit 1
+end
+
+set -l python $argv[1]
+if test -z "$python"
+    set python (command -v python3)
+end
+test -n "$python"; or fail '找不到 python3'
+
+set -l script_directory (dirname (status filename))
+set -l native_directory (cd "$script_directory"; and pwd)
+set -l include_directory ($python -c 'import sysconfig; print(sysconfig.get_paths()["include"])')
+or fail '无法读取 Python 头文件目录'
+set -l extension_suffix ($python -c 'import sysconfig; print(sysconfig.get_config_var("EXT_SUFFIX"))')
+or fail '无法读取扩展模块后缀'
+
+set -l compiler_flags -O2 -g0 -fPIC -fvisibility=hidden -shared -Wall -Wextra
+if test (uname) = Darwin
+    # 扩展中的 Python C API 符号在导入时由解释器提供
+    set compiler_flags $compiler_flags -undefined dynamic_lookup
+end
+
+set -l output "$native_directory/lib/_widths$extension_suffix"
+cc $compiler_flags -I"$include_directory" "$native_directory/widths_module.c" -o "$output"
+or fail '_widths 扩展编译失败'
+
+echo "已生成: $output"
@@ -1,12 +1,22 @@
+import array
 import ctypes
+import functools
 import os
-import platform
-import sys
+import threading
 from collections.abc import Sequence
 from dataclasses import dataclass
-from pathlib import Path
 from typing import TypeAlias
 
+from . import (
+    WIDTH_TYPECODE,
+    extension_column_maximums,
+    extension_widths_of,
+    find_library,
+    library_paths,
+    new_width_array,
+    target_name,
+    widths_extension,
+)
 
 ColumnOptionItem: TypeAlias = 'ColumnOption | tuple[str, str | None]'
 ColumnInput: TypeAlias = str | bytes
@@ -37,6 +47,24 @@ class ColumnOptions:
     input_files: Sequence[str] = ()
 
 
+@dataclass(frozen=True)
+class TableLayout:
+    """描述 format_cells 的网格布局，字段与 GRID_LAYOUTS 对应；默认值为无边框布局。
+
+    横线为 (左, 交叉, 右) 三元组，None 表示不画；header_conditional 为真时仅在有数据行时画表头下划线。
+    """
+
+    separator: str = ''
+    row_fill: str = ''
+    edges: tuple[str, str] | None = None
+    top: tuple[str, str, str] | None = None
+    header_line: tuple[str, str, str] | None = None
+    row_line: tuple[str, str, str] | None = None
+    bottom: tuple[str, str, str] | None = None
+    header_conditional: bool = False
+    escape_pipes: bool = False
+
+
 class _ColumnOption(ctypes.Structure):
     _fields_ = [
         ('name', ctypes.c_char_p),
@@ -64,42 +92,47 @@ class _ColumnResult(ctypes.Structure):
     ]
 
 
-def _target_name() -> str:
-    """返回当前 Python 进程对应的 native 构建目录名。"""
-    if sys.platform == 'darwin':
-        platform_name = 'macos'
-    elif sys.platform.startswith('linux'):
-        platform_name = 'linux'
-    else:
-        raise RuntimeError('column native wrapper 仅支持 macOS 和 Linux')
+class _ColumnText(ctypes.Structure):
+    _fields_ = [
+        ('data', ctypes.c_char_p),
+        ('size', ctypes.c_size_t),
+    ]
+
+
+class _ColumnLayoutLine(ctypes.Structure):
+    _fields_ = [
+        ('present', ctypes.c_int),
+        ('left', _ColumnText),
+        ('junction', _ColumnText),
+        ('right', _ColumnText),
+    ]
+
 
-    architecture = platform.machine().lower()
-    architecture = {'amd64': 'x86_64', 'aarch64': 'aarch64'}.get(architecture, architecture)
-    return f'{platform_name}-{architecture}'
+class _ColumnLayout(ctypes.Structure):
+    _fields_ = [
+        ('separator', _ColumnText),
+        ('row_fill', _ColumnText),
+        ('has_edges', ctypes.c_int),
+        ('edge_left', _ColumnText),
+        ('edge_right', _ColumnText),
+        ('top', _ColumnLayoutLine),
+        ('header_line', _ColumnLayoutLine),
+        ('row_line', _ColumnLayoutLine),
+        ('bottom', _ColumnLayoutLine),
+        ('header_conditional', ctypes.c_int),
+        ('escape_pipes', ctypes.c_int),
+    ]
 
 
 def _load_library() -> ctypes.CDLL:
     """加载本地 column 动态库并配置 ctypes 签名。"""
-    library_override = os.getenv('COLUMN_LIBRARY')
-    if library_override:
-        library_paths = (Path(library_override),)
-    else:
-        library_suffix = '.dylib' if sys.platform == 'darwin' else '.so'
-        library_name = f'libcolumn{library_suffix}'
-        target_name = _target_name()
-        package_library = Path(__file__).resolve().parent / 'lib' / target_name / library_name
-        development_library = Path(__file__).resolve().parents[2] / 'build' / 'native' / target_name / library_name
-        library_paths = (package_library, development_library)
-
-    library_path = next((path for path in library_paths if path.is_file()), library_paths[0])
-
-    if not library_path.is_file():
-        target_name = _target_name()
-        target_arguments = target_name.replace('-', ' ')
+    library_path = find_library()
+    if library_path is None:
+        target_arguments = target_name().replace('-', ' ')
         build_command = f'printable/native/build.fish {target_arguments}'
-        raise FileNotFoundError(f'找不到 column 动态库: {library_path}，请先运行 {build_command}')
+        raise FileNotFoundError(f'找不到 column 动态库: {library_paths()[0]}，请先运行 {build_command}')
 
-    library = ctypes.CDLL(str(library_path), use_errno=True)
+    library = ctypes.CDLL(library_path, use_errno=True)
     library.column_render.argtypes = [
         ctypes.c_char_p,
         ctypes.c_size_t,
@@ -116,38 +149,234 @@ def _load_library() -> ctypes.CDLL:
         ctypes.c_size_t,
     ]
     library.column_widths.restype = ctypes.c_size_t
+    library.column_widths_max.argtypes = [
+        ctypes.c_char_p,
+        ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_size_t),
+        ctypes.c_size_t,
+        ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_size_t),
+    ]
+    library.column_widths_max.restype = ctypes.c_size_t
+    library.column_widths_reduce.argtypes = [
+        ctypes.POINTER(ctypes.c_size_t),
+        ctypes.c_size_t,
+        ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_size_t),
+    ]
+    library.column_widths_reduce.restype = None
+    library.column_format.argtypes = [
+        ctypes.POINTER(ctypes.c_char_p),
+        ctypes.POINTER(ctypes.c_size_t),
+        ctypes.POINTER(ctypes.c_size_t),
+        ctypes.c_size_t,
+        ctypes.c_size_t,
+        ctypes.POINTER(_ColumnLayout),
+        ctypes.POINTER(_ColumnResult),
+    ]
+    library.column_format.restype = ctypes.c_int
     return library
 
 
 _CELL_SEPARATOR = '\x1f'
+_OPTION_CACHE_SIZE = 64
+
+_library: ctypes.CDLL | None = None
+_library_error: FileNotFoundError | None = None
+_library_lock = threading.Lock()
 
-_widths_library: ctypes.CDLL | bool | None = None
+
+def _get_library() -> ctypes.CDLL:
+    """返回进程内共享的 column 动态库句柄，首次调用时加载并配置签名。
+
+    加载结果（包括找不到动态库的错误）只计算一次，之后的调用不再查找路径或重复设置 argtypes。
+    """
+    global _library, _library_error
+    if _library is None and _library_error is None:
+        with _library_lock:
+            if _library is None and _library_error is None:
+                try:
+                    _library = _load_library()
+                except FileNotFoundError as error:
+                    _library_error = error
+    if _library is None:
+        raise _library_error
+    return _library
 
 
 def _get_widths_library() -> ctypes.CDLL | None:
     """惰性加载 column 动态库；不可用时返回 None（不报错）。"""
-    global _widths_library
-    if _widths_library is None:
-        try:
-            _widths_library = _load_library()
-        except FileNotFoundError:
-            _widths_library = False
-    return _widths_library if _widths_library else None
+    try:
+        return _get_library()
+    except FileNotFoundError:
+        return None
 
 
-def widths_of(cells: Sequence[str]) -> list[int] | None:
-    """批量计算单元格的终端显示宽度；column 动态库不可用时返回 None。"""
+def is_available() -> bool:
+    """column 动态库是否可用。"""
+    return _get_widths_library() is not None
+
+
+def _width_buffer(length: int) -> tuple[array.array, ctypes.Array]:
+    """分配 length 个 size_t 的宽度数组，返回 array 及共享同一缓冲区的 ctypes 视图。"""
+    widths = new_width_array(length)
+    return widths, (ctypes.c_size_t * length).from_buffer(widths)
+
+
+def widths_of(cells: Sequence[str]) -> array.array | None:
+    """批量计算单元格的终端显示宽度，返回 array('Q')；_widths 扩展与 column 动态库都不可用时返回 None。
+
+    优先交给 _widths 扩展直接读取 str 的内部缓冲区；未编译扩展时把单元格以 \\x1f 拼接、编码后经 ctypes 传给 C，
+    单元格本身含 \\x1f 时个数对不上，返回 None。宽度须按上下文计算的单元格记为 WIDTH_DEFERRED。
+    """
+    widths = extension_widths_of(cells)
+    if widths is not None:
+        return widths
     library = _get_widths_library()
     if library is None:
         return None
     if not cells:
-        return []
+        return new_width_array(0)
+    input_bytes = _CELL_SEPARATOR.join(cells).encode('utf-8', errors='replace')
+    widths, widths_view = _width_buffer(len(cells))
+    cell_count = library.column_widths(input_bytes, len(input_bytes), widths_view, len(cells))
+    if cell_count != len(cells):
+        return None
+    return widths
+
+
+def column_widths_of(cells: Sequence[str], column_count: int) -> tuple[array.array, array.array] | None:
+    """计算按行展开的单元格宽度并在 C 中按列求最大值，返回（各单元格宽度, 各列最大宽度）。
+
+    cells 的长度须为 column_count 的正整数倍；_widths 扩展与 column 动态库都不可用时返回 None。
+    宽度须按上下文计算的单元格记为 WIDTH_DEFERRED，所在列的最大值也随之为 WIDTH_DEFERRED。
+    """
+    if column_count <= 0 or not cells or len(cells) % column_count:
+        raise ValueError('单元格数量必须是列数的正整数倍')
+    extension = widths_extension()
+    if extension is not None:
+        widths = new_width_array(len(cells))
+        maximums = new_width_array(column_count)
+        extension.measure(cells, widths, maximums)
+        return widths, maximums
+    library = _get_widths_library()
+    if library is None:
+        return None
     input_bytes = _CELL_SEPARATOR.join(cells).encode('utf-8', errors='replace')
-    widths_array = (ctypes.c_size_t * len(cells))()
-    cell_count = library.column_widths(input_bytes, len(input_bytes), widths_array, len(cells))
+    widths, widths_view = _width_buffer(len(cells))
+    maximums, maximums_view = _width_buffer(column_count)
+    cell_count = library.column_widths_max(
+        input_bytes, len(input_bytes), widths_view, len(cells), column_count, maximums_view
+    )
     if cell_count != len(cells):
         return None
-    return list(widths_array)
+    return widths, maximums
+
+
+def column_maximums_of(widths: array.array, column_count: int) -> array.array | None:
+    """把按行展开的宽度数组（new_width_array 的类型码）按列求最大值；_widths 扩展与 column 动态库都不可用时返回 None。"""
+    if column_count <= 0 or len(widths) % column_count:
+        raise ValueError('单元格数量必须是列数的正整数倍')
+    maximums = extension_column_maximums(widths, column_count)
+    if maximums is not None:
+        return maximums
+    library = _get_widths_library()
+    if library is None:
+        return None
+    maximums, maximums_view = _width_buffer(column_count)
+    if widths:
+        widths_view = (ctypes.c_size_t * len(widths)).from_buffer(widths)
+        library.column_widths_reduce(widths_view, len(widths), column_count, maximums_view)
+    return maximums
+
+
+def _encode_text(text: str) -> bytes:
+    return text.encode('utf-8', errors='surrogatepass')
+
+
+class _PreparedLayout:
+    """已转换为 ctypes 结构的网格布局，持有底层字节串的引用；native 端只读，可跨线程共享。"""
+
+    def __init__(self, layout: TableLayout) -> None:
+        self._buffers: list[bytes] = []
+        line_fields = {}
+        for name in ('top', 'header_line', 'row_line', 'bottom'):
+            parts = getattr(layout, name)
+            if parts is None:
+                line_fields[name] = _ColumnLayoutLine()
+            else:
+                line_fields[name] = _ColumnLayoutLine(True, *(self._text(part) for part in parts))
+        edges = layout.edges or ('', '')
+        self.layout = _ColumnLayout(
+            separator=self._text(layout.separator),
+            row_fill=self._text(layout.row_fill),
+            has_edges=layout.edges is not None,
+            edge_left=self._text(edges[0]),
+            edge_right=self._text(edges[1]),
+            header_conditional=layout.header_conditional,
+            escape_pipes=layout.escape_pipes,
+            **line_fields,
+        )
+        self.pointer = ctypes.byref(self.layout)
+
+    def _text(self, text: str) -> _ColumnText:
+        encoded = _encode_text(text)
+        self._buffers.append(encoded)
+        return _ColumnText(encoded, len(encoded))
+
+
+@functools.lru_cache(maxsize=_OPTION_CACHE_SIZE)
+def _prepare_layout(layout: TableLayout) -> _PreparedLayout:
+    """按布局内容缓存转换好的 ctypes 结构。"""
+    return _PreparedLayout(layout)
+
+
+def format_cells(
+    cells: Sequence[str],
+    column_count: int,
+    layout: TableLayout | None = None,
+    widths: Sequence[int] | None = None,
+) -> str:
+    """把按行展开的单元格（首行为表头）直接交给 C 计算列宽并按布局输出，结果与 Python 引擎一致。
+
+    单元格须为 normalize_cell_value 处理过的文本，Markdown 转义由 layout.escape_pipes 在 C 中完成；
+    widths 为 Python 侧已测得的各单元格转义前显示宽度，为 None 时由 C 按 wcwidth 逐格测量，
+    ZWJ、VS16 等按上下文计算宽度的序列可能与 Python 引擎不同。column 动态库不可用时抛出 FileNotFoundError。
+    """
+    if column_count <= 0 or not cells or len(cells) % column_count:
+        raise ValueError('单元格数量必须是列数的正整数倍')
+    if widths is not None and len(widths) != len(cells):
+        raise ValueError('宽度数量必须与单元格数量一致')
+
+    library = _get_library()
+    prepared_layout = _prepare_layout(layout or TableLayout())
+    encoded_cells = [_encode_text(cell) for cell in cells]
+    cell_array = (ctypes.c_char_p * len(encoded_cells))(*encoded_cells)
+    size_array = (ctypes.c_size_t * len(encoded_cells))(*map(len, encoded_cells))
+    if widths is None:
+        width_array = None
+    elif isinstance(widths, array.array) and widths.typecode == WIDTH_TYPECODE:
+        width_array = (ctypes.c_size_t * len(widths)).from_buffer(widths)
+    else:
+        width_array = (ctypes.c_size_t * len(widths))(*widths)
+    result = _ColumnResult()
+    status = library.column_format(
+        cell_array,
+        size_array,
+        width_array,
+        len(encoded_cells),
+        column_count,
+        prepared_layout.pointer,
+        ctypes.byref(result),
+    )
+    if status != 0:
+        error_number = ctypes.get_errno()
+        raise OSError(error_number, os.strerror(error_number))
+
+    try:
+        return ctypes.string_at(result.output, result.output_size).decode('utf-8', errors='surrogatepass')
+    finally:
+        library.column_result_free(ctypes.byref(result))
 
 
 def _normalize_options(
@@ -193,12 +422,41 @@ def _normalize_options(
     return normalized_items, normalized_files
 
 
+class _PreparedOptions:
+    """已转换为 ctypes 结构的选项集合，持有底层缓冲区的引用。
+
+    native 端只读取选项结构，因此同一实例可在多个线程的并发调用间共享。
+    """
+
+    def __init__(self, option_items: tuple[tuple[bytes, bytes | None], ...], input_files: tuple[bytes, ...]) -> None:
+        option_array = (_ColumnOption * len(option_items))()
+        for index, (option_name, option_value) in enumerate(option_items):
+            option_array[index] = _ColumnOption(option_name, option_value, option_value is not None)
+
+        input_file_array = (ctypes.c_char_p * len(input_files))(*input_files)
+        self._buffers = (option_items, input_files, option_array, input_file_array)
+        self.options = _ColumnOptions(option_array, len(option_items), input_file_array, len(input_files))
+        self.pointer = ctypes.byref(self.options)
+
+
+@functools.lru_cache(maxsize=_OPTION_CACHE_SIZE)
+def _prepare_options(
+    option_items: tuple[tuple[bytes, bytes | None], ...],
+    input_files: tuple[bytes, ...],
+) -> _PreparedOptions:
+    """按选项内容缓存预先分配的 ctypes 选项数组，重复的选项组合无需重新构造。"""
+    return _PreparedOptions(option_items, input_files)
+
+
 def render(
     input_text: ColumnInput,
     options: ColumnOptions | Sequence[ColumnOptionItem] = (),
     input_files: Sequence[str] = (),
 ) -> str:
-    """在当前进程内调用完整 util-linux column。"""
+    """在当前进程内调用完整 util-linux column。
+
+    原生实现使用内存流且不持有全局锁，ctypes 调用期间释放 GIL，可在线程池中并发调用。
+    """
     if isinstance(input_text, str):
         input_bytes = input_text.encode('utf-8')
     elif isinstance(input_text, bytes):
@@ -207,25 +465,14 @@ def render(
         raise TypeError('input_text 必须是 str 或 bytes')
 
     option_items, input_files = _normalize_options(options, input_files)
+    column_options = _prepare_options(tuple(option_items), tuple(input_files))
 
-    option_array = (_ColumnOption * len(option_items))()
-    option_buffers = []
-    for index, (option_name, option_value) in enumerate(option_items):
-        option_buffers.extend((option_name, option_value))
-        option_array[index] = _ColumnOption(option_name, option_value, option_value is not None)
-
-    input_file_array = (ctypes.c_char_p * len(input_files))()
-    for index, input_file in enumerate(input_files):
-        input_file_array[index] = input_file
-    option_buffers.extend(input_files)
-
-    column_options = _ColumnOptions(option_array, len(option_items), input_file_array, len(input_files))
+    library = _get_library()
     result = _ColumnResult()
-    library = _load_library()
     status = library.column_render(
         input_bytes,
         len(input_bytes),
-        ctypes.byref(column_options),
+        column_options.pointer,
         ctypes.byref(result),
     )
     if status != 0:
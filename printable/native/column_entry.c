@@ -3,6 +3,10 @@
 #include "column_wrapper.h"
 
 #include <errno.h>
+#include <err.h>
+#include <getopt.h>
+#include <limits.h>
+#include <locale.h>
 #include <pthread.h>
 #include <setjmp.h>
 #include <stdarg.h>
@@ -12,23 +16,91 @@
 #include <unistd.h>
 #include <wchar.h>
 
+#include "libsmartcols.h"
+
 #if !defined(__APPLE__) && !defined(__linux__)
 #error "column wrapper supports macOS and Linux only"
 #endif
 
-#define HAS_FEATURE_ADDRESS_SANITIZER 1
-#define main column_main
-#define exit column_exit
-#define err column_err
-#define errx column_errx
-
+/*
+ * column.c 按命令行程序编写：读写进程级 stdin/stdout/stderr，用 getopt 全局状态解析参数，
+ * 并通过 exit/err 退出。下面把这些入口在本编译单元内替换为线程局部的版本：
+ * 标准流指向每次渲染自己的内存流，参数解析状态、退出跳转点均按线程隔离，
+ * 因而 column_render 无需互斥锁、临时文件或 dup2 替换进程的 0/1/2 号描述符，可被多线程并发调用。
+ * 系统头文件必须在宏定义之前包含，避免其中的声明被改写。
+ */
+static _Thread_local FILE *column_stdin;
+static _Thread_local FILE *column_stdout;
+static _Thread_local FILE *column_stderr;
 static _Thread_local jmp_buf *column_active_jump;
 static _Thread_local int column_active_exit_code;
-static pthread_mutex_t column_render_mutex = PTHREAD_MUTEX_INITIALIZER;
+static _Thread_local int column_optind = 1;
+static _Thread_local int column_opterr = 1;
+static _Thread_local int column_optopt;
+static _Thread_local char *column_optarg;
+static _Thread_local size_t column_optpos;
+static _Thread_local const char *column_program_name = "column";
+static pthread_once_t column_locale_once = PTHREAD_ONCE_INIT;
 
 static void column_exit(int status) __attribute__((noreturn));
 static void column_err(int status, const char *format, ...) __attribute__((noreturn));
 static void column_errx(int status, const char *format, ...) __attribute__((noreturn));
+static void column_warn(const char *format, ...) __attribute__((unused));
+static void column_warnx(const char *format, ...) __attribute__((unused));
+static int column_getopt_long(
+	int argc,
+	char *const argv[],
+	const char *short_options,
+	const struct option *long_options,
+	int *long_index);
+static char *column_setlocale(int category, const char *locale);
+static int column_isatty(int descriptor);
+static int column_atexit(void (*function)(void));
+static int column_terminal_width(int default_width) __attribute__((unused));
+static int column_print_table(struct libscols_table *table) __attribute__((unused));
+static int column_printf(const char *format, ...) __attribute__((format(printf, 1, 2), unused));
+static int column_putchar(int character) __attribute__((unused));
+static wint_t column_putwchar(wchar_t character) __attribute__((unused));
+static int column_puts(const char *text) __attribute__((unused));
+static int column_getchar(void) __attribute__((unused));
+static wint_t column_getwchar(void) __attribute__((unused));
+
+#undef stdin
+#undef stdout
+#undef stderr
+#undef printf
+#undef putchar
+#undef putwchar
+#undef puts
+#undef getchar
+#undef getwchar
+
+#define HAS_FEATURE_ADDRESS_SANITIZER 1
+#define main column_main
+#define exit column_exit
+#define err column_err
+#define errx column_errx
+#define warn column_warn
+#define warnx column_warnx
+#define stdin column_stdin
+#define stdout column_stdout
+#define stderr column_stderr
+#define optind column_optind
+#define opterr column_opterr
+#define optopt column_optopt
+#define optarg column_optarg
+#define getopt_long column_getopt_long
+#define setlocale column_setlocale
+#define isatty column_isatty
+#define atexit column_atexit
+#define get_terminal_width column_terminal_width
+#define scols_print_table column_print_table
+#define printf column_printf
+#define putchar column_putchar
+#define putwchar column_putwchar
+#define puts column_puts
+#define getchar column_getchar
+#define getwchar column_getwchar
 
 #include "../../util-linux/text-utils/column.c"
 
@@ -36,6 +108,27 @@ static void column_errx(int status, const char *format, ...) __attribute__((nore
 #undef exit
 #undef err
 #undef errx
+#undef warn
+#undef warnx
+#undef stdin
+#undef stdout
+#undef stderr
+#undef optind
+#undef opterr
+#undef optopt
+#undef optarg
+#undef getopt_long
+#undef setlocale
+#undef isatty
+#undef atexit
+#undef get_terminal_width
+#undef scols_print_table
+#undef printf
+#undef putchar
+#undef putwchar
+#undef puts
+#undef getchar
+#undef getwchar
 
 static size_t utf8_sequence_length(unsigned char first_byte)
 {
@@ -64,7 +157,9 @@ static wchar_t utf8_decode(const unsigned char *bytes, size_t size)
 	return bytes[0];
 }
 
-static size_t cell_width(const unsigned char *text, size_t text_size)
+/* defer_context 为真时，含按上下文计算宽度的字符或 wcwidth 返回负数的单元格记为 COLUMN_WIDTH_DEFERRED；
+ * 否则逐字符累加，wcwidth 返回负数的字符按 UTF-8 字节数计。 */
+static size_t cell_width(const unsigned char *text, size_t text_size, int defer_context)
 {
 	size_t index = 0;
 	size_t width = 0;
@@ -75,6 +170,20 @@ static size_t cell_width(const unsigned char *text, size_t text_size)
 		wchar_t codepoint;
 		int column;
 
+		/* ANSI CSI 序列（ESC [ 参数 中间字节 结束字节）不占列宽，规则同 Python 端 ANSI_ESCAPE_PATTERN。 */
+		if (first_byte == 0x1B && index + 1 < text_size && text[index + 1] == '[') {
+			size_t end = index + 2;
+
+			while (end < text_size && text[end] >= 0x30 && text[end] <= 0x3F)
+				end++;
+			while (end < text_size && text[end] >= 0x20 && text[end] <= 0x2F)
+				end++;
+			if (end < text_size && text[end] >= 0x40 && text[end] <= 0x7E) {
+				index = end + 1;
+				continue;
+			}
+		}
+
 		if (sequence_size > 1 && index + sequence_size > text_size)
 			sequence_size = text_size - index;
 		if (sequence_size > 1) {
@@ -94,7 +203,12 @@ static size_t cell_width(const unsigned char *text, size_t text_size)
 		if (codepoint < 32 || (codepoint >= 0x7F && codepoint <= 0x9F))
 			width++;
 		else {
+			/* ZWJ、VS16 与 emoji 肤色修饰符由 wcswidth 按上下文计算，与逐字符的 wcwidth 不一致 */
+			int context = codepoint == 0x200D || codepoint == 0xFE0F || (codepoint >= 0x1F3FB && codepoint <= 0x1F3FF);
+
 			column = wcwidth(codepoint);
+			if (defer_context && (context || column < 0))
+				return COLUMN_WIDTH_DEFERRED;
 			width += column >= 0 ? (size_t)column : sequence_size;
 		}
 		index += sequence_size;
@@ -102,27 +216,40 @@ static size_t cell_width(const unsigned char *text, size_t text_size)
 	return width;
 }
 
-size_t column_widths(
+/* column_maximums 为 NULL 时只测量单元格宽度，否则同时按列（下标对 column_count 取模）归约最大值。 */
+static size_t measure_cells(
 	const char *input,
 	size_t input_size,
 	size_t *widths,
-	size_t widths_capacity)
+	size_t widths_capacity,
+	size_t column_count,
+	size_t *column_maximums)
 {
 	size_t cell_start = 0;
 	size_t cell_count = 0;
+	size_t column_index = 0;
 	size_t index;
 
 	if (widths == NULL || widths_capacity == 0 || (input_size > 0 && input == NULL)) {
 		errno = EINVAL;
 		return 0;
 	}
+	if (column_maximums != NULL)
+		memset(column_maximums, 0, column_count * sizeof(*column_maximums));
 
 	for (index = 0; index <= input_size; index++) {
 		if (index == input_size || input[index] == 0x1F) {
-			if (cell_count < widths_capacity)
-				widths[cell_count] = cell_width(
-					(const unsigned char *)input + cell_start,
-					index - cell_start);
+			if (cell_count < widths_capacity) {
+				size_t width = cell_width((const unsigned char *)input + cell_start, index - cell_start, 1);
+
+				widths[cell_count] = width;
+				if (column_maximums != NULL) {
+					if (width > column_maximums[column_index])
+						column_maximums[column_index] = width;
+					if (++column_index == column_count)
+						column_index = 0;
+				}
+			}
 			cell_count++;
 			cell_start = index + 1;
 		}
@@ -130,66 +257,258 @@ size_t column_widths(
 	return cell_count;
 }
 
-static int duplicate_descriptor(int descriptor)
+size_t column_widths(
+	const char *input,
+	size_t input_size,
+	size_t *widths,
+	size_t widths_capacity)
 {
-	int duplicate = dup(descriptor);
-
-	return duplicate >= 0 ? duplicate : -1;
+	return measure_cells(input, input_size, widths, widths_capacity, 0, NULL);
 }
 
-static void close_descriptor(int *descriptor)
+size_t column_widths_max(
+	const char *input,
+	size_t input_size,
+	size_t *widths,
+	size_t widths_capacity,
+	size_t column_count,
+	size_t *column_maximums)
 {
-	if (*descriptor >= 0) {
-		close(*descriptor);
-		*descriptor = -1;
+	if (column_count == 0 || column_maximums == NULL) {
+		errno = EINVAL;
+		return 0;
 	}
+	return measure_cells(input, input_size, widths, widths_capacity, column_count, column_maximums);
 }
 
-static int read_stream(FILE *stream, char **data, size_t *data_size)
+void column_widths_reduce(const size_t *widths, size_t count, size_t column_count, size_t *column_maximums)
 {
-	long stream_size;
-	size_t bytes_read;
-	char *buffer;
+	size_t column_index = 0;
 
-	if (fseek(stream, 0, SEEK_END) != 0) {
-		return -1;
+	if (column_count == 0 || column_maximums == NULL)
+		return;
+	memset(column_maximums, 0, column_count * sizeof(*column_maximums));
+	for (size_t index = 0; index < count; index++) {
+		if (widths[index] > column_maximums[column_index])
+			column_maximums[column_index] = widths[index];
+		if (++column_index == column_count)
+			column_index = 0;
 	}
+}
 
-	stream_size = ftell(stream);
-	if (stream_size < 0 || fseek(stream, 0, SEEK_SET) != 0) {
-		return -1;
+/* 两遍写出：data 为 NULL 时只累计长度，分配好缓冲区后再以同样的顺序写入。 */
+struct format_buffer {
+	char *data;
+	size_t size;
+	size_t line_count;
+};
+
+static void buffer_append(struct format_buffer *buffer, const char *data, size_t size)
+{
+	if (buffer->data != NULL && size > 0)
+		memcpy(buffer->data + buffer->size, data, size);
+	buffer->size += size;
+}
+
+static void buffer_append_text(struct format_buffer *buffer, const struct column_text *text)
+{
+	buffer_append(buffer, text->data, text->size);
+}
+
+static void buffer_fill(struct format_buffer *buffer, char byte, size_t count)
+{
+	if (buffer->data != NULL && count > 0)
+		memset(buffer->data + buffer->size, byte, count);
+	buffer->size += count;
+}
+
+static void buffer_begin_line(struct format_buffer *buffer)
+{
+	if (buffer->line_count++ > 0)
+		buffer_append(buffer, "\n", 1);
+}
+
+static void buffer_append_escaped(struct format_buffer *buffer, const char *cell, size_t cell_size)
+{
+	const char *cursor = cell;
+	const char *end = cell + cell_size;
+	const char *pipe;
+
+	while ((pipe = memchr(cursor, '|', (size_t)(end - cursor))) != NULL) {
+		buffer_append(buffer, cursor, (size_t)(pipe - cursor));
+		buffer_append(buffer, "\\|", 2);
+		cursor = pipe + 1;
 	}
+	buffer_append(buffer, cursor, (size_t)(end - cursor));
+}
 
-	buffer = calloc((size_t)stream_size + 1, sizeof(*buffer));
-	if (buffer == NULL) {
-		return -1;
+static size_t count_pipes(const char *cell, size_t cell_size)
+{
+	size_t count = 0;
+
+	for (size_t index = 0; index < cell_size; index++)
+		count += cell[index] == '|';
+	return count;
+}
+
+static int layout_line_present(const struct column_layout_line *line)
+{
+	return line != NULL && line->present;
+}
+
+static void format_separator_line(
+	struct format_buffer *buffer,
+	const struct column_layout *layout,
+	const struct column_layout_line *line,
+	const size_t *column_widths_max,
+	size_t column_count)
+{
+	buffer_begin_line(buffer);
+	buffer_append_text(buffer, &line->left);
+	for (size_t column_index = 0; column_index < column_count; column_index++) {
+		if (column_index > 0)
+			buffer_append_text(buffer, &line->junction);
+		for (size_t repeat = 0; repeat < column_widths_max[column_index] + 2; repeat++)
+			buffer_append_text(buffer, &layout->row_fill);
 	}
+	buffer_append_text(buffer, &line->right);
+}
 
-	bytes_read = fread(buffer, 1, (size_t)stream_size, stream);
-	if (bytes_read != (size_t)stream_size && ferror(stream)) {
-		free(buffer);
-		return -1;
+static void format_data_line(
+	struct format_buffer *buffer,
+	const struct column_layout *layout,
+	const char *const *cells,
+	const size_t *cell_sizes,
+	const size_t *cell_widths,
+	const size_t *column_widths_max,
+	size_t column_count,
+	int escape_pipes)
+{
+	buffer_begin_line(buffer);
+	if (layout->has_edges)
+		buffer_append_text(buffer, &layout->edge_left);
+	for (size_t column_index = 0; column_index < column_count; column_index++) {
+		if (column_index > 0)
+			buffer_append_text(buffer, &layout->separator);
+		buffer_append(buffer, " ", 1);
+		if (escape_pipes)
+			buffer_append_escaped(buffer, cells[column_index], cell_sizes[column_index]);
+		else
+			buffer_append(buffer, cells[column_index], cell_sizes[column_index]);
+		buffer_fill(buffer, ' ', column_widths_max[column_index] - cell_widths[column_index] + 1);
 	}
+	if (layout->has_edges)
+		buffer_append_text(buffer, &layout->edge_right);
+}
 
-	*data = buffer;
-	*data_size = bytes_read;
-	return 0;
+static void format_table(
+	struct format_buffer *buffer,
+	const struct column_layout *layout,
+	const char *const *cells,
+	const size_t *cell_sizes,
+	const size_t *cell_widths,
+	const size_t *column_widths_max,
+	size_t row_count,
+	size_t column_count)
+{
+	int has_records = row_count > 1;
+
+	if (layout_line_present(&layout->top))
+		format_separator_line(buffer, layout, &layout->top, column_widths_max, column_count);
+	format_data_line(buffer, layout, cells, cell_sizes, cell_widths, column_widths_max, column_count, 0);
+	if (layout_line_present(&layout->header_line) && (has_records || !layout->header_conditional))
+		format_separator_line(buffer, layout, &layout->header_line, column_widths_max, column_count);
+	for (size_t row_index = 1; row_index < row_count; row_index++) {
+		size_t row_start = row_index * column_count;
+
+		if (row_index > 1 && layout_line_present(&layout->row_line))
+			format_separator_line(buffer, layout, &layout->row_line, column_widths_max, column_count);
+		format_data_line(
+			buffer,
+			layout,
+			cells + row_start,
+			cell_sizes + row_start,
+			cell_widths + row_start,
+			column_widths_max,
+			column_count,
+			layout->escape_pipes);
+	}
+	if (layout_line_present(&layout->bottom))
+		format_separator_line(buffer, layout, &layout->bottom, column_widths_max, column_count);
 }
 
-static int write_input(FILE *stream, const char *input, size_t input_size)
+int column_format(
+	const char *const *cells,
+	const size_t *cell_sizes,
+	const size_t *measured_widths,
+	size_t cell_count,
+	size_t column_count,
+	const struct column_layout *layout,
+	struct column_result *result)
 {
-	size_t bytes_written;
+	static const struct column_layout default_layout = {0};
+	struct format_buffer buffer = {0};
+	size_t *cell_widths = NULL;
+	size_t *column_widths_max = NULL;
+	size_t row_count;
+
+	if (result == NULL || cells == NULL || cell_sizes == NULL || column_count == 0 ||
+		cell_count == 0 || cell_count % column_count != 0) {
+		errno = EINVAL;
+		return -1;
+	}
+	memset(result, 0, sizeof(*result));
+	if (layout == NULL)
+		layout = &default_layout;
+	row_count = cell_count / column_count;
+
+	cell_widths = malloc(cell_count * sizeof(*cell_widths));
+	column_widths_max = calloc(column_count, sizeof(*column_widths_max));
+	if (cell_widths == NULL || column_widths_max == NULL) {
+		free(cell_widths);
+		free(column_widths_max);
+		errno = ENOMEM;
+		return -1;
+	}
 
-	if (input_size == 0) {
-		return 0;
+	for (size_t index = 0; index < cell_count; index++) {
+		size_t column_index = index % column_count;
+
+		if (cells[index] == NULL && cell_sizes[index] > 0) {
+			free(cell_widths);
+			free(column_widths_max);
+			errno = EINVAL;
+			return -1;
+		}
+		if (measured_widths != NULL)
+			cell_widths[index] = measured_widths[index];
+		else
+			cell_widths[index] = cell_width((const unsigned char *)cells[index], cell_sizes[index], 0);
+		/* Markdown 转义为每个 | 前加一个 \，显示宽度随之加一；表头不转义。 */
+		if (layout->escape_pipes && index >= column_count)
+			cell_widths[index] += count_pipes(cells[index], cell_sizes[index]);
+		if (cell_widths[index] > column_widths_max[column_index])
+			column_widths_max[column_index] = cell_widths[index];
 	}
 
-	bytes_written = fwrite(input, 1, input_size, stream);
-	if (bytes_written != input_size || fflush(stream) != 0) {
+	format_table(&buffer, layout, cells, cell_sizes, cell_widths, column_widths_max, row_count, column_count);
+	buffer.data = malloc(buffer.size + 1);
+	if (buffer.data == NULL) {
+		free(cell_widths);
+		free(column_widths_max);
+		errno = ENOMEM;
 		return -1;
 	}
-
-	return fseek(stream, 0, SEEK_SET);
+	buffer.size = 0;
+	buffer.line_count = 0;
+	format_table(&buffer, layout, cells, cell_sizes, cell_widths, column_widths_max, row_count, column_count);
+	buffer.data[buffer.size] = '\0';
+
+	free(cell_widths);
+	free(column_widths_max);
+	result->output = buffer.data;
+	result->output_size = buffer.size;
+	return 0;
 }
 
 static char *make_option_argument(const struct column_option *option)
@@ -307,56 +626,20 @@ static void free_argv(char **arguments, size_t option_count)
 	free(arguments);
 }
 
-static int save_standard_descriptors(int descriptors[3])
-{
-	for (int index = 0; index < 3; index++) {
-		descriptors[index] = duplicate_descriptor(index);
-		if (descriptors[index] < 0) {
-			for (int restore_index = 0; restore_index < index; restore_index++) {
-				close_descriptor(&descriptors[restore_index]);
-			}
-			return -1;
-		}
-	}
-
-	return 0;
-}
-
-static int redirect_standard_descriptors(FILE *input, FILE *output, FILE *error)
+static void write_error_message(const char *format, va_list arguments)
 {
-	if (dup2(fileno(input), STDIN_FILENO) < 0 ||
-		dup2(fileno(output), STDOUT_FILENO) < 0 ||
-		dup2(fileno(error), STDERR_FILENO) < 0) {
-		return -1;
-	}
-
-	clearerr(stdin);
-	clearerr(stdout);
-	clearerr(stderr);
-	return 0;
+	vfprintf(column_stderr, format, arguments);
+	fputc('\n', column_stderr);
 }
 
-static int restore_standard_descriptors(int descriptors[3])
+static void write_errno_message(int error_number, const char *format, va_list arguments)
 {
-	int result = 0;
-
-	fflush(NULL);
-	for (int index = 0; index < 3; index++) {
-		if (dup2(descriptors[index], index) < 0) {
-			result = -1;
-		}
-		close_descriptor(&descriptors[index]);
+	if (format != NULL) {
+		vfprintf(column_stderr, format, arguments);
+		fputs(": ", column_stderr);
 	}
-	clearerr(stdin);
-	clearerr(stdout);
-	clearerr(stderr);
-	return result;
-}
-
-static void write_error_message(const char *format, va_list arguments)
-{
-	vfprintf(stderr, format, arguments);
-	fputc('\n', stderr);
+	fputs(strerror(error_number), column_stderr);
+	fputc('\n', column_stderr);
 }
 
 static void column_exit(int status)
@@ -371,10 +654,11 @@ static void column_exit(int status)
 
 static void column_err(int status, const char *format, ...)
 {
+	int error_number = errno;
 	va_list arguments;
 
 	va_start(arguments, format);
-	write_error_message(format, arguments);
+	write_errno_message(error_number, format, arguments);
 	va_end(arguments);
 	column_exit(status);
 }
@@ -389,6 +673,284 @@ static void column_errx(int status, const char *format, ...)
 	column_exit(status);
 }
 
+static void column_warn(const char *format, ...)
+{
+	int error_number = errno;
+	va_list arguments;
+
+	va_start(arguments, format);
+	write_errno_message(error_number, format, arguments);
+	va_end(arguments);
+}
+
+static void column_warnx(const char *format, ...)
+{
+	va_list arguments;
+
+	va_start(arguments, format);
+	write_error_message(format, arguments);
+	va_end(arguments);
+}
+
+static int report_option_error(const char *short_options, const char *format, const char *option)
+{
+	if (column_opterr && short_options[0] != ':') {
+		fprintf(column_stderr, "%s: ", column_program_name);
+		fprintf(column_stderr, format, option);
+		fputc('\n', column_stderr);
+	}
+	return '?';
+}
+
+static const struct option *find_long_option(
+	const struct option *long_options,
+	const char *name,
+	size_t name_size,
+	int *long_index,
+	int *ambiguous)
+{
+	const struct option *match = NULL;
+
+	*ambiguous = 0;
+	for (int index = 0; long_options != NULL && long_options[index].name != NULL; index++) {
+		const struct option *option = &long_options[index];
+
+		if (strncmp(option->name, name, name_size) != 0) {
+			continue;
+		}
+		if (strlen(option->name) == name_size) {
+			*long_index = index;
+			*ambiguous = 0;
+			return option;
+		}
+		if (match != NULL &&
+			(match->has_arg != option->has_arg || match->flag != option->flag || match->val != option->val)) {
+			*ambiguous = 1;
+		}
+		if (match == NULL) {
+			match = option;
+			*long_index = index;
+		}
+	}
+	return *ambiguous ? NULL : match;
+}
+
+static int parse_long_option(
+	int argc,
+	char *const argv[],
+	const char *short_options,
+	const struct option *long_options,
+	int *long_index)
+{
+	const char *argument = argv[column_optind] + 2;
+	const char *value = strchr(argument, '=');
+	size_t name_size = value != NULL ? (size_t)(value - argument) : strlen(argument);
+	int option_index = 0;
+	int ambiguous;
+	const struct option *option;
+
+	column_optind++;
+	option = find_long_option(long_options, argument, name_size, &option_index, &ambiguous);
+	if (option == NULL) {
+		column_optopt = 0;
+		return report_option_error(
+			short_options,
+			ambiguous ? "option '--%s' is ambiguous" : "unrecognized option '--%s'",
+			argument);
+	}
+
+	if (value != NULL) {
+		if (option->has_arg == no_argument) {
+			column_optopt = option->val;
+			return report_option_error(short_options, "option '--%s' doesn't allow an argument", option->name);
+		}
+		column_optarg = (char *)value + 1;
+	} else if (option->has_arg == required_argument) {
+		if (column_optind >= argc) {
+			column_optopt = option->val;
+			report_option_error(short_options, "option '--%s' requires an argument", option->name);
+			return short_options[0] == ':' ? ':' : '?';
+		}
+		column_optarg = argv[column_optind++];
+	}
+
+	if (long_index != NULL) {
+		*long_index = option_index;
+	}
+	if (option->flag != NULL) {
+		*option->flag = option->val;
+		return 0;
+	}
+	return option->val;
+}
+
+/* 不重排参数的 getopt_long：选项在前、文件名在后（make_argv 即按此顺序构造）。 */
+static int column_getopt_long(
+	int argc,
+	char *const argv[],
+	const char *short_options,
+	const struct option *long_options,
+	int *long_index)
+{
+	const char *argument;
+	const char *specification;
+	char option_character;
+	char option_text[2] = {0};
+
+	column_optarg = NULL;
+	if (short_options[0] == '+' || short_options[0] == '-') {
+		short_options++;
+	}
+	if (column_optind >= argc) {
+		return -1;
+	}
+
+	argument = argv[column_optind];
+	if (column_optpos == 0) {
+		if (argument[0] != '-' || argument[1] == '\0') {
+			return -1;
+		}
+		if (strcmp(argument, "--") == 0) {
+			column_optind++;
+			return -1;
+		}
+		if (argument[1] == '-') {
+			return parse_long_option(argc, argv, short_options, long_options, long_index);
+		}
+		column_optpos = 1;
+	}
+
+	option_character = argument[column_optpos++];
+	specification = option_character == ':' ? NULL : strchr(short_options, option_character);
+	if (specification == NULL) {
+		column_optopt = (unsigned char)option_character;
+		option_text[0] = option_character;
+		if (argument[column_optpos] == '\0') {
+			column_optind++;
+			column_optpos = 0;
+		}
+		return report_option_error(short_options, "invalid option -- '%s'", option_text);
+	}
+
+	if (specification[1] != ':') {
+		if (argument[column_optpos] == '\0') {
+			column_optind++;
+			column_optpos = 0;
+		}
+		return (unsigned char)option_character;
+	}
+
+	if (argument[column_optpos] != '\0') {
+		column_optarg = (char *)argument + column_optpos;
+	} else if (specification[2] != ':') {
+		if (column_optind + 1 >= argc) {
+			column_optopt = (unsigned char)option_character;
+			option_text[0] = option_character;
+			column_optind++;
+			column_optpos = 0;
+			report_option_error(short_options, "option requires an argument -- '%s'", option_text);
+			return short_options[0] == ':' ? ':' : '?';
+		}
+		column_optarg = argv[++column_optind];
+	}
+	column_optind++;
+	column_optpos = 0;
+	return (unsigned char)option_character;
+}
+
+static void initialize_locale(void)
+{
+	setlocale(LC_CTYPE, "");
+}
+
+/* setlocale 会修改进程级状态，只在首次渲染时初始化一次字符类型。 */
+static char *column_setlocale(int category, const char *locale)
+{
+	(void)category;
+	(void)locale;
+	pthread_once(&column_locale_once, initialize_locale);
+	return NULL;
+}
+
+/* 标准流已换成内存流，不再对应终端。 */
+static int column_isatty(int descriptor)
+{
+	if (descriptor == STDIN_FILENO || descriptor == STDOUT_FILENO || descriptor == STDERR_FILENO) {
+		return 0;
+	}
+	return isatty(descriptor);
+}
+
+/* close_stdout 等退出回调会引用已关闭的内存流，不能注册到进程退出流程。 */
+static int column_atexit(void (*function)(void))
+{
+	(void)function;
+	return 0;
+}
+
+/* 与输出不是终端时的 get_terminal_width 一致：只参考 COLUMNS 环境变量。 */
+static int column_terminal_width(int default_width)
+{
+	const char *columns = getenv("COLUMNS");
+	char *end = NULL;
+	long width;
+
+	if (columns == NULL) {
+		return default_width;
+	}
+	errno = 0;
+	width = strtol(columns, &end, 10);
+	if (errno != 0 || end == columns || *end != '\0' || width <= 0 || width > INT_MAX) {
+		return default_width;
+	}
+	return (int)width;
+}
+
+static int column_print_table(struct libscols_table *table)
+{
+	scols_table_set_stream(table, column_stdout);
+	return scols_print_table(table);
+}
+
+static int column_printf(const char *format, ...)
+{
+	va_list arguments;
+	int result;
+
+	va_start(arguments, format);
+	result = vfprintf(column_stdout, format, arguments);
+	va_end(arguments);
+	return result;
+}
+
+static int column_putchar(int character)
+{
+	return fputc(character, column_stdout);
+}
+
+static wint_t column_putwchar(wchar_t character)
+{
+	return fputwc(character, column_stdout);
+}
+
+static int column_puts(const char *text)
+{
+	if (fputs(text, column_stdout) == EOF) {
+		return EOF;
+	}
+	return fputc('\n', column_stdout);
+}
+
+static int column_getchar(void)
+{
+	return fgetc(column_stdin);
+}
+
+static wint_t column_getwchar(void)
+{
+	return fgetwc(column_stdin);
+}
+
 static int run_column_main(
 	char **arguments,
 	size_t argument_count,
@@ -396,22 +958,19 @@ static int run_column_main(
 	FILE *output,
 	FILE *error)
 {
-	int descriptors[3] = {-1, -1, -1};
 	int exit_code = EXIT_FAILURE;
 	jmp_buf jump_buffer;
 
-	if (save_standard_descriptors(descriptors) != 0) {
-		return -1;
-	}
-	if (redirect_standard_descriptors(input, output, error) != 0) {
-		restore_standard_descriptors(descriptors);
-		return -1;
-	}
+	column_stdin = input;
+	column_stdout = output;
+	column_stderr = error;
+	column_optind = 1;
+	column_opterr = 1;
+	column_optopt = 0;
+	column_optarg = NULL;
+	column_optpos = 0;
+	column_program_name = arguments[0];
 
-	optind = 1;
-#ifdef __APPLE__
-	optreset = 1;
-#endif
 	column_active_jump = &jump_buffer;
 	if (setjmp(jump_buffer) == 0) {
 		exit_code = column_main((int)argument_count, arguments);
@@ -420,13 +979,23 @@ static int run_column_main(
 	}
 	column_active_jump = NULL;
 
-	if (restore_standard_descriptors(descriptors) != 0) {
-		return -1;
-	}
-
+	fflush(output);
+	fflush(error);
+	column_stdin = NULL;
+	column_stdout = NULL;
+	column_stderr = NULL;
 	return exit_code;
 }
 
+static FILE *open_input_stream(const char *input, size_t input_size)
+{
+	/* POSIX 允许 fmemopen 拒绝长度为 0 的缓冲区，空输入改用 /dev/null */
+	if (input_size == 0) {
+		return fopen("/dev/null", "r");
+	}
+	return fmemopen((void *)input, input_size, "r");
+}
+
 int column_render(
 	const char *input,
 	size_t input_size,
@@ -436,8 +1005,13 @@ int column_render(
 	FILE *input_file = NULL;
 	FILE *output_file = NULL;
 	FILE *error_file = NULL;
+	char *output = NULL;
+	char *error = NULL;
+	size_t output_size = 0;
+	size_t error_size = 0;
 	char **arguments = NULL;
 	size_t argument_count = 0;
+	int close_failed;
 	int exit_code;
 
 	if (result == NULL || (input_size > 0 && input == NULL)) {
@@ -446,14 +1020,9 @@ int column_render(
 	}
 
 	memset(result, 0, sizeof(*result));
-	if (pthread_mutex_lock(&column_render_mutex) != 0) {
-		errno = EBUSY;
-		return -1;
-	}
-
-	input_file = tmpfile();
-	output_file = tmpfile();
-	error_file = tmpfile();
+	input_file = open_input_stream(input, input_size);
+	output_file = open_memstream(&output, &output_size);
+	error_file = open_memstream(&error, &error_size);
 	if (input_file == NULL || output_file == NULL || error_file == NULL) {
 		if (errno == 0) {
 			errno = EIO;
@@ -461,27 +1030,30 @@ int column_render(
 		goto fail;
 	}
 
-	if (write_input(input_file, input, input_size) != 0) {
-		goto fail;
-	}
-
 	arguments = make_argv(options, &argument_count);
 	if (arguments == NULL) {
 		goto fail;
 	}
 
 	exit_code = run_column_main(arguments, argument_count, input_file, output_file, error_file);
-	if (exit_code < 0 || read_stream(output_file, &result->output, &result->output_size) != 0 ||
-		read_stream(error_file, &result->error, &result->error_size) != 0) {
+	free_argv(arguments, options ? options->item_count : 0);
+	arguments = NULL;
+	fclose(input_file);
+	input_file = NULL;
+	/* fclose 之后 open_memstream 的缓冲区与长度才最终确定 */
+	close_failed = fclose(output_file) != 0;
+	close_failed |= fclose(error_file) != 0;
+	output_file = NULL;
+	error_file = NULL;
+	if (close_failed) {
 		goto fail;
 	}
-	result->exit_code = exit_code;
 
-	free_argv(arguments, options ? options->item_count : 0);
-	fclose(input_file);
-	fclose(output_file);
-	fclose(error_file);
-	pthread_mutex_unlock(&column_render_mutex);
+	result->output = output;
+	result->output_size = output_size;
+	result->error = error;
+	result->error_size = error_size;
+	result->exit_code = exit_code;
 	return 0;
 
 fail:
@@ -495,8 +1067,9 @@ fail:
 	if (error_file != NULL) {
 		fclose(error_file);
 	}
+	free(output);
+	free(error);
 	column_result_free(result);
-	pthread_mutex_unlock(&column_render_mutex);
 	return -1;
 }
 
@@ -30,6 +30,8 @@ struct column_result {
 	int exit_code;
 };
 
+/* 以内存流运行完整的 util-linux column；可重入，不修改进程的标准描述符，可多线程并发调用。
+ * 成功返回 0，结果由 column_result_free 释放；失败返回 -1 并设置 errno。 */
 COLUMN_API int column_render(
 	const char *input,
 	size_t input_size,
@@ -38,7 +40,11 @@ COLUMN_API int column_render(
 
 COLUMN_API void column_result_free(struct column_result *result);
 
+/* 单元格含 ZWJ、VS16、emoji 肤色修饰符或 wcwidth 返回负数的字符时，宽度记为该值，由调用方另行测量。 */
+#define COLUMN_WIDTH_DEFERRED ((size_t)-1)
+
 /* input 是按 \x1f 分隔的 UTF-8 单元格序列；结果写入 widths（最多 widths_capacity 个），
+ * ANSI CSI 序列不占宽度，其余控制字符各计 1 列；宽度无法逐字符确定的单元格记为 COLUMN_WIDTH_DEFERRED；
  * 返回单元格总数。参数非法时 errno = EINVAL 并返回 0。 */
 COLUMN_API size_t column_widths(
 	const char *input,
@@ -46,4 +52,66 @@ COLUMN_API size_t column_widths(
 	size_t *widths,
 	size_t widths_capacity);
 
+/* 同 column_widths，并把单元格按行展开（每行 column_count 个）求各列最大宽度，写入 column_maximums
+ * （column_count 个元素，无需预先清零）；column_count 为 0 时 errno = EINVAL 并返回 0。 */
+COLUMN_API size_t column_widths_max(
+	const char *input,
+	size_t input_size,
+	size_t *widths,
+	size_t widths_capacity,
+	size_t column_count,
+	size_t *column_maximums);
+
+/* 把按行展开（每行 column_count 个）的 count 个宽度按列求最大值，写入 column_maximums
+ * （column_count 个元素，无需预先清零）；宽度已由缓存或其他途径得到时使用。column_count 为 0 时什么也不做。 */
+COLUMN_API void column_widths_reduce(
+	const size_t *widths,
+	size_t count,
+	size_t column_count,
+	size_t *column_maximums);
+
+/* 长度已知的 UTF-8 字节串，data 可为 NULL（此时 size 为 0）。 */
+struct column_text {
+	const char *data;
+	size_t size;
+};
+
+/* 一条横向分隔线：left + 每列 (列宽 + 2) 个 row_fill，列间以 junction 连接 + right。 */
+struct column_layout_line {
+	int present;
+	struct column_text left;
+	struct column_text junction;
+	struct column_text right;
+};
+
+/* 网格布局，与 Python 端 GRID_LAYOUTS 一一对应；全零表示默认无边框布局。 */
+struct column_layout {
+	struct column_text separator;
+	struct column_text row_fill;
+	int has_edges;
+	struct column_text edge_left;
+	struct column_text edge_right;
+	struct column_layout_line top;
+	struct column_layout_line header_line;
+	struct column_layout_line row_line;
+	struct column_layout_line bottom;
+	int header_conditional;
+	int escape_pipes;
+};
+
+/* cells 是按行展开的 UTF-8 单元格（cell_sizes 给出各自字节数，cell_count 为 column_count 的整数倍），
+ * 第一行为表头。measured_widths 为调用方已测量的各单元格（转义前）显示宽度，为 NULL 时按 wcwidth 逐格测量，
+ * 不处理 ZWJ、VS16 等按上下文计算宽度的序列。一次计算列宽并按 layout（NULL 为默认布局）写出与 Python
+ * 引擎逐字节一致的表格：每格为 " 内容 " 并以空格补齐到列宽，escape_pipes 时数据行的 | 转义为 \|，
+ * 行间以 \n 分隔且末行无换行。成功返回 0，结果写入 result->output，由 column_result_free 释放；
+ * 失败返回 -1 并设置 errno。 */
+COLUMN_API int column_format(
+	const char *const *cells,
+	const size_t *cell_sizes,
+	const size_t *measured_widths,
+	size_t cell_count,
+	size_t column_count,
+	const struct column_layout *layout,
+	struct column_result *result);
+
 #endif
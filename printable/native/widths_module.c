@@ -0,0 +1,219 @@
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include <string.h>
+#include <wchar.h>
+
+/*
+ * printable.native.lib._widths：直接读取 str 的 PEP 393 紧凑缓冲区（latin-1、UCS-2 或 UCS-4）测量显示宽度，
+ * 不拼接、不编码为 UTF-8，也不经 ctypes 转换参数。宽度规则与 column_entry.c 的 cell_width 逐一对应：
+ * ANSI CSI 序列不占宽度，C0/C1 控制字符各计 1 列，其余字符交给 C 库 wcwidth。
+ * 孤立代理项在 ctypes 路径中编码为 '?'，这里同样计 1 列。
+ * 含 ZWJ、VS16、emoji 肤色修饰符（wcswidth 按上下文计算）或 wcwidth 返回负数的字符的单元格，
+ * 宽度记为 WIDTH_DEFERRED，由 Python 端改用 wcswidth 测量。
+ */
+
+#define WIDTH_DEFERRED ((size_t)-1)
+
+static int is_context_codepoint(Py_UCS4 codepoint)
+{
+	return codepoint == 0x200D || codepoint == 0xFE0F || (codepoint >= 0x1F3FB && codepoint <= 0x1F3FF);
+}
+
+static size_t text_width(PyObject *text)
+{
+	int kind = PyUnicode_KIND(text);
+	const void *data = PyUnicode_DATA(text);
+	Py_ssize_t length = PyUnicode_GET_LENGTH(text);
+	Py_ssize_t index = 0;
+	size_t width = 0;
+
+	/* 纯 ASCII 且不含 ESC：每个字符恰好 1 列 */
+	if (PyUnicode_IS_ASCII(text) && memchr(data, 0x1B, (size_t)length) == NULL)
+		return (size_t)length;
+
+	while (index < length) {
+		Py_UCS4 codepoint = PyUnicode_READ(kind, data, index);
+
+		/* ANSI CSI 序列（ESC [ 参数 中间字节 结束字节），规则同 Python 端 ANSI_ESCAPE_PATTERN */
+		if (codepoint == 0x1B && index + 1 < length && PyUnicode_READ(kind, data, index + 1) == '[') {
+			Py_ssize_t end = index + 2;
+
+			while (end < length && PyUnicode_READ(kind, data, end) >= 0x30 && PyUnicode_READ(kind, data, end) <= 0x3F)
+				end++;
+			while (end < length && PyUnicode_READ(kind, data, end) >= 0x20 && PyUnicode_READ(kind, data, end) <= 0x2F)
+				end++;
+			if (end < length && PyUnicode_READ(kind, data, end) >= 0x40 && PyUnicode_READ(kind, data, end) <= 0x7E) {
+				index = end + 1;
+				continue;
+			}
+		}
+
+		/* 可打印 ASCII 的 wcwidth 恒为 1，与 C0/C1 控制字符一并计 1 列 */
+		if (codepoint <= 0x9F || (codepoint >= 0xD800 && codepoint <= 0xDFFF))
+			width++;
+		else {
+			int column = is_context_codepoint(codepoint) ? -1 : wcwidth((wchar_t)codepoint);
+
+			if (column < 0)
+				return WIDTH_DEFERRED;
+			width += (size_t)column;
+		}
+		index++;
+	}
+	return width;
+}
+
+static int get_size_buffer(PyObject *object, Py_buffer *view, Py_ssize_t minimum_length, const char *name)
+{
+	if (PyObject_GetBuffer(object, view, PyBUF_WRITABLE | PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) < 0)
+		return -1;
+	if (view->itemsize != (Py_ssize_t)sizeof(size_t) || view->len / view->itemsize < minimum_length) {
+		/* 格式串只能是 ASCII，中文经 %s 按 UTF-8 解码 */
+		PyErr_Format(PyExc_ValueError, "%s%s%zd%s", name, " 必须是至少 ", minimum_length, " 个 size_t 的可写缓冲区");
+		PyBuffer_Release(view);
+		return -1;
+	}
+	return 0;
+}
+
+PyDoc_STRVAR(measure_doc,
+	"measure(cells, widths, maximums=None)\n"
+	"--\n"
+	"\n"
+	"把 cells 中每个 str 的显示宽度写入 widths（元素大小为 size_t 的可写缓冲区，如 array('Q')）。\n"
+	"传入 maximums 时按 len(maximums) 列把单元格视为按行展开，同时写入各列最大宽度。");
+
+static PyObject *measure(PyObject *module, PyObject *args, PyObject *keywords)
+{
+	static char *keyword_names[] = {"cells", "widths", "maximums", NULL};
+	PyObject *cells_object;
+	PyObject *widths_object;
+	PyObject *maximums_object = Py_None;
+	PyObject *cells;
+	Py_buffer widths_view;
+	Py_buffer maximums_view = {0};
+	size_t *widths;
+	size_t *maximums = NULL;
+	size_t column_count = 0;
+	size_t column_index = 0;
+	Py_ssize_t cell_count;
+
+	(void)module;
+	if (!PyArg_ParseTupleAndKeywords(
+		    args, keywords, "OO|O:measure", keyword_names, &cells_object, &widths_object, &maximums_object))
+		return NULL;
+	cells = PySequence_Fast(cells_object, "cells 必须是字符串序列");
+	if (cells == NULL)
+		return NULL;
+	cell_count = PySequence_Fast_GET_SIZE(cells);
+	if (get_size_buffer(widths_object, &widths_view, cell_count, "widths") < 0) {
+		Py_DECREF(cells);
+		return NULL;
+	}
+	if (maximums_object != Py_None) {
+		if (get_size_buffer(maximums_object, &maximums_view, 1, "maximums") < 0)
+			goto error;
+		column_count = (size_t)(maximums_view.len / maximums_view.itemsize);
+		maximums = maximums_view.buf;
+		memset(maximums, 0, column_count * sizeof(*maximums));
+	}
+
+	widths = widths_view.buf;
+	for (Py_ssize_t index = 0; index < cell_count; index++) {
+		PyObject *cell = PySequence_Fast_GET_ITEM(cells, index);
+		size_t width;
+
+		if (!PyUnicode_Check(cell)) {
+			PyErr_Format(PyExc_TypeError, "%s%zd%s", "第 ", index + 1, " 个单元格必须是 str");
+			goto error;
+		}
+		if (PyUnicode_READY(cell) < 0)
+			goto error;
+		width = text_width(cell);
+		widths[index] = width;
+		if (maximums != NULL) {
+			if (width > maximums[column_index])
+				maximums[column_index] = width;
+			if (++column_index == column_count)
+				column_index = 0;
+		}
+	}
+
+	if (maximums != NULL)
+		PyBuffer_Release(&maximums_view);
+	PyBuffer_Release(&widths_view);
+	Py_DECREF(cells);
+	Py_RETURN_NONE;
+
+error:
+	if (maximums_view.obj != NULL)
+		PyBuffer_Release(&maximums_view);
+	PyBuffer_Release(&widths_view);
+	Py_DECREF(cells);
+	return NULL;
+}
+
+PyDoc_STRVAR(reduce_doc,
+	"reduce(widths, maximums)\n"
+	"--\n"
+	"\n"
+	"按 len(maximums) 列把 widths（元素大小为 size_t 的缓冲区）视为按行展开，把各列最大宽度写入 maximums。");
+
+static PyObject *reduce(PyObject *module, PyObject *args)
+{
+	PyObject *widths_object;
+	PyObject *maximums_object;
+	Py_buffer widths_view;
+	Py_buffer maximums_view;
+	const size_t *widths;
+	size_t *maximums;
+	size_t count;
+	size_t column_count;
+	size_t column_index = 0;
+
+	(void)module;
+	if (!PyArg_ParseTuple(args, "OO:reduce", &widths_object, &maximums_object))
+		return NULL;
+	if (get_size_buffer(widths_object, &widths_view, 0, "widths") < 0)
+		return NULL;
+	if (get_size_buffer(maximums_object, &maximums_view, 1, "maximums") < 0) {
+		PyBuffer_Release(&widths_view);
+		return NULL;
+	}
+	widths = widths_view.buf;
+	count = (size_t)(widths_view.len / widths_view.itemsize);
+	maximums = maximums_view.buf;
+	column_count = (size_t)(maximums_view.len / maximums_view.itemsize);
+	memset(maximums, 0, column_count * sizeof(*maximums));
+	Py_BEGIN_ALLOW_THREADS
+	for (size_t index = 0; index < count; index++) {
+		if (widths[index] > maximums[column_index])
+			maximums[column_index] = widths[index];
+		if (++column_index == column_count)
+			column_index = 0;
+	}
+	Py_END_ALLOW_THREADS
+	PyBuffer_Release(&maximums_view);
+	PyBuffer_Release(&widths_view);
+	Py_RETURN_NONE;
+}
+
+static PyMethodDef widths_methods[] = {
+	{"measure", (PyCFunction)(void (*)(void))measure, METH_VARARGS | METH_KEYWORDS, measure_doc},
+	{"reduce", reduce, METH_VARARGS, reduce_doc},
+	{NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef widths_module = {
+	PyModuleDef_HEAD_INIT,
+	.m_name = "_widths",
+	.m_doc = "直接读取 str 内部缓冲区批量测量显示宽度。",
+	.m_size = 0,
+	.m_methods = widths_methods,
+};
+
+PyMODINIT_FUNC PyInit__widths(void)
+{
+	return PyModule_Create(&widths_module);
+}
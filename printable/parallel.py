@@ -0,0 +1,355 @@
+"""大文件的多进程分块解析。
+
+普通 CSV 与 JSON Lines 文件按记录边界切成若干块：CSV 依据块前引号字符个数的奇偶判断换行是否位于带引号的字段内，
+JSON Lines 直接在换行处切分。进程池中的子进程各自解析一块，完成单元格清理、非条形图列的宽度测量与条形图列的
+数值解析；主进程只合并表头、归并列宽与条形图最大值，再按块的原始顺序输出。
+"""
+
+import codecs
+import csv
+import io
+import itertools
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import (
+    RENDER_MANY_OPTIONS,
+    SHAPE_SAMPLE_ROWS,
+    _calc_widths,
+    _choose_auto_engine,
+    _column,
+    _engine_args,
+    _iter_table_lines,
+    _report_engine,
+    _table_layout,
+    _validate_render_options,
+    column_available,
+    detect_file_format,
+    normalize_cell_value,
+    read_csv,
+    read_json,
+    read_jsonl,
+    read_yaml,
+    render_with_engine,
+    validate_headers,
+)
+from ._records import (
+    _bar_maximum,
+    _csv_options,
+    _draw_bars,
+    _iter_csv_rows,
+    _iter_json_lines_buffer,
+    _iter_mapping_records,
+    _parse_bar_values,
+    _record_columns,
+)
+
+# 每块至少包含的字节数；文件不足两块时直接串行解析，进程池的启动与结果回传不值得
+PARALLEL_MIN_CHUNK_SIZE = 4 << 20
+# 每个进程分到的块数；块越多，各块解析耗时不均时的负载越均衡
+CHUNKS_PER_JOB = 4
+# 追加在 CSV 块文本之后的哨兵行（不含分隔符、引号与换行）：块在记录边界结束时 csv.reader 把它读成单独的一行，
+# 块结束于带引号的字段内部时哨兵并入该字段
+CHUNK_END_SENTINEL = '\ufffe'
+
+_SERIAL_READERS = {'json': read_json, 'jsonl': read_jsonl, 'csv': read_csv, 'yaml': read_yaml}
+
+
+def _read_range(path, start, end):
+    """读取文件中 [start, end) 的字节。"""
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return mapped[start:end]
+
+
+def _count_segment(task):
+    """子进程：统计一段字节中引号字符与换行符的个数。"""
+    path, start, end, quote = task
+    data = _read_range(path, start, end)
+    return (data.count(quote) if quote else 0), data.count(b'\n')
+
+
+def _record_end(mapped, position, in_quotes, quote):
+    """从 position 起找到第一个不在引号内的换行，返回其后一字节的偏移；找不到时返回文件长度。"""
+    while True:
+        newline = mapped.find(b'\n', position)
+        if newline < 0:
+            return len(mapped)
+        if quote:
+            in_quotes ^= mapped[position:newline].count(quote) & 1
+        if not in_quotes:
+            return newline + 1
+        position = newline + 1
+
+
+def _split_chunks(path, mapped, start, start_line, chunk_count, quote, executor):
+    """把 [start, 文件末尾) 切成至多 chunk_count 块，返回 [(起点, 终点, 起点之前的行数)]。
+
+    先由进程池统计等分各段的引号与换行个数，再在每个等分点之后找到第一个不在引号内的换行作为块边界。
+    start 须位于记录边界且其前引号个数为偶数。按引号个数的奇偶判断只是估计：未加引号的字段中的引号
+    是普通字符，会使奇偶反转，因此子进程解析时还要核对块是否恰好结束在记录边界（见 _prepare_chunk）。
+    """
+    size = len(mapped)
+    step = (size - start) // chunk_count
+    offsets = [start + index * step for index in range(chunk_count)] + [size]
+    tasks = [(path, segment_start, segment_end, quote) for segment_start, segment_end in zip(offsets, offsets[1:])]
+    counts = list(executor.map(_count_segment, tasks))
+
+    boundaries = [(start, start_line)]
+    quotes_before, lines_before = 0, start_line
+    for offset, (quote_count, line_count) in zip(offsets[1:-1], counts):
+        quotes_before += quote_count
+        lines_before += line_count
+        end = _record_end(mapped, offset, quotes_before & 1, quote)
+        # 等分点落在同一条长记录内时，相邻块的边界会重合，只保留一个
+        if boundaries[-1][0] < end < size:
+            boundaries.append((end, lines_before + mapped[offset:end].count(b'\n')))
+    ends = [end for end, _ in boundaries[1:]] + [size]
+    return [(chunk_start, chunk_end, line_base) for (chunk_start, line_base), chunk_end in zip(boundaries, ends)]
+
+
+def _prepare_chunk(task, record_base=0):
+    """子进程：解析一块记录并按列预处理。
+
+    返回（块内表头, 行数, {表头: (文本列表, 宽度列表)}, {表头: (文本列表, 条形数值, 最大缩放值)}）；
+    条形图列要等主进程归并出全列最大值后才能绘制，这里只解析数值。record_base 为块前的记录数，
+    只影响出错记录的序号：行号由块前的行数得出，记录数要等前面各块解析完才知道。
+    CSV 块（末块除外）结束于带引号的字段内部时，说明块边界不在记录边界上，返回 None。
+    """
+    file_type, path, start, end, line_base, headers, options = task
+    data = _read_range(path, start, end)
+    if file_type == 'csv':
+        delimiter, quotechar, _ = _csv_options()
+        final = end >= os.path.getsize(path)
+        text = str(data, 'utf-8') if final else str(data, 'utf-8') + CHUNK_END_SENTINEL
+        reader = csv.reader(io.StringIO(text, newline=''), delimiter=delimiter, quotechar=quotechar)
+        records = list(_iter_csv_rows(reader, len(headers), line_base))
+        # 前一块都结束在记录边界时本块从记录边界开始，解析与串行读取一致；本块同样结束在记录边界，
+        # 当且仅当哨兵被读成单独的最后一行
+        if not final:
+            if not records or records[-1] != [CHUNK_END_SENTINEL]:
+                return None
+            records.pop()
+    else:
+        records = list(_iter_mapping_records(_iter_json_lines_buffer(data, line_base), record_base + 1))
+        headers = list(dict.fromkeys(key for record in records for key in record))
+    del data
+
+    bars, keep_ansi, markdown = options['bars'], options['keep_ansi'], options['markdown']
+    text_columns = {}
+    bar_columns = {}
+    for header, values in zip(headers, _record_columns(records, headers)):
+        if header in bars:
+            texts, scale_numbers, bar_numbers = _parse_bar_values(values, keep_ansi)
+            bar_columns[header] = (texts, bar_numbers, _bar_maximum(scale_numbers, options['bar_scale']))
+        else:
+            texts = [normalize_cell_value(value, keep_ansi) for value in values]
+            if markdown:
+                texts = [text.replace('|', '\\|') for text in texts]
+            text_columns[header] = (texts, _calc_widths(texts))
+    return headers, len(records), text_columns, bar_columns
+
+
+def _prepare_chunks(tasks, executor):
+    """在进程池中解析各块，按块顺序返回结果。
+
+    子进程中的记录序号从块首算起；某块出错时，按前面各块的记录数在本进程重新解析该块，
+    报出与串行读取一致的记录序号。某块的边界不在记录边界上时返回 None，由调用方改为串行读取；
+    其后各块的起点随之错位，它们的结果与错误都不再使用。
+    """
+    results = []
+    chunk_results = executor.map(_prepare_chunk, tasks)
+    for task in tasks:
+        try:
+            result = next(chunk_results)
+        except (TypeError, ValueError):
+            _prepare_chunk(task, sum(result[1] for result in results))
+            raise
+        if result is None:
+            return None
+        results.append(result)
+    return results
+
+
+def _split_file(path, file_type, chunk_count, executor):
+    """返回（CSV 表头或 None, [(起点, 终点, 起点之前的行数)]）；文件不适合切分时返回 None。"""
+    quote = b''
+    if file_type == 'csv':
+        _, quotechar, encoding = _csv_options()
+        # 块边界按字节查找换行与引号，要求编码与 UTF-8 兼容且引号是单字节字符
+        if codecs.lookup(encoding).name not in ('utf-8', 'utf-8-sig') or not quotechar.isascii():
+            return None
+        quote = quotechar.encode('ascii')
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if file_type == 'jsonl':
+            # 首条记录不是字典时按二维表格处理，表头在首行，交给串行路径
+            first_line = mapped[: mapped.find(b'\n', 0, 1 << 16)].decode('utf-8', 'replace')
+            if not first_line.lstrip('\ufeff \t\r').startswith('{'):
+                return None
+            return None, _split_chunks(path, mapped, 0, 0, chunk_count, quote, executor)
+
+        header_end = _record_end(mapped, 0, False, quote)
+        delimiter, quotechar, encoding = _csv_options()
+        header_text = str(mapped[:header_end], encoding)
+        headers = next(csv.reader(io.StringIO(header_text, newline=''), delimiter=delimiter, quotechar=quotechar), None)
+        if headers is None or header_end == len(mapped):
+            return None
+        headers = validate_headers(headers)
+        return headers, _split_chunks(path, mapped, header_end, header_text.count('\n'), chunk_count, quote, executor)
+
+
+def render_file_parallel(path, file_type=None, jobs=None, engine='auto', **options):
+    """用多个进程解析一个大 CSV 或 JSON Lines 文件并渲染为表格，返回输出行的迭代器。
+
+    options 与 render_many 相同；输出与串行读取后渲染逐字节一致。jobs 为进程数，默认使用全部 CPU。
+    JSON、YAML、设置了 limit 或不足两块的文件退回串行读取；数据行的格式化同样按 jobs 分块并行。
+    """
+    unknown_options = set(options) - RENDER_MANY_OPTIONS
+    if unknown_options:
+        raise TypeError(f'不支持的渲染选项: {", ".join(sorted(unknown_options))}')
+    if jobs is not None and jobs <= 0:
+        raise ValueError('jobs 必须为正数')
+    grid = options.get('grid')
+    bar_char = options.get('bar_char', 'x')
+    bar_width = options.get('bar_width', 100)
+    bar_scale = options.get('bar_scale', 'linal')
+    keep_ansi = options.get('keep_ansi', False)
+    _validate_render_options(grid, bar_scale, bar_width, options.get('limit'))
+
+    file_type = file_type or detect_file_format(path)
+    jobs = jobs or os.cpu_count() or 1
+    chunk_count = min(jobs * CHUNKS_PER_JOB, os.path.getsize(path) // PARALLEL_MIN_CHUNK_SIZE)
+
+    def serial_lines():
+        data = _SERIAL_READERS[file_type](path)
+        engine_args = _engine_args(engine, options)
+        engine_args.jobs = jobs
+        return render_with_engine(data, engine_args)
+
+    if file_type not in ('csv', 'jsonl') or options.get('limit') is not None or jobs == 1 or chunk_count < 2:
+        return serial_lines()
+
+    # engine=auto 时要等各块解析完、知道表格形状后才选定引擎
+    choose_engine = engine == 'auto' and column_available()
+    use_column = engine == 'column'
+    chunk_options = {
+        'bars': set(options.get('bars') or []),
+        'bar_scale': bar_scale,
+        'keep_ansi': keep_ansi,
+        # column 引擎在原生格式化时自行转义 Markdown 列分隔符；引擎未定时先不转义，选中 python 后再补上
+        'markdown': grid == 'markdown' and not use_column and not choose_engine,
+    }
+    with ProcessPoolExecutor(jobs) as executor:
+        split = _split_file(path, file_type, chunk_count, executor)
+        if split is None:
+            return serial_lines()
+        headers, chunks = split
+        tasks = [(file_type, path, start, end, line_base, headers, chunk_options) for start, end, line_base in chunks]
+        results = _prepare_chunks(tasks, executor)
+        if results is None:
+            return serial_lines()
+
+    if headers is None:
+        merged_headers = dict.fromkeys(itertools.chain.from_iterable(result[0] for result in results))
+        if not merged_headers:
+            return iter(())
+        headers = validate_headers(merged_headers)
+    if choose_engine:
+        _, engine, reason = _choose_auto_engine(None, None, _chunks_shape(headers, results))
+        use_column = engine == 'column'
+        if not use_column and grid == 'markdown':
+            chunk_options['markdown'] = True
+            _escape_markdown_columns(results)
+    elif engine == 'auto':
+        engine, reason = 'python', 'column 动态库不可用'
+    else:
+        reason = '由 engine 参数指定'
+    _report_engine(engine, reason)
+    return _merge_chunks(
+        headers,
+        results,
+        use_column,
+        grid,
+        options.get('col_sep'),
+        options.get('row_sep'),
+        chunk_options,
+        bar_char,
+        bar_width,
+        keep_ansi,
+        jobs,
+    )
+
+
+def _chunks_shape(headers, results):
+    """按各块的解析结果返回（行数, 列数, 非 ASCII 单元格数的估计），口径与 _table_shape 相同：行数含表头行，
+    非 ASCII 单元格数按表头与首块前 SHAPE_SAMPLE_ROWS 行中的比例推算。
+    """
+    row_count = sum(result[1] for result in results) + 1
+    sample = list(headers)
+    _, _, text_columns, bar_columns = results[0]
+    for texts, *_ in itertools.chain(text_columns.values(), bar_columns.values()):
+        sample.extend(texts[:SHAPE_SAMPLE_ROWS])
+    non_ascii = sum(not cell.isascii() for cell in sample)
+    return row_count, len(headers), row_count * len(headers) * non_ascii / len(sample)
+
+
+def _escape_markdown_columns(results):
+    """为 python 引擎转义各块文本列中的 Markdown 列分隔符，并重新测量含有分隔符的列。"""
+    for _, _, text_columns, _ in results:
+        for header, (texts, _) in text_columns.items():
+            if '|' in ''.join(texts):
+                texts = [text.replace('|', '\\|') for text in texts]
+                text_columns[header] = (texts, _calc_widths(texts))
+
+
+def _merge_chunks(
+    headers, results, use_column, grid, col_sep, row_sep, chunk_options, bar_char, bar_width, keep_ansi, jobs
+):
+    """归并各块的条形图最大值与列宽，按块顺序输出表格行；数据行同样交给 jobs 个进程分块格式化。"""
+    bar_scale = chunk_options['bar_scale']
+    maximums = {}
+    for _, _, _, bar_columns in results:
+        for header, (_, _, maximum) in bar_columns.items():
+            maximums[header] = max(maximums.get(header, 0.0), maximum)
+
+    chunk_columns = []
+    header_widths = _calc_widths(headers)
+    widths = list(header_widths)
+    for _, row_count, text_columns, bar_columns in results:
+        texts_by_column = []
+        widths_by_column = []
+        for index, header in enumerate(headers):
+            if header in text_columns:
+                texts, cell_widths = text_columns[header]
+            elif header in bar_columns:
+                texts, bar_numbers, _ = bar_columns[header]
+                _draw_bars(texts, bar_numbers, maximums[header], bar_char, bar_width, bar_scale)
+                if chunk_options['markdown']:
+                    texts = [text.replace('|', '\\|') for text in texts]
+                cell_widths = _calc_widths(texts)
+            else:
+                # 字典记录中该块缺少的列
+                texts = [''] * row_count
+                cell_widths = [0] * row_count
+            texts_by_column.append(texts)
+            widths_by_column.append(cell_widths)
+            widths[index] = max(widths[index], max(cell_widths, default=0))
+        chunk_columns.append((texts_by_column, widths_by_column))
+    row_total = sum(result[1] for result in results)
+
+    if use_column:
+        cells = list(headers)
+        cell_widths = list(header_widths)
+        for texts_by_column, widths_by_column in chunk_columns:
+            cells.extend(itertools.chain.from_iterable(zip(*texts_by_column)))
+            cell_widths.extend(itertools.chain.from_iterable(zip(*widths_by_column)))
+        output = _column().format_cells(cells, len(headers), _table_layout(grid, col_sep, row_sep), cell_widths)
+        return iter(output.split('\n') if output else ())
+
+    body = itertools.chain.from_iterable(
+        zip(zip(*texts_by_column), zip(*widths_by_column)) for texts_by_column, widths_by_column in chunk_columns
+    )
+    return _iter_table_lines(
+        headers, header_widths, body, row_total > 0, widths, grid, col_sep, row_sep, ' ', ' ', keep_ansi, jobs
+    )
@@ -0,0 +1,143 @@
+"""按阶段记录渲染耗时、行数与单元格数、输入输出字节数、宽度计算后端与内存峰值。
+
+阶段可以嵌套（读取在规范化期间按需进行，格式化在写出期间按需进行），每个阶段只记录自身耗时：
+内层阶段的耗时从外层扣除，各阶段耗时之和不超过总耗时。宽度后端与宽度缓存的计数取自进程级计数器在
+渲染前后的差值，同一进程中并发渲染时会相互计入。
+"""
+
+import json
+import time
+
+from . import _width_counters
+
+STAGE_FIELDS = ('seconds', 'calls', 'rows', 'cells', 'bytes_in', 'bytes_out', 'peak_memory')
+
+
+class _Stage:
+    """profile.stage() 返回的上下文管理器，进入时开始计时，退出时把自身耗时计入阶段统计。"""
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+        self.child_seconds = 0.0
+        self.peak_memory = 0
+
+    def __enter__(self):
+        profile = self.profile
+        if profile.trace_memory:
+            import tracemalloc
+
+            # 外层阶段到目前为止的峰值先记下，再为本阶段重新统计峰值
+            if profile._stack:
+                parent = profile._stack[-1]
+                parent.peak_memory = max(parent.peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        profile._stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        profile = self.profile
+        elapsed = time.perf_counter() - self.started
+        profile._stack.pop()
+        if profile._stack:
+            profile._stack[-1].child_seconds += elapsed
+        record = profile._record(self.name)
+        record['seconds'] += elapsed - self.child_seconds
+        record['calls'] += 1
+        if profile.trace_memory:
+            import tracemalloc
+
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+            record['peak_memory'] = max(record['peak_memory'] or 0, self.peak_memory)
+            # 内层的峰值同样是外层的峰值
+            if profile._stack:
+                parent = profile._stack[-1]
+                parent.peak_memory = max(parent.peak_memory, self.peak_memory)
+        profile.finished = time.perf_counter()
+        return False
+
+
+class RenderProfile:
+    """一次渲染的分阶段统计。
+
+    传给 iter_readable(profile=...)、render_column_data 与 render_with_engine（args.profile）后，
+    渲染过程按阶段填入 read、normalize、convert、widths、format、write 等记录；as_dict() 返回可直接
+    序列化为 JSON 的字典。trace_memory=True 时用 tracemalloc 记录各阶段期间被跟踪内存的峰值（字节），
+    会明显拖慢 Python 代码，native 代码中的分配不计入；否则 peak_memory 为 None。
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.engine = None
+        self.engine_reason = None
+        self._stack = []
+        self._width_counters = _width_counters()
+        if trace_memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        self.started = self.finished = time.perf_counter()
+
+    def _record(self, name):
+        record = self.stages.get(name)
+        if record is None:
+            record = self.stages[name] = dict.fromkeys(STAGE_FIELDS, 0)
+            record['seconds'] = 0.0
+            record['peak_memory'] = None
+        return record
+
+    def stage(self, name):
+        """返回记录阶段 name 的上下文管理器。"""
+        return _Stage(self, name)
+
+    def iterate(self, name, iterable, count_rows=True):
+        """逐项产出 iterable，每次取下一项的耗时计入阶段 name；count_rows 为真时项数计入 rows。"""
+        iterator = iter(iterable)
+        record = self._record(name)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            if count_rows:
+                record['rows'] += 1
+            yield item
+
+    def count(self, name, **counts):
+        """把 rows、cells、bytes_in、bytes_out 等计数累加到阶段 name。"""
+        record = self._record(name)
+        for field, value in counts.items():
+            record[field] += value
+
+    def set_engine(self, engine, reason):
+        """记录 render_with_engine 选用的引擎与原因。"""
+        self.engine = engine
+        self.engine_reason = reason
+
+    def as_dict(self):
+        """返回统计结果；widths 为创建以来各宽度后端测量的单元格数、退回纯 Python 的次数与宽度缓存命中数。"""
+        current = _width_counters()
+        widths = {key: current[key] - self._width_counters[key] for key in current}
+        backends = {key.removesuffix('_cells'): value for key, value in widths.items() if key.endswith('_cells')}
+        peaks = [record['peak_memory'] for record in self.stages.values() if record['peak_memory'] is not None]
+        return {
+            'engine': self.engine,
+            'engine_reason': self.engine_reason,
+            'total_seconds': self.finished - self.started,
+            'peak_memory': max(peaks) if peaks else None,
+            'stages': {name: dict(record) for name, record in self.stages.items()},
+            'widths': {
+                'backends': backends,
+                'native_fallbacks': widths['native_fallbacks'],
+                'cache_hits': widths['cache_hits'],
+                'cache_misses': widths['cache_misses'],
+            },
+        }
+
+    def to_json(self):
+        """以单行 JSON 返回 as_dict() 的结果。"""
+        return json.dumps(self.as_dict(), ensure_ascii=False)
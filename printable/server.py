@@ -0,0 +1,285 @@
+"""本地渲染服务：printable serve 常驻监听 Unix 套接字，printable --via-socket 把一次调用转交给它。
+
+服务进程启动时导入 argparse、csv、json、yaml 等模块，并预先加载 column 动态库、_widths 扩展与宽度模式。
+每个请求由 fork 出的子进程处理：子进程继承这些已加载的状态，换上客户端的参数、环境变量与工作目录后直接调用 main()。
+客户端不转发输入与输出的内容，而是用 SCM_RIGHTS 传递自己的标准输入、输出与错误的文件描述符。
+子进程读写的就是客户端的管道或终端，输出边生成边写出；子进程结束后，服务把退出码回传给客户端。
+"""
+
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+
+from . import _engine_args, _width_patterns, _yaml_loader, column_available, main, native_widths_of, render_with_engine
+
+# 请求头的长度前缀：网络字节序的 32 位无符号整数
+_LENGTH = struct.Struct('!I')
+# 请求头大小上限，防止异常的客户端让服务分配过多内存
+MAX_REQUEST_SIZE = 1 << 20
+# 对端凭据：Linux SO_PEERCRED 的 struct ucred（pid、uid、gid）与 macOS LOCAL_PEERCRED 的 struct xucred
+_UCRED = struct.Struct('3i')
+_XUCRED = struct.Struct('IIh16I')
+_SOL_LOCAL, _LOCAL_PEERCRED = 0, 1
+
+
+def _private_directory(path):
+    """创建只有当前用户可访问的目录（0700）；已存在时核对它是当前用户所有、不是符号链接且他人无权访问。"""
+    with contextlib.suppress(FileExistsError):
+        os.mkdir(path, 0o700)
+    status = os.lstat(path)
+    if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid() or status.st_mode & 0o077:
+        raise PermissionError(f'{path} 不是当前用户私有的目录')
+    return path
+
+
+def default_socket_path():
+    """返回默认套接字路径：PRINTABLE_SOCKET，其次是 $XDG_RUNTIME_DIR/printable.sock，最后是 /tmp 下按用户区分的私有目录。
+
+    /tmp 下的文件名可以被其他用户抢先占用，因此套接字放在 0700 的目录中，使用前核对目录的所有者与权限。
+    """
+    path = os.getenv('PRINTABLE_SOCKET')
+    if path:
+        return path
+    runtime_directory = os.getenv('XDG_RUNTIME_DIR')
+    if runtime_directory:
+        return os.path.join(runtime_directory, 'printable.sock')
+    return os.path.join(_private_directory(f'/tmp/printable-{os.getuid()}'), 'printable.sock')
+
+
+def _peer_uid(connection):
+    """返回 Unix 套接字对端进程的用户 ID。"""
+    if sys.platform == 'darwin':
+        credentials = connection.getsockopt(_SOL_LOCAL, _LOCAL_PEERCRED, _XUCRED.size)
+        return _XUCRED.unpack(credentials)[1]
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _UCRED.size)
+    return _UCRED.unpack(credentials)[1]
+
+
+def _receive_exactly(connection, size):
+    """从套接字读取恰好 size 个字节；对端提前关闭时抛出 ConnectionError。"""
+    chunks = []
+    while size > 0:
+        chunk = connection.recv(min(size, 1 << 16))
+        if not chunk:
+            raise ConnectionError('连接在请求读完之前关闭')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def forward(arguments, path=None):
+    """把一次命令行调用转交给渲染服务并等待其完成，返回退出码；服务不可用时返回 None。
+
+    arguments 为不含程序名与 --via-socket 的参数列表；标准输入、输出与错误以文件描述符的形式交给服务。
+    请求中带有全部环境变量，因此只在确认对端进程属于当前用户后才发送。
+    """
+    request = json.dumps(
+        {
+            'argv': [sys.argv[0], *arguments],
+            'cwd': os.getcwd(),
+            'env': dict(os.environ),
+            'encoding': sys.stdout.encoding,
+            'errors': sys.stdout.errors,
+        }
+    ).encode('utf-8')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        try:
+            connection.connect(path or default_socket_path())
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        except PermissionError as error:
+            print(f'错误: 无法连接渲染服务: {error}', file=sys.stderr)
+            return 1
+        if _peer_uid(connection) != os.getuid():
+            print('错误: 渲染服务不属于当前用户，已拒绝转交请求', file=sys.stderr)
+            return 1
+        # 先写出本进程已缓冲的输出，保证与服务写入的内容顺序一致
+        sys.stdout.flush()
+        sys.stderr.flush()
+        socket.send_fds(connection, [_LENGTH.pack(len(request)) + request], [0, 1, 2])
+        connection.shutdown(socket.SHUT_WR)
+        status = connection.recv(1)
+    if not status:
+        print('错误: 渲染服务在请求完成前退出', file=sys.stderr)
+        return 1
+    return status[0]
+
+
+def _exit_code(code):
+    """把 SystemExit.code 换算为进程退出码。"""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _run_request(request, descriptors):
+    """在 fork 出的子进程中执行一次请求：换上客户端的文件描述符、环境与工作目录后调用 main()。"""
+    for target, descriptor in enumerate(descriptors):
+        os.dup2(descriptor, target)
+    sys.stdin = open(0, 'r', closefd=False)
+    sys.stdout = open(1, 'w', encoding=request['encoding'], errors=request['errors'], closefd=False)
+    sys.stderr = open(2, 'w', encoding=request['encoding'], errors='backslashreplace', closefd=False)
+    os.environ.clear()
+    os.environ.update(request['env'])
+    sys.argv = request['argv']
+    # DEBUG 在导入时读取，这里按客户端的环境重新设置
+    sys.modules[__package__].DEBUG = os.getenv('DEBUG')
+    # auto 引擎的代价系数按客户端的 PRINTABLE_CALIBRATION 重新读取
+    calibration = sys.modules.get(f'{__package__}.calibration')
+    if calibration is not None:
+        calibration.load_engine_costs.cache_clear()
+
+    try:
+        os.chdir(request['cwd'])
+        # 子进程只渲染一次调用，不能在其中再启动一个服务
+        if sys.argv[1:2] == ['serve']:
+            print('错误: serve 不能通过 --via-socket 转交', file=sys.stderr)
+            code = 2
+        else:
+            main()
+            code = 0
+    except SystemExit as error:
+        code = _exit_code(error.code)
+    except Exception as error:
+        print(f'错误: {error}', file=sys.stderr)
+        code = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except OSError:
+        pass
+    return code
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """读取请求头与客户端的文件描述符，执行请求并回传一个字节的退出码。"""
+
+    def handle(self):
+        message, descriptors, _, _ = socket.recv_fds(self.request, 1 << 16, 3)
+        try:
+            if len(descriptors) != 3 or len(message) < _LENGTH.size:
+                return
+            (size,) = _LENGTH.unpack_from(message)
+            if size > MAX_REQUEST_SIZE:
+                return
+            payload = message[_LENGTH.size :]
+            if len(payload) < size:
+                payload += _receive_exactly(self.request, size - len(payload))
+            request = json.loads(payload)
+            code = _run_request(request, descriptors)
+        finally:
+            for descriptor in descriptors:
+                os.close(descriptor)
+        try:
+            self.request.sendall(bytes((code,)))
+        except OSError:
+            pass
+
+
+class RenderServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """每个请求 fork 一个子进程处理，请求之间并发执行，互不影响环境变量、工作目录与标准流。
+
+    子进程的内存随其退出而释放：宽度缓存只保留服务启动时预热写入的条目，各请求测得的宽度不会留给之后的请求。
+    """
+
+    # 子进程各自退出即可，服务关闭时不等待正在渲染的请求
+    block_on_close = False
+
+
+def warm_up():
+    """导入各读取器与渲染路径用到的模块，加载 native 库与宽度模式，使 fork 出的子进程无需再次初始化。
+
+    另外完整执行一次命令行渲染，让 argparse 与 csv 内部编译的正则表达式进入 re 的缓存。
+    """
+    import io
+    import subprocess  # noqa: F401
+    import tempfile
+
+    from . import parallel  # noqa: F401
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'warm-up.csv')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('名称,value\n表格,1\n')
+        arguments = sys.argv
+        sys.argv = [arguments[0], '-f', path]
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                main()
+        finally:
+            sys.argv = arguments
+    _yaml_loader()
+    _width_patterns()
+    native_widths_of(['表格', 'table'])
+    engines = ['python', 'column'] if column_available() else ['python']
+    for engine in engines:
+        for grid in (None, 'full'):
+            args = _engine_args(engine, {'grid': grid})
+            for _ in render_with_engine([['名称', 'value'], ['表格', 1]], args):
+                pass
+
+
+def _remove_stale_socket(path):
+    """套接字文件已存在时：有服务在监听则报错，否则删除残留的文件；文件属于其他用户、无权连接或删除时同样报错。"""
+    if not os.path.exists(path):
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except ConnectionRefusedError:
+                os.unlink(path)
+                return
+    except PermissionError:
+        raise ValueError(f'无权访问 {path}，该套接字可能属于其他用户') from None
+    raise ValueError(f'渲染服务已在 {path} 上运行')
+
+
+def serve(path=None):
+    """在 Unix 套接字 path 上运行渲染服务，直到收到 SIGINT 或 SIGTERM。"""
+    import signal
+
+    path = path or default_socket_path()
+    warm_up()
+    _remove_stale_socket(path)
+    # 套接字只允许当前用户连接：服务以调用者的文件描述符读写文件与终端
+    previous_umask = os.umask(0o077)
+    try:
+        server = RenderServer(path, _RequestHandler)
+    finally:
+        os.umask(previous_umask)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+def serve_main(arguments):
+    """printable serve 子命令的入口。"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='printable serve', description='常驻渲染服务，供 printable --via-socket 调用')
+    parser.add_argument('--socket', default=None, help='Unix 套接字路径，默认取 PRINTABLE_SOCKET 或用户运行目录')
+    args = parser.parse_args(arguments)
+    try:
+        serve(args.socket)
+    except Exception as error:
+        print(f'错误: {error}', file=sys.stderr)
+        sys.exit(1)
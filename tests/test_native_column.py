@@ -1,4 +1,9 @@
+import os
+import subprocess
+import sys
 import unittest
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from types import SimpleNamespace
 
 from wcwidth import wcswidth
@@ -13,6 +18,8 @@ from printable import (
     render_with_column,
     render_with_engine,
 )
+from printable.native import column as native_column
+from printable.native import new_width_array, widths_extension
 
 
 class NativeColumnTest(unittest.TestCase):
@@ -62,10 +69,26 @@ class NativeColumnTest(unittest.TestCase):
 
         self.assertEqual(output, readable([['name'], ['alpha']]))
 
-    def test_column_engine_rejects_grid_styles(self):
+    def test_native_formatter_matches_python_for_wide_cells(self):
+        rows = [['名称', 'value'], ['中文', 'é👍'], ['', 'a|b']]
+        for separator in ('', ' │ '):
+            try:
+                output = native_column.format_cells(
+                    [cell for row in rows for cell in row], 2, native_column.TableLayout(separator=separator)
+                )
+            except FileNotFoundError as error:
+                self.skipTest(str(error))
+
+            self.assertEqual(output, readable(rows, col_sep=separator))
+
+        with self.assertRaisesRegex(ValueError, '列数'):
+            native_column.format_cells(['a', 'b', 'c'], 2)
+
+    def test_column_engine_matches_python_for_grid_styles(self):
+        rows = [['name', 'note'], ['中文', 'a|b'], ['beta', '']]
         engine_args = SimpleNamespace(
             engine='column',
-            grid='full',
+            grid=None,
             sep_col=None,
             sep_row=None,
             bar=[],
@@ -75,8 +98,53 @@ class NativeColumnTest(unittest.TestCase):
             limit=None,
         )
 
-        with self.assertRaisesRegex(ValueError, '不能与 --grid 同时使用'):
-            render_with_engine([['name'], ['alpha']], engine_args)
+        for grid in ('full', 'inner', 'markdown'):
+            for limit in (None, 0):
+                engine_args.grid, engine_args.limit = grid, limit
+                try:
+                    output = '\n'.join(render_with_engine(rows, engine_args))
+                except FileNotFoundError as error:
+                    self.skipTest(str(error))
+
+                self.assertEqual(output, readable(rows, grid=grid, limit=limit))
+
+    def test_column_engine_matches_python_for_context_sequences(self):
+        # ZWJ、VS16 序列与 C locale 下的非 ASCII 字符，C 库 wcwidth 的结果都与 wcswidth 不同，排版须沿用 Python 宽度
+        rows = [['name', 'note'], ['❤️', '👩‍💻'], ['👍🏽', 'a\u2028b'], ['中文', 'a|b']]
+        engine_args = SimpleNamespace(
+            engine='column',
+            grid=None,
+            sep_col=None,
+            sep_row=None,
+            bar=[],
+            bar_char='o',
+            bar_width=100,
+            bar_scale='linal',
+            limit=None,
+        )
+
+        for grid in (None, 'full', 'markdown'):
+            engine_args.grid = grid
+            try:
+                output = '\n'.join(render_with_engine(rows, engine_args))
+            except FileNotFoundError as error:
+                self.skipTest(str(error))
+
+            self.assertEqual(output, readable(rows, grid=grid))
+
+        code = (
+            'from types import SimpleNamespace\n'
+            'from printable import readable, render_with_engine\n'
+            "rows = [['名称', 'x'], ['中', 'é']]\n"
+            "args = SimpleNamespace(engine='column', grid='full', sep_col=None, sep_row=None, bar=[], bar_char='o',\n"
+            "                       bar_width=100, bar_scale='linal', limit=None)\n"
+            "print('\\n'.join(render_with_engine(rows, args)) == readable(rows, grid='full'))"
+        )
+        environment = {**os.environ, 'LC_ALL': 'C'}
+        result = subprocess.run(
+            [sys.executable, '-c', code], env=environment, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout, 'True\n')
 
     def test_renders_with_structured_options(self):
         try:
@@ -91,6 +159,46 @@ class NativeColumnTest(unittest.TestCase):
 
         self.assertEqual(output, 'name \tvalue\nalpha\t1\n')
 
+    def test_concurrent_renders_are_isolated(self):
+        # 成功与出错的调用交错执行：各线程的标准流、getopt 状态与 exit 跳转点必须互不干扰
+        option_sets = (
+            {'table': True, 'separator': '\t'},
+            {'table': True, 'separator': '\t', 'output_separator': ' | '},
+            {'table': True, 'separator': '\t', 'table_right': 'value'},
+            {'table': True, 'table_columns_limit': 0},
+        )
+        tasks = [
+            (f'name\tvalue\nrow-{index}\t{"中" * (index % 5)}{index}\n', option_sets[index % len(option_sets)])
+            for index in range(256)
+        ]
+
+        def run(task):
+            text, options = task
+            try:
+                return render_with_column(text, **options)
+            except ColumnExecutionError as error:
+                return error.exit_code, str(error)
+
+        try:
+            expected = [run(task) for task in tasks]
+        except FileNotFoundError as error:
+            self.skipTest(str(error))
+
+        self.assertIsInstance(expected[3], tuple)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(4):
+                self.assertEqual(list(executor.map(run, tasks)), expected)
+
+    def test_repeated_option_sets_share_prepared_arrays(self):
+        items = ((b'table', None), (b'separator', b'\t'))
+        prepared = native_column._prepare_options(items, (b'a.tsv',))
+
+        self.assertIs(native_column._prepare_options(items, (b'a.tsv',)), prepared)
+        self.assertEqual(prepared.options.item_count, 2)
+        self.assertEqual(prepared.options.items[1].value, b'\t')
+        self.assertFalse(prepared.options.items[0].has_value)
+        self.assertEqual(prepared.options.input_files[0], b'a.tsv')
+
     def test_reports_column_exit_code(self):
         try:
             with self.assertRaises(ColumnExecutionError) as context:
@@ -105,7 +213,10 @@ class NativeColumnTest(unittest.TestCase):
             render_with_column('name\n', not_an_option=True)
 
     def test_native_widths_match_python_wcwidth(self):
+        # 含 VS16、ZWJ 与肤色修饰符的 emoji 序列由 wcswidth 按上下文计算，C 库 wcwidth 返回负数的字符（如 U+2028）
+        # 也与 wcswidth 不同，native 结果须与之一致
         samples = ['abc', '中文', 'a中b', '👍', 'é', '', '\x1b[31m红\x1b[0m', 'a\tb']
+        samples += ['❤\ufe0f', '👩\u200d💻', '\x1b[1m✌\ufe0f\x1b[0m', '👍🏽', 'a\u2028b', '🏽']
         visible = [ANSI_ESCAPE_PATTERN.sub('', normalize_cell_value(sample)) for sample in samples]
         native_widths = native_widths_of(visible)
         if native_widths is None:
@@ -115,12 +226,51 @@ class NativeColumnTest(unittest.TestCase):
         for text in visible:
             width = wcswidth(text)
             reference_widths.append(width if width >= 0 else len(text))
-        self.assertEqual(native_widths, reference_widths)
+        self.assertEqual(native_widths.tolist(), reference_widths)
+
+    def test_native_column_widths_reduce_per_column_maximums(self):
+        cells = ['名称', 'value', '中文', '\x1b[31m红\x1b[0m', '', 'a|b', 'é👍', '']
+        measured = native_column.column_widths_of(cells, 2)
+        if measured is None:
+            self.skipTest('column 动态库不可用')
+
+        cell_widths, column_widths = measured
+        self.assertEqual(cell_widths.tolist(), native_widths_of(cells).tolist())
+        self.assertEqual(column_widths.tolist(), [max(cell_widths[0::2]), max(cell_widths[1::2])])
+        with self.assertRaisesRegex(ValueError, '列数'):
+            native_column.column_widths_of(cells, 3)
+
+    def test_widths_extension_measures_str_buffers_in_place(self):
+        extension = widths_extension()
+        if extension is None:
+            self.skipTest('_widths 扩展未编译')
+
+        # 依次覆盖 latin-1、UCS-2、UCS-4 三种内部表示；\x1f 与孤立代理项不再影响单元格个数
+        cells = ['abc', 'é', '中文', 'é👍', '\x1b[31m红\x1b[0m', '', 'a\x1fb', '\ud800']
+        widths = new_width_array(len(cells))
+        maximums = new_width_array(2)
+        extension.measure(cells, widths, maximums)
+
+        self.assertEqual(widths.tolist(), [3, 1, 4, 3, 2, 0, 3, 1])
+        self.assertEqual(maximums.tolist(), [4, 3])
+        with self.assertRaisesRegex(TypeError, '单元格必须是 str'):
+            extension.measure(['a', 1], new_width_array(2))
+
+    def test_native_column_maximums_reduce_cached_width_buffer(self):
+        widths = new_width_array(6)
+        widths[:] = array(widths.typecode, [3, 1, 4, 1, 5, 9])
+        maximums = native_column.column_maximums_of(widths, 3)
+        if maximums is None:
+            self.skipTest('column 动态库与 _widths 扩展均不可用')
+
+        self.assertEqual(maximums.tolist(), [3, 5, 9])
+        with self.assertRaisesRegex(ValueError, '列数'):
+            native_column.column_maximums_of(widths, 4)
 
     def test_calc_text_width_matches_reference(self):
-        samples = ['abc', '中文', '\x1b[31m红\x1b[0m', 'é', '', 'a\tb']
+        samples = ['abc', '中文', '\x1b[31m红\x1b[0m', 'é', '', 'a\tb', '\x1b[1;32mok\x1b[0m\x1b']
         for sample in samples:
-            visible = ANSI_ESCAPE_PATTERN.sub('', normalize_cell_value(sample))
+            visible = normalize_cell_value(ANSI_ESCAPE_PATTERN.sub('', sample))
             width = wcswidth(visible)
             self.assertEqual(calc_text_width(sample), width if width >= 0 else len(visible))
 
@@ -1,23 +1,77 @@
+import array
+import contextlib
+import io
+import json
 import os
+import socket
+import subprocess
+import sys
 import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-from printable import detect_file_format, read_csv, readable
+from printable import (
+    ColumnarTable,
+    _bar_column,
+    _python_text_width,
+    _python_widths,
+    calculate_bar_maximums,
+    convert_value_to_bar,
+    detect_file_format,
+    iter_csv,
+    iter_readable_fixed,
+    open_follow_records,
+    read_csv,
+    read_json,
+    read_jsonl,
+    read_yaml,
+    readable,
+    render_many,
+    width_cache_clear,
+    width_cache_info,
+    write_lines,
+)
 
 
 class PrintableTest(unittest.TestCase):
+    def test_follow_records_close_the_input_file(self):
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.jsonl', delete=False) as file:
+            file.write('{"a": 1}\n{"a": 2}\n')
+            path = file.name
+        opened = []
+
+        def tracking_open(*arguments, **keywords):
+            opened.append(open(*arguments, **keywords))
+            return opened[-1]
+
+        try:
+            with mock.patch('printable.open', tracking_open, create=True):
+                records = open_follow_records(path)
+                self.assertEqual(next(records), {'a': 1})
+                records.close()
+                self.assertEqual(list(open_follow_records(path, 'csv')), [['{"a": 1}'], ['{"a": 2}']])
+            self.assertEqual(len(opened), 2)
+            self.assertTrue(all(stream.closed for stream in opened))
+            with self.assertRaisesRegex(ValueError, 'JSON Lines'):
+                open_follow_records(path, 'yaml')
+        finally:
+            os.unlink(path)
+
     def test_csv_supports_bom_quotes_and_embedded_newline(self):
         with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8-sig', newline='', delete=False) as file:
             file.write('name,note\r\nA,"one, two\r\nthree"\r\n')
             path = file.name
         try:
-            self.assertEqual(read_csv(path), [{'name': 'A', 'note': 'one, two\r\nthree'}])
+            self.assertEqual(read_csv(path), [['name', 'note'], ['A', 'one, two\r\nthree']])
         finally:
             os.unlink(path)
 
     def test_detect_file_format_by_extension_and_content(self):
         cases = (
             ('[{"a": 1}]', 'json'),
+            ('{"a": 1}\n{"a": 2}\n', 'jsonl'),
             ('{\n  "a": 1\n}', 'json'),
             ('name,value\nA,1\n', 'csv'),
             ('name: A\nvalue: 1\n', 'yaml'),
@@ -71,8 +125,520 @@ class PrintableTest(unittest.TestCase):
         self.assertIn('-xx', negative)
         self.assertNotIn('xxxxxxxxxxxxx', fractional)
 
+    def test_wide_bars_cache_only_drawn_lengths(self):
+        from printable import _bar_strings
+
+        # 条形文本按需生成：bar_width 很大时不预先生成 0..bar_width 的全部长度（内存与 bar_width 的平方成正比）
+        _bar_strings.cache_clear()
+        text = readable([['n'], [4], [-2]], bars=['n'], bar_width=60000, bar_char='#')
+        self.assertIn(f' {"#" * 60000} ', text)
+        self.assertIn(f' -{"#" * 30000} ', text)
+        positive, negative = _bar_strings('#')
+        self.assertEqual((len(positive), len(negative)), (1, 1))
+
     def test_invalid_grid_and_negative_limit_raise_clear_errors(self):
         with self.assertRaisesRegex(ValueError, '不支持的 grid'):
             readable([['name'], ['A']], grid='unknown')
         with self.assertRaisesRegex(ValueError, 'limit 不能小于 0'):
             readable([['name'], ['A']], limit=-1)
+
+    def test_stream_matches_in_memory_rendering(self):
+        rows = [{'name': 'A', 'value': '-3'}, {'name': '中文', 'value': '12', 'note': 'x|y'}, {'value': 'n/a'}]
+        for grid in (None, 'full', 'inner', 'markdown'):
+            expected = readable(rows, grid=grid, bars=['value'], bar_width=5)
+            self.assertEqual(
+                readable(lambda: iter(rows), grid=grid, bars=['value'], bar_width=5, stream=True), expected
+            )
+
+    def test_stream_reads_csv_file_twice(self):
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False) as file:
+            file.write('name,value\nA,1\nB,22\n')
+            path = file.name
+        try:
+            self.assertEqual(readable(lambda: iter_csv(path), stream=True), readable(read_csv(path)))
+        finally:
+            os.unlink(path)
+
+    def test_stream_rejects_single_pass_iterator(self):
+        with self.assertRaisesRegex(TypeError, '可重复读取'):
+            readable(iter([['name'], ['A']]), stream=True)
+
+    def test_fixed_widths_match_readable_when_sample_covers_input(self):
+        rows = [['name', 'value'], ['alpha', 1], ['中文', 'x|y']]
+        for grid in (None, 'full', 'inner', 'markdown'):
+            self.assertEqual('\n'.join(iter_readable_fixed(rows, sample=10, grid=grid)), readable(rows, grid=grid))
+
+    def test_fixed_widths_truncate_wrap_and_repeat_header(self):
+        rows = [['name'], ['abcdef'], ['中文字']]
+        self.assertEqual(list(iter_readable_fixed(rows, widths=[4])), [' name ', ' abc… ', ' 中…  '])
+        wrapped = list(iter_readable_fixed(iter(rows), widths=[4], overflow='wrap', repeat_header=1))
+        self.assertEqual(wrapped, [' name ', ' abcd ', ' ef   ', ' name ', ' 中文 ', ' 字   '])
+
+    def test_limit_stops_readers_before_invalid_tail(self):
+        self.assertEqual(read_json(None, b'[{"a": 1}, {"a": 2}, not json', limit=2), [{'a': 1}, {'a': 2}])
+        self.assertEqual(read_json(None, b'{"a": 1}', limit=1), {'a': 1})
+        self.assertEqual(read_yaml(None, b'- a: 1\n- a: 2\n- [unclosed\n', limit=2), [{'a': 1}, {'a': 2}])
+        self.assertEqual(read_csv(None, b'name\nA\nB,extra\n', limit=2), [['name'], ['A']])
+        self.assertEqual(read_yaml(None, b'---\n- a: 1\n- a: 2\n', limit=1), [{'a': 1}])
+        with self.assertRaisesRegex(Exception, 'single document'):
+            read_yaml(None, b'- a: 1\n---\n- a: 2\n', limit=1)
+
+    def test_header_only_csv_renders_its_header(self):
+        self.assertEqual(read_csv(None, b'name,value\n'), [['name', 'value']])
+        self.assertEqual(readable(read_csv(None, b'name,value\n'), grid='full').splitlines()[1], '│ name │ value │')
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.csv', delete=False) as file:
+            file.write('name,value\n')
+            path = file.name
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        environment = {**os.environ, 'PYTHONPATH': project_root}
+        try:
+            for engine in ('python', 'auto'):
+                result = subprocess.run(
+                    [sys.executable, '-m', 'printable', '-f', path, '-e', engine],
+                    env=environment,
+                    capture_output=True,
+                    text=True,
+                    check=False,
+                )
+                self.assertEqual((result.returncode, result.stdout), (0, ' name  value \n'), result.stderr)
+        finally:
+            os.unlink(path)
+
+    def test_read_csv_limit_counts_the_header_row(self):
+        # read_csv 返回 [表头, 行, ...]，limit 限制的是返回的项数，表头也算一项
+        content = b'name\nA\nB\n'
+        self.assertEqual(read_csv(None, content, limit=0), [])
+        self.assertEqual(read_csv(None, content, limit=1), [['name']])
+        self.assertEqual(read_csv(None, content, limit=2), [['name'], ['A']])
+        self.assertEqual(read_csv(None, content, limit=3), [['name'], ['A'], ['B']])
+
+    def test_limit_infers_dict_headers_from_shown_rows_only(self):
+        rows = [{'name': 'A'}, {'name': 'B', 'extra': 1}]
+        self.assertEqual(readable(rows, limit=1), ' name \n A    ')
+        self.assertEqual(readable(rows, limit=0), ' name ')
+        self.assertEqual(readable([{}, {'name': 'A'}], limit=0), '')
+        self.assertEqual(readable(lambda: iter([{}, {'name': 'A'}]), limit=0, stream=True), '')
+
+    def test_jsonl_reads_mapped_file_lazily(self):
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8-sig', suffix='.jsonl', delete=False) as file:
+            file.write('{"a": 1}\n\n{"a": 2, "b": "中"}\n{broken\n')
+            path = file.name
+        try:
+            self.assertEqual(detect_file_format(path), 'jsonl')
+            records = read_jsonl(path)
+            self.assertEqual(next(records), {'a': 1})
+            self.assertEqual(next(records), {'a': 2, 'b': '中'})
+            with self.assertRaisesRegex(ValueError, '第 4 行'):
+                next(records)
+            self.assertEqual(list(read_jsonl(path, limit=1)), [{'a': 1}])
+        finally:
+            os.unlink(path)
+
+    def test_render_many_keeps_order_and_reports_failed_table(self):
+        tables = [[['n', 'v'], [index, 'x' * index]] for index in range(3)] + ['bad']
+        results = render_many(tables, grid='full', workers=2)
+        self.assertEqual(results[:3], [readable(table, grid='full') for table in tables[:3]])
+        self.assertIsInstance(results[3], TypeError)
+        with self.assertRaisesRegex(TypeError, '不支持的渲染参数'):
+            render_many(tables, color=True)
+
+    def test_python_widths_match_wcswidth_for_every_codepoint(self):
+        cells = [chr(codepoint) for codepoint in range(sys.maxunicode + 1)]
+        cells += ['a中é', '👨\u200d👩', '❤\ufe0f', 'a\x01b', '\x00', '\u0301e', '\U00020000x', '']
+        self.assertEqual(_python_widths(cells), [_python_text_width(cell) for cell in cells])
+
+    def test_python_widths_fall_back_when_wcwidth_tables_change(self):
+        import wcwidth
+
+        import printable
+
+        cells = ['a中é', '\u0301e', '\U00020000x']
+        expected = [_python_text_width(cell) for cell in cells]
+        for table in ({}, {version: [] for version in wcwidth.ZERO_WIDTH}):
+            printable._width_patterns.cache_clear()
+            try:
+                with mock.patch.object(wcwidth, 'ZERO_WIDTH', table):
+                    self.assertIsNone(printable._width_patterns())
+                    self.assertEqual(_python_widths(cells), expected)
+            finally:
+                printable._width_patterns.cache_clear()
+
+    def test_keep_ansi_preserves_colours_and_pads_by_visible_width(self):
+        rows = [['status'], ['\x1b[32mok\x1b[0m'], ['\x1b[31mfailed\x1b[0m'], ['a\x1bb']]
+        lines = readable(rows, keep_ansi=True).split('\n')
+
+        self.assertEqual(lines[1], ' \x1b[32mok\x1b[0m     ')
+        self.assertEqual(lines[3], ' a b    ')
+        self.assertNotIn('\x1b', readable(rows))
+
+    def test_columnar_table_renders_like_rows(self):
+        columns = {'name': ['甲', 'b|c', None], 'score': array.array('d', [1.5, float('nan'), -3.0])}
+        columns['count'] = memoryview(array.array('q', [10, 200, 3]))
+        rows = [['name', 'score', 'count'], ['甲', 1.5, 10], ['b|c', float('nan'), 200], [None, -3.0, 3]]
+        table = ColumnarTable(columns)
+
+        for options in ({}, {'grid': 'markdown', 'limit': 2}, {'bars': ['score', 'count'], 'bar_scale': 'ln'}):
+            self.assertEqual(readable(table, **options), readable(rows, **options))
+        self.assertEqual(readable(table, stream=True), readable(rows))
+        with self.assertRaisesRegex(ValueError, '长度'):
+            ColumnarTable({'a': [1], 'b': []})
+
+    def test_bar_column_matches_per_cell_conversion(self):
+        values = [3, -7.5, '2', ' 4 ', '\x005', 'x', '', None, True, float('nan'), float('inf'), 0, -0.0, '1e3']
+        records = [[value] for value in values]
+
+        for bar_scale in ('linal', 'ln', 'log10'):
+            maximums = calculate_bar_maximums(records, ['v'], {'v'}, bar_scale)
+            expected = [convert_value_to_bar(value, 'v', {'v'}, 'x', 10, maximums, bar_scale) for value in values]
+            self.assertEqual(_bar_column(values, 'x', 10, bar_scale), (expected, maximums['v']))
+
+    def test_write_lines_flushes_chunks_and_partial_output(self):
+        class RecordingOutput(io.BytesIO):
+            def __init__(self):
+                super().__init__()
+                self.writes = 0
+
+            def write(self, data):
+                self.writes += 1
+                return super().write(data)
+
+        def lines():
+            yield from ('表头', 'a', 'b')
+            raise ValueError('中途失败')
+
+        output = RecordingOutput()
+        self.assertEqual(write_lines(['表头', 'a', 'b'] * 4, output, chunk_size=12), len('表头\na\nb\n'.encode()) * 4)
+        self.assertEqual(output.getvalue(), '表头\na\nb\n'.encode() * 4)
+        self.assertEqual(output.writes, 3)
+
+        output = RecordingOutput()
+        with self.assertRaisesRegex(ValueError, '中途失败'):
+            write_lines(lines(), output)
+        self.assertEqual(output.getvalue(), '表头\na\nb\n'.encode())
+
+    def test_import_defers_optional_modules(self):
+        deferred = ['argparse', 'concurrent.futures', 'csv', 'ctypes', 'json', 'subprocess', 'wcwidth', 'yaml']
+        code = f'import sys, printable; print([name for name in {deferred!r} if name in sys.modules])'
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+        self.assertEqual(result.stdout.strip(), '[]')
+
+    def test_render_file_parallel_matches_serial_rendering(self):
+        import printable
+        from printable import _records, calibration, parallel
+
+        csv_rows = (f'{index},"第 {index} 行\n含 ""引号"", 逗号",{index - 20}\n' for index in range(40))
+        csv_content = 'id,note,score\n' + ''.join(csv_rows)
+        jsonl_content = ''.join(f'{{"id": {index}, "extra{index % 3}": "|{index}|"}}\n\n' for index in range(40))
+        with mock.patch.object(parallel, 'PARALLEL_MIN_CHUNK_SIZE', 64):
+            for suffix, content, reader in (('.csv', csv_content, read_csv), ('.jsonl', jsonl_content, read_jsonl)):
+                with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix=suffix, delete=False) as file:
+                    file.write(content)
+                    path = file.name
+                try:
+                    options = {'grid': 'markdown', 'bars': ['score'], 'bar_width': 8}
+                    lines = list(parallel.render_file_parallel(path, jobs=3, engine='python', **options))
+                    self.assertEqual(lines, readable(list(reader(path)), **options).split('\n'))
+                    # engine=auto 同样经代价模型选择引擎并输出调试信息；选中 python 时补上 Markdown 转义
+                    costs = {'python': (0.0, 0.0, 1.0, 0.0), 'column': (0.0, 0.0, 2.0, 0.0)}
+                    with (
+                        mock.patch.object(parallel, 'column_available', return_value=True),
+                        mock.patch.object(calibration, 'load_engine_costs', return_value=(costs, '测试系数')),
+                        mock.patch.object(printable, 'DEBUG', '1'),
+                        contextlib.redirect_stderr(io.StringIO()) as stderr,
+                    ):
+                        self.assertEqual(list(parallel.render_file_parallel(path, jobs=3, **options)), lines)
+                    self.assertIn('printable: engine=python: 41 行 × ', stderr.getvalue())
+                finally:
+                    os.unlink(path)
+
+            # 未加引号的字段中的引号是普通字符，会让按引号奇偶估计的块边界落进带引号的字段：
+            # 子进程核对出块没有结束在记录边界，改为串行读取，输出与串行一致
+            stray_quote_content = 'name,note\ntv,5" screen\n' + '"line one\nline two",ok\n' * 40
+            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.csv', delete=False) as file:
+                file.write(stray_quote_content)
+                path = file.name
+            try:
+                lines = list(parallel.render_file_parallel(path, jobs=3, engine='python'))
+                self.assertEqual(lines, readable(read_csv(path)).split('\n'))
+                self.assertEqual(len(lines), 42)
+            finally:
+                os.unlink(path)
+
+            # 出错时报告的行号与记录序号与串行读取一致，而不是从块首算起
+            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.jsonl', delete=False) as file:
+                file.write(jsonl_content + '{broken\n' + jsonl_content)
+                path = file.name
+            try:
+                with self.assertRaises(ValueError) as serial_error:
+                    readable(list(read_jsonl(path)))
+                with self.assertRaises(ValueError) as parallel_error:
+                    list(parallel.render_file_parallel(path, jobs=3, engine='python'))
+                self.assertEqual(str(parallel_error.exception), str(serial_error.exception))
+            finally:
+                os.unlink(path)
+        with self.assertRaisesRegex(ValueError, '第 41 条记录'):
+            list(_records._iter_mapping_records([{'a': 1}, {None: 1}], 40))
+
+    def test_parallel_row_formatting_keeps_row_lines_between_chunks(self):
+        import printable
+
+        rows = [['name', '说明']] + [[f'row-{index}', '中文|' * (index % 4)] for index in range(23)]
+        with mock.patch.object(printable, 'PARALLEL_RENDER_CHUNK_ROWS', 5):
+            for grid in (None, 'full', 'markdown'):
+                self.assertEqual(readable(rows, grid=grid, jobs=2), readable(rows, grid=grid))
+        with self.assertRaisesRegex(ValueError, 'jobs'):
+            readable(rows, jobs=0)
+
+    def test_stdin_file_is_read_from_current_offset(self):
+        # 调用方已读走开头一行（如 `{ read -r line; printable; } < file`）时不能按路径从头重新读取
+        with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.csv', delete=False) as file:
+            file.write('skip me\nname,说明\nalpha,第一行\n')
+            path = file.name
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        environment = {**os.environ, 'PYTHONPATH': project_root}
+        expected = readable([['name', '说明'], ['alpha', '第一行']]) + '\n'
+        try:
+            for arguments in ([], ['--stream']):
+                with open(path, 'rb', buffering=0) as stdin:
+                    stdin.read(len('skip me\n'))
+                    command = [sys.executable, '-m', 'printable', '-t', 'csv', *arguments]
+                    result = subprocess.run(
+                        command, stdin=stdin, env=environment, capture_output=True, text=True, check=False
+                    )
+                self.assertEqual((result.returncode, result.stdout), (0, expected), result.stderr)
+        finally:
+            os.unlink(path)
+
+    def test_via_socket_matches_local_rendering(self):
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, 'printable.sock')
+            with open(os.path.join(directory, 'data.csv'), 'w', encoding='utf-8') as file:
+                file.write('name;说明\nalpha;第一行\nbeta;第二行\n')
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            environment = {**os.environ, 'PYTHONPATH': project_root, 'PRINTABLE_SOCKET': socket_path}
+            server = subprocess.Popen([sys.executable, '-m', 'printable', 'serve'], env=environment)
+            try:
+                deadline = time.monotonic() + 30
+                while not os.path.exists(socket_path) and time.monotonic() < deadline:
+                    time.sleep(0.05)
+
+                def run(*arguments):
+                    command = [sys.executable, '-m', 'printable', '-f', 'data.csv', '--grid', 'full', *arguments]
+                    run_environment = {**environment, 'CSV_DELIMITER': ';'}
+                    return subprocess.run(
+                        command, cwd=directory, env=run_environment, capture_output=True, text=True, check=False
+                    )
+
+                local, forwarded = run(), run('--via-socket')
+                self.assertEqual(forwarded.returncode, 0, forwarded.stderr)
+                self.assertIn('第二行', forwarded.stdout)
+                self.assertEqual(forwarded.stdout, local.stdout)
+                self.assertEqual(run('--via-socket', '-l', '-1').returncode, 2)
+                # 服务端同样拒绝在子进程中再启动服务
+                code = 'import sys\nfrom printable import server\nsys.exit(server.forward(["serve"]))'
+                rejected = subprocess.run(
+                    [sys.executable, '-c', code], env=environment, capture_output=True, text=True, check=False
+                )
+                self.assertEqual(rejected.returncode, 2)
+                self.assertIn('serve', rejected.stderr)
+            finally:
+                server.terminate()
+                server.wait(30)
+            self.assertFalse(os.path.exists(socket_path))
+
+    def test_via_socket_is_only_recognized_as_a_standalone_option(self):
+        import printable
+
+        cases = [
+            (['-f', 'a.csv', '--via-socket'], (True, ['-f', 'a.csv'])),
+            (['--sep-col', '--via-socket', '-f', 'a.csv'], (False, ['--sep-col', '--via-socket', '-f', 'a.csv'])),
+            (['-Nc', '--via-socket'], (False, ['-Nc', '--via-socket'])),
+            (['--sep-c', '--via-socket'], (False, ['--sep-c', '--via-socket'])),
+            (['--sep-col=|', '-cx', '--via-socket'], (True, ['--sep-col=|', '-cx'])),
+            (['-l', '-1', '--via-socket'], (True, ['-l', '-1'])),
+            (['--', '--via-socket'], (False, ['--', '--via-socket'])),
+        ]
+        for arguments, expected in cases:
+            self.assertEqual(printable._split_via_socket(arguments), expected, arguments)
+
+        with mock.patch.object(sys, 'argv', ['printable', '--via-socket', 'serve']):
+            with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit) as context:
+                printable.main()
+        self.assertEqual(context.exception.code, 2)
+        self.assertIn('serve', stderr.getvalue())
+
+    def test_via_socket_refuses_services_of_other_users(self):
+        from printable import server
+
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, 'printable.sock')
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+                listener.bind(socket_path)
+                listener.listen()
+                with mock.patch.object(server, '_peer_uid', return_value=os.getuid() + 1):
+                    with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                        self.assertEqual(server.forward(['-f', 'data.csv'], socket_path), 1)
+                self.assertIn('不属于当前用户', stderr.getvalue())
+                # 请求在核对对端之前不会发出：服务端只看到一个立即关闭的连接
+                connection, _ = listener.accept()
+                with connection:
+                    self.assertEqual(connection.recv(1), b'')
+                    self.assertEqual(server._peer_uid(connection), os.getuid())
+
+            # /tmp 回退目录被他人占用或权限过宽时拒绝使用；残留的套接字无权连接时给出明确的错误
+            private_directory = os.path.join(directory, 'private')
+            self.assertEqual(server._private_directory(private_directory), private_directory)
+            os.chmod(private_directory, 0o755)
+            with self.assertRaisesRegex(PermissionError, '私有'):
+                server._private_directory(private_directory)
+            with mock.patch.object(socket.socket, 'connect', side_effect=PermissionError):
+                with self.assertRaisesRegex(ValueError, '其他用户'):
+                    server._remove_stale_socket(socket_path)
+
+    def test_auto_engine_follows_calibrated_cost_model(self):
+        import printable
+        from printable import calibration
+
+        shapes = [(1, 2, 0), (5, 12, 60), (50, 2, 40), (500, 12, 0), (7, 6, 3)]
+        samples = [
+            ((1.0, rows, rows * columns, wide), 40 + 2 * rows + 3 * rows * columns + 0.5 * wide)
+            for rows, columns, wide in shapes
+        ]
+        for fitted, expected in zip(calibration.fit_costs(samples), (40, 2, 3, 0.5)):
+            self.assertAlmostEqual(fitted, expected, places=6)
+
+        # 内置默认系数下 column 的各项都不高于 python：直接选择 column，不读入惰性数据估计形状
+        lazy = iter([['name'], ['a']])
+        defaults = (calibration.DEFAULT_ENGINE_COSTS, '内置默认系数')
+        with mock.patch.object(calibration, 'load_engine_costs', return_value=defaults):
+            self.assertEqual(printable._choose_auto_engine(lazy, None)[:2], (lazy, 'column'))
+        self.assertEqual(next(lazy), ['name'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'engine-costs.json')
+            with open(path, 'w', encoding='utf-8') as file:
+                costs = {'python': [0, 0, 10, 0], 'column': [500, 0, 1, 0]}
+                json.dump({'features': list(calibration.COST_FEATURES), **costs}, file)
+            original_path = os.environ.get('PRINTABLE_CALIBRATION')
+            os.environ['PRINTABLE_CALIBRATION'] = path
+            calibration.load_engine_costs.cache_clear()
+            try:
+                small = (row for row in [['name', 'note'], ['a', '表格']])
+                data, engine, reason = printable._choose_auto_engine(small, None)
+                self.assertEqual((data, engine), ([['name', 'note'], ['a', '表格']], 'python'))
+                self.assertIn('2 行 × 2 列', reason)
+                self.assertIn(path, reason)
+                large = [{'name': str(index)} for index in range(100)]
+                self.assertEqual(printable._choose_auto_engine(large, None)[1], 'column')
+                self.assertIn('11 行 × 1 列', printable._choose_auto_engine(large, 10)[2])
+
+                stderr = io.StringIO()
+                original_debug, printable.DEBUG = printable.DEBUG, '1'
+                try:
+                    with contextlib.redirect_stderr(stderr):
+                        printable._report_engine(engine, reason)
+                finally:
+                    printable.DEBUG = original_debug
+                self.assertTrue(stderr.getvalue().startswith('printable: engine=python: 2 行 × 2 列'))
+            finally:
+                if original_path is None:
+                    del os.environ['PRINTABLE_CALIBRATION']
+                else:
+                    os.environ['PRINTABLE_CALIBRATION'] = original_path
+                calibration.load_engine_costs.cache_clear()
+
+    def test_render_profile_records_stages_and_width_backends(self):
+        from printable import RenderProfile, iter_readable
+
+        width_cache_clear()
+        rows = [['name', '说明']] + [[f'row{index}', '第{index}行'] for index in range(20)]
+        profile = RenderProfile()
+        lines = list(iter_readable(rows, grid='full', profile=profile))
+        self.assertEqual(lines, readable(rows, grid='full').split('\n'))
+
+        stages = profile.as_dict()['stages']
+        self.assertLessEqual({'normalize', 'convert', 'widths', 'format'}, set(stages))
+        self.assertEqual(stages['widths']['cells'], 42)
+        # format 与 read 的 rows 只计数据行，不含表头、分隔线与边框
+        self.assertEqual(stages['format']['rows'], 20)
+        total = profile.as_dict()['total_seconds']
+        self.assertLessEqual(sum(stage['seconds'] for stage in stages.values()), total)
+        widths = json.loads(profile.to_json())['widths']
+        self.assertEqual(sum(widths['backends'].values()), widths['cache_misses'])
+        self.assertIsNone(profile.as_dict()['peak_memory'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.csv')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('name,说明\nalpha,第一行\n')
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            result = subprocess.run(
+                [sys.executable, '-m', 'printable', '-f', path, '--profile'],
+                env={**os.environ, 'PYTHONPATH': project_root},
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+            report = json.loads(result.stderr)
+            self.assertEqual(report['stages']['read']['bytes_in'], os.path.getsize(path))
+            self.assertEqual(report['stages']['read']['rows'], 1)
+            format_stage = report['stages'].get('format') or report['stages']['native_format']
+            self.assertEqual(format_stage['rows'], 1)
+            self.assertEqual(report['stages']['write']['bytes_out'], len(result.stdout.encode('utf-8')))
+            self.assertIn(report['engine'], ('python', 'column'))
+
+    def test_width_cache_measures_repeated_cells_once(self):
+        width_cache_clear()
+        rows = [['status', 'code']] + [['正常', '200'], ['失败', '500']] * 50
+        expected = readable(rows)
+
+        self.assertEqual(width_cache_info().misses, 6)
+        self.assertEqual(readable(rows), expected)
+        cache_info = width_cache_info()
+        self.assertEqual(cache_info.misses, 6)
+        self.assertEqual(cache_info.hits, 2 * len(rows) * 2 - 6)
+
+        long_rows = [['text'], ['长' * 300], ['长' * 300]]
+        self.assertEqual(readable(long_rows), readable(long_rows))
+        self.assertEqual(width_cache_info().currsize, 7)
+
+    def test_width_cache_is_consistent_across_threads(self):
+        import printable
+
+        tables = [
+            [['key', 'value']] + [[f'k{index % 7}', '值' * (index % 11)] for index in range(seed, seed + 300)]
+            for seed in range(16)
+        ]
+        expected = [readable(table) for table in tables]
+        with mock.patch.object(printable, 'WIDTH_CACHE_SIZE', 8):
+            width_cache_clear()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                self.assertEqual(list(executor.map(readable, tables * 4)), expected * 4)
+            self.assertLessEqual(width_cache_info().currsize, 8)
+
+    def test_widths_use_python_tables_outside_utf8_locale(self):
+        # C locale 下 C 库 wcwidth 把非 ASCII 字符按字节数计，native 宽度必须让位给 wcwidth 包
+        code = (
+            'from printable import _calculate_widths, native_widths_of, readable\n'
+            "cells = ['中', 'é', 'a']\n"
+            'print(native_widths_of(cells), _calculate_widths([cells])[0])\n'
+            "print(readable([['名称', 'x'], cells[:2]]).encode('unicode_escape').decode('ascii'))"
+        )
+        environment = {**os.environ, 'LC_ALL': 'C'}
+        result = subprocess.run(
+            [sys.executable, '-c', code], env=environment, capture_output=True, text=True, check=True
+        )
+        expected_table = readable([['名称', 'x'], ['中', 'é']]).encode('unicode_escape').decode('ascii')
+        self.assertEqual(result.stdout, f'None [2, 1, 1]\n{expected_table}\n')
+
+    def test_json_and_yaml_read_mapped_files_with_bom(self):
+        for suffix, content, reader in (('.json', '[{"a": "é"}]', read_json), ('.yaml', '- a: é\n', read_yaml)):
+            with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8-sig', suffix=suffix, delete=False) as file:
+                file.write(content)
+                path = file.name
+            try:
+                self.assertEqual(reader(path), [{'a': 'é'}])
+            finally:
+                os.unlink(path)